@@ -10,26 +10,145 @@ This module performs aggregation and analysis on cleaned bank statement data,
 calculating monthly spending totals and category breakdowns.
 
 Functions:
+    aggregate_month_category: Build the month x category spending matrix
     aggregations: Aggregate transaction data by month and category
 """
 
 import sys
 import logging
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 
-from pandas import DataFrame
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Index, PeriodIndex
 from haashi_pkg.utility import Logger
-from haashi_pkg.data_engine import DataLoader, DataAnalyzer
+import shared_path  # noqa: F401
+from money import from_minor_units
+from storage import (
+    AMOUNT_COLUMN,
+    MINOR_AMOUNT_COLUMN,
+    dataset_columns,
+    filter_months,
+    read_cleaned_dataset,
+)
+from summary import DatasetSummary, summary_statistics
 
 
 # Type alias for return value
 AggregationResult = Tuple[DataFrame, DataFrame, float, int, float]
 
 
+# Float accumulation of integers is exact while every sum stays below this
+FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+class MonthCategoryTotals(NamedTuple):
+    """
+    Spending sums and row counts per (month, category) cell.
+
+    sums is int64 (and exact) for integer amounts, float64 otherwise.
+    """
+    sums: np.ndarray
+    counts: np.ndarray
+    months: PeriodIndex
+    categories: Index
+    transaction_count: int
+    max_expense: float
+
+
+def aggregate_month_category(
+    df: DataFrame,
+    amount_col: str = AMOUNT_COLUMN,
+    month_col: str = "trans_month",
+    category_col: str = "description"
+) -> MonthCategoryTotals:
+    """
+    Build the month x category spending matrix in one accumulation pass.
+
+    Months are taken as period ordinals offset from the first month and
+    categories as categorical codes; both are combined into one integer key
+    per row and accumulated with np.bincount. Rows with a missing month or
+    category are left out of the matrix (as groupby would) but still count
+    towards transaction_count and max_expense. Missing amounts add nothing.
+
+    Integer amounts (such as fixed-point kobo) are summed exactly: through
+    the float accumulator while no sum can reach 2**53, in int64 otherwise.
+    """
+    integer_amounts = pd.api.types.is_integer_dtype(df[amount_col].dtype)
+    amounts = df[amount_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    max_expense = float(np.nanmax(amounts)) if len(amounts) else float("nan")
+
+    # Category codes (-1 for missing)
+    category = df[category_col]
+    if isinstance(category.dtype, pd.CategoricalDtype):
+        category_codes = category.cat.codes.to_numpy()
+        categories = category.cat.categories
+    else:
+        category_codes, categories = pd.factorize(category, sort=True)
+
+    # Month ordinals (NaT is the minimum int64)
+    ordinals = df[month_col].array.asi8
+    valid = (ordinals != np.iinfo(np.int64).min) & (category_codes >= 0)
+
+    # Only copy when some rows fall outside the matrix
+    all_valid = bool(valid.all())
+    if not all_valid:
+        ordinals = ordinals[valid]
+        category_codes = category_codes[valid]
+        amounts = amounts[valid]
+
+    if len(ordinals):
+        first_ordinal = int(ordinals.min())
+        n_months = int(ordinals.max()) - first_ordinal + 1
+    else:
+        first_ordinal, n_months = 0, 0
+
+    # Combined key: month offset * n_categories + category code
+    n_categories = len(categories)
+    keys = ordinals - first_ordinal
+    keys *= n_categories
+    keys += category_codes
+
+    if np.isnan(amounts).any():
+        amounts = np.nan_to_num(amounts)
+
+    size = n_months * n_categories
+    sums = np.bincount(keys, weights=amounts, minlength=size)
+    counts = np.bincount(keys, minlength=size)
+
+    if integer_amounts:
+        if np.abs(amounts).max(initial=0) * len(amounts) < FLOAT_EXACT_LIMIT:
+            sums = sums.astype(np.int64)
+        else:
+            int_amounts = df[amount_col].to_numpy(dtype=np.int64, na_value=0)
+            if not all_valid:
+                int_amounts = int_amounts[valid]
+            sums = np.zeros(size, dtype=np.int64)
+            np.add.at(sums, keys, int_amounts)
+
+    months = pd.period_range(
+        start=pd.Period(ordinal=first_ordinal, freq="M"),
+        periods=n_months,
+        freq="M"
+    )
+
+    return MonthCategoryTotals(
+        sums=sums.reshape(n_months, n_categories),
+        counts=counts.reshape(n_months, n_categories),
+        months=months,
+        categories=categories,
+        transaction_count=len(df),
+        max_expense=max_expense,
+    )
+
+
 def aggregations(
     filepath: str = "data/cleaned_bank_statement_2025.parquet",
     logger: Optional[Logger] = None,
-    can_return: bool = True
+    can_return: bool = True,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    bank_st_df: Optional[DataFrame] = None
 ) -> Optional[AggregationResult]:
     """
     Aggregate bank statement data by month and category.
@@ -37,6 +156,21 @@ def aggregations(
     Calculates monthly spending totals, spending by category, median monthly
     spending, transaction count, and maximum single expense.
 
+    start_month and end_month ("YYYY-MM", inclusive, either optional) limit
+    the analysis to a month range. On the partitioned cleaned dataset only
+    the matching trans_month partitions are read, and row-group date
+    statistics skip the rest.
+
+    If bank_st_df is given (e.g. returned by clean_data(can_return=True)),
+    it is aggregated directly and nothing is read from filepath. Otherwise
+    only the month, category and amount columns are read, and for the full
+    dataset transaction_count and max_expense come from the summary written
+    at clean time (see summary.summary_statistics).
+
+    Data cleaned with fixed-point money (a debit(kobo) column) is summed
+    exactly in kobo; totals are reported in naira, and the exact sums are
+    kept in total_spending_kobo columns.
+
     Returns:
         Tuple containing:
             - monthly_spending: DataFrame with total spending per month
@@ -51,47 +185,72 @@ def aggregations(
     if logger is None:
         logger = Logger(level=logging.INFO)
 
-    logger.debug(f"Loading data from {filepath}")
+    # Load data (a directory is the partitioned cleaned dataset)
+    summary: Optional[DatasetSummary] = None
+
+    if bank_st_df is not None:
+        logger.debug("Using cleaned data handed over in memory")
+        if start_month or end_month:
+            bank_st_df = filter_months(bank_st_df, start_month, end_month)
+        fixed_point = MINOR_AMOUNT_COLUMN in bank_st_df.columns
+    else:
+        logger.debug(f"Loading data from {filepath}")
+        fixed_point = MINOR_AMOUNT_COLUMN in dataset_columns(filepath)
+        amount_col = MINOR_AMOUNT_COLUMN if fixed_point else AMOUNT_COLUMN
+
+        bank_st_df = read_cleaned_dataset(
+            filepath, start_month, end_month,
+            columns=["trans_month", "description", amount_col]
+        )
 
-    # Initialize analyzer and load data
-    analyzer = DataAnalyzer(logger=logger)
-    loader = DataLoader(filepath, logger=logger)
-    bank_st_df = loader.load_parquet_single()
+        # Count and maximum of the full dataset come from metadata
+        if not (start_month or end_month):
+            summary = summary_statistics(filepath, [amount_col])
+            logger.debug(f"Summary statistics read from {summary.source}")
 
     logger.debug(f"Loaded {len(bank_st_df)} transactions")
     logger.debug("Performing aggregations...")
 
-    # Aggregate by month
-    monthly_spending = (
-        analyzer.aggregate(bank_st_df, "debit(₦)", "trans_month", "sum")
-        .reset_index()
-        .rename(columns={
-            "trans_month": "months",
-            "debit(₦)": "total_spending",
-        })
-        .sort_values("months")
-    )
+    # Month x category matrix from a single accumulation pass
+    amount_col = MINOR_AMOUNT_COLUMN if fixed_point else AMOUNT_COLUMN
+    totals = aggregate_month_category(bank_st_df, amount_col)
+
+    # Aggregate by month (months with transactions only)
+    month_rows = totals.counts.sum(axis=1) > 0
+    monthly_spending = DataFrame({
+        "months": totals.months[month_rows],
+        "total_spending": totals.sums.sum(axis=1)[month_rows],
+    })
 
     logger.debug(f"Calculated spending across {len(monthly_spending)} months")
 
-    # Aggregate by category
-    spend_by_category = (
-        analyzer.aggregate(bank_st_df, "debit(₦)", "description", "sum")
-        .reset_index()
-        .rename(columns={
-            "description": "category",
-            "debit(₦)": "total_spending",
-        })
-        .sort_values("total_spending", ascending=False)
-    )
+    # Aggregate by category (observed categories only)
+    category_cols = totals.counts.sum(axis=0) > 0
+    spend_by_category = DataFrame({
+        "category": pd.Categorical(
+            totals.categories[category_cols], categories=totals.categories
+        ),
+        "total_spending": totals.sums.sum(axis=0)[category_cols],
+    }).sort_values("total_spending", ascending=False)
+
+    max_expense = totals.max_expense
+    transaction_count = totals.transaction_count
+    if summary is not None:
+        max_expense = float(summary.columns[amount_col].max)
+        transaction_count = summary.row_count
+
+    # Exact kobo totals are kept alongside naira for display
+    if fixed_point:
+        for frame in (monthly_spending, spend_by_category):
+            frame["total_spending_kobo"] = frame["total_spending"]
+            frame["total_spending"] = from_minor_units(frame["total_spending"])
+        max_expense = from_minor_units(max_expense)
 
     logger.debug(
         f"Calculated spending across {len(spend_by_category)} categories")
 
     # Calculate summary statistics
     monthly_avg = float(monthly_spending.total_spending.median())
-    max_expense = float(bank_st_df["debit(₦)"].max())
-    transaction_count = len(bank_st_df)
 
     logger.info("Aggregations completed successfully")
     logger.info(f"  Median monthly spending: ₦{monthly_avg:,.2f}")
@@ -0,0 +1,172 @@
+# benchmark.py
+
+"""
+Cleaning Stage Benchmarks
+
+This module times the parsing layer used by clean_data against the generic
+DataAnalyzer conversions it replaced, on synthetic statement columns of a
+configurable size, and checks that both paths agree where they overlap.
+
+Functions:
+    make_raw_columns: Build raw statement-style date and amount strings
+    benchmark_parsing: Compare date and amount parsing throughput
+"""
+
+import sys
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from haashi_pkg.utility import Logger
+from haashi_pkg.data_engine import DataAnalyzer
+import shared_path  # noqa: F401
+from parsing import parse_amounts, parse_dates
+from timing import DEFAULT_REPEATS, time_best
+from sample_data_generator import MAX_DEBIT, MIN_DEBIT, SAMPLE_START_DATE
+
+
+# Configuration: Benchmark size
+DEFAULT_BENCHMARK_ROWS = 2_000_000
+
+# Share of rows carrying the "--" placeholder instead of an amount
+PLACEHOLDER_SHARE = 0.1
+
+
+def make_raw_columns(num_rows: int, seed: int = 42) -> DataFrame:
+    """
+    Build raw date and amount columns as they arrive from statements.
+
+    Columns:
+        iso_date: "2025-03-14"
+        text_date: "14-Mar-2025"
+        plain_amount: "20774" or "--"
+        formatted_amount: "₦20,774.00" or "--"
+    """
+    rng = np.random.default_rng(seed)
+
+    days = SAMPLE_START_DATE + rng.integers(0, 365, num_rows).astype(
+        "timedelta64[D]")
+    dates = pd.DatetimeIndex(days)
+    amounts = rng.integers(MIN_DEBIT, MAX_DEBIT, num_rows)
+    placeholder = rng.random(num_rows) < PLACEHOLDER_SHARE
+
+    plain = Series(amounts).astype(str)
+    formatted = "₦" + Series(amounts).map("{:,}.00".format)
+
+    return DataFrame({
+        "iso_date": dates.strftime("%Y-%m-%d"),
+        "text_date": dates.strftime("%d-%b-%Y"),
+        "plain_amount": plain.mask(placeholder, "--"),
+        "formatted_amount": formatted.mask(placeholder, "--"),
+    }).astype(object)
+
+
+def _strip_then_convert(values: Series, analyzer: DataAnalyzer) -> Series:
+    """Regex-strip currency formatting, then convert generically."""
+    return analyzer.convert_numeric(
+        values.str.replace(r"[^0-9.\-]", "", regex=True)
+    )
+
+
+def _same_values(actual: Series, expected: Series) -> bool:
+    """Compare parsed columns, ignoring datetime unit and integer dtype."""
+    if pd.api.types.is_datetime64_any_dtype(expected.dtype):
+        return actual.astype("datetime64[ns]").equals(
+            expected.astype("datetime64[ns]"))
+
+    return bool(np.allclose(
+        actual.to_numpy(dtype="float64", na_value=np.nan),
+        expected.to_numpy(dtype="float64", na_value=np.nan),
+        equal_nan=True
+    ))
+
+
+def benchmark_parsing(
+    num_rows: int = DEFAULT_BENCHMARK_ROWS,
+    repeats: int = DEFAULT_REPEATS,
+    logger: Optional[Logger] = None
+) -> DataFrame:
+    """
+    Time the parsing layer against the generic conversions.
+
+    Returns one row per (column, method) with seconds, rows per second and
+    speedup over the baseline for that column. Raises AssertionError if the
+    two paths disagree on a column both can read.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    analyzer = DataAnalyzer(logger=logger)
+
+    logger.info(f"Building {num_rows:,} raw rows")
+    raw = make_raw_columns(num_rows)
+
+    cases = [
+        ("iso_date", "convert_datetime", analyzer.convert_datetime,
+         parse_dates),
+        ("text_date", "convert_datetime", analyzer.convert_datetime,
+         parse_dates),
+        ("plain_amount", "convert_numeric", analyzer.convert_numeric,
+         parse_amounts),
+        ("formatted_amount", "regex strip + convert_numeric",
+         lambda values: _strip_then_convert(values, analyzer),
+         parse_amounts),
+    ]
+
+    results: List[dict] = []
+
+    for column, baseline_name, baseline, fast in cases:
+        values = raw[column]
+
+        if not _same_values(fast(values), baseline(values)):
+            raise AssertionError(f"Parsing results differ for {column}")
+
+        baseline_seconds = time_best(baseline, values, repeats=repeats)
+        fast_seconds = time_best(fast, values, repeats=repeats)
+
+        for method, seconds in (
+            (baseline_name, baseline_seconds),
+            ("parsing layer", fast_seconds),
+        ):
+            results.append({
+                "column": column,
+                "method": method,
+                "seconds": round(seconds, 4),
+                "rows_per_second": int(num_rows / seconds),
+                "speedup": round(baseline_seconds / seconds, 1),
+            })
+
+        logger.info(
+            f"{column}: {baseline_name} {baseline_seconds:.3f}s, "
+            f"parsing layer {fast_seconds:.3f}s "
+            f"({baseline_seconds / fast_seconds:.1f}x)"
+        )
+
+    return DataFrame(results)
+
+
+def main() -> None:
+    """Run benchmarks as standalone script (optional row count argument)."""
+    logger = Logger(level=logging.INFO)
+
+    try:
+        num_rows = int(sys.argv[1]) if len(sys.argv) > 1 \
+            else DEFAULT_BENCHMARK_ROWS
+
+        logger.info("Benchmarking date and amount parsing...")
+        results = benchmark_parsing(num_rows, logger=logger)
+        logger.info("\n" + results.to_string(index=False))
+
+    except KeyboardInterrupt:
+        logger.info("\n\nProcess interrupted by user")
+        sys.exit(0)
+
+    except Exception as e:
+        logger.error(exception=e, save_to_json=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
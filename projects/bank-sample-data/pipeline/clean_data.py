@@ -10,18 +10,72 @@ converting data types, masking sensitive information, and removing unwanted
 transactions.
 
 Functions:
-    mask_description: Replace description patterns with generic labels
-    drop_description: Remove transactions matching specific patterns
+    compile_description_rules: Compile drop and masking patterns into one
+        prioritized matcher
+    classify_descriptions: Drop/mask labels for every row in one pass over
+        unique descriptions
+    prepare_transactions: Filter, trim and mask raw statement rows past
+        the high-water mark
+    convert_transactions: Convert debits and add the transaction month
     clean_data: Main cleaning pipeline for bank statement data
 """
 
+import re
 import sys
 import logging
-from typing import Optional
-
-from pandas import DataFrame
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+from pandas import Categorical, DataFrame, Series
+from pandas.api.types import union_categoricals
 from haashi_pkg.utility import Logger
-from haashi_pkg.data_engine import DataLoader, DataAnalyzer, DataSaver
+from haashi_pkg.data_engine import DataAnalyzer
+import shared_path  # noqa: F401
+from background import save_in_background
+from incremental import (
+    NewTransactions,
+    Watermark,
+    load_watermark,
+    merge_watermarks,
+    save_watermark,
+    select_new_transactions,
+)
+from ingest import IngestOptions, read_statement
+from money import to_minor_units
+from parsing import parse_amounts, parse_dates
+from storage import (
+    AMOUNT_COLUMN,
+    MINOR_AMOUNT_COLUMN,
+    DatasetWriter,
+    OutputOptions,
+)
+from summary import (
+    DatasetSummary,
+    compute_summary,
+    merge_summaries,
+    read_summary,
+    write_summary,
+)
+from validation import (
+    ColumnRule,
+    Schema,
+    ValidationReport,
+    log_report,
+    merge_reports,
+    raise_for_violations,
+    validate,
+)
 
 
 # Configuration: Patterns to mask with generic descriptions
@@ -32,80 +86,142 @@ MASKING_MAP = {
     "Card|Merchant": "Purchases",
 }
 
+# Configuration: Patterns for transactions to exclude
+DROP_PATTERNS = [
+    "8051021438|9058929223|8111016740|9037527321",  # Own accounts
+    "Save|OWealth|Fixed",                           # Savings, investments
+]
+
+# Configuration: Expectations for cleaned transactions; the debit column
+# depends on fixed_point_money
+CLEANED_BANK_SCHEMA = Schema("cleaned_bank_statement", (
+    ColumnRule("trans_date", "date", nullable=False,
+               min_date="2000-01-01", max_date="today"),
+    ColumnRule("description", "text"),
+    ColumnRule("trans_month", "month", nullable=False),
+))
+AMOUNT_RULES = {
+    AMOUNT_COLUMN: ColumnRule(AMOUNT_COLUMN, "number", min_value=0),
+    MINOR_AMOUNT_COLUMN: ColumnRule(
+        MINOR_AMOUNT_COLUMN, "integer", min_value=0),
+}
 
-def mask_description(
-    df: DataFrame,
-    col: str,
-    pattern: str,
-    generic_desc: str
-) -> None:
-    """
-    Replace description patterns with generic labels for privacy/grouping.
 
-    Modifies the DataFrame in-place by masking matching descriptions.
+class DescriptionRules(NamedTuple):
+    """Compiled description matcher and the masking label for each rule."""
+    matcher: Pattern[str]
+    drop_rules: int
+    labels: List[str]
+
 
+def compile_description_rules(
+    drop_patterns: List[str],
+    masking_map: Dict[str, str]
+) -> DescriptionRules:
+    """
+    Compile drop patterns and a masking map into one prioritized matcher.
+
+    Every rule becomes a lookahead alternative anchored at the start of the
+    description and tried in order: drop patterns first, then masking
+    patterns in map order. A single match() call therefore reports the first
+    rule that matches anywhere in the text, which is what applying the rules
+    one after another would do. Masking labels are resolved against the
+    later masking patterns up front, so chained masks stay equivalent too.
     """
-    mask = df[col].str.contains(pattern, na=False)
-    df.loc[mask, col] = generic_desc
+    patterns = list(drop_patterns) + list(masking_map)
+    matcher = re.compile(
+        "|".join(
+            f"(?=.*?(?:{pattern}))(?P<rule{i}>)"
+            for i, pattern in enumerate(patterns)
+        ),
+        re.DOTALL
+    )
 
+    # Apply later masks to each label, as sequential masking would
+    mask_rules = list(masking_map.items())
+    labels = []
+    for i, (_, generic_desc) in enumerate(mask_rules):
+        label = generic_desc
+        for pattern, later_desc in mask_rules[i + 1:]:
+            if re.search(pattern, label):
+                label = later_desc
+        labels.append(label)
 
-def drop_description(
-    df: DataFrame,
-    col: str,
-    pattern: str
-) -> DataFrame:
-    """
-    Remove transactions with descriptions matching a pattern.
+    return DescriptionRules(matcher, len(drop_patterns), labels)
 
-    Returns a new DataFrame with matching rows removed.
 
+def classify_descriptions(
+    descriptions: Series,
+    rules: DescriptionRules
+) -> Tuple[np.ndarray, Categorical]:
     """
-    mask = df[col].str.contains(pattern, na=False)
-    rows_to_drop = df[mask]
-    return df.drop(rows_to_drop.index)
+    Label descriptions for dropping and masking in one pass over unique values.
 
+    Descriptions are factorized, the compiled matcher runs once per distinct
+    description, and the results are broadcast back to rows through the
+    integer codes. Missing and non-text descriptions are kept unchanged.
 
-def clean_data(
-    filepath: str = "data/sample_bank_statement_2025.xlsx",
-    savepath: str = "data/cleaned_bank_statement_2025.parquet",
-    use_fake_data: bool = True,
-    logger: Optional[Logger] = None
-) -> None:
+    Returns:
+        Tuple containing:
+            - keep: Boolean array, False for rows matching a drop pattern
+            - masked: Categorical of masked descriptions (sorted categories)
     """
-    Clean raw bank statement data and save as compressed Parquet.
+    codes, uniques = pd.factorize(descriptions)
 
-    Performs the following operations:
-    1. Loads Excel data (skipping header rows if needed)
-    2. Normalizes column names
-    3. Filters to debit-only transactions
-    4. Removes unnecessary columns
-    5. Drops specific transaction types (savings, investments)
-    6. Masks sensitive information
-    7. Converts data types
-    8. Adds derived columns (transaction month)
-    9. Saves as compressed Parquet
+    keep_unique = np.ones(len(uniques), dtype=bool)
+    masked_unique = np.empty(len(uniques), dtype=object)
 
-    """
-    # Initialize logger if not provided
-    if logger is None:
-        logger = Logger(level=logging.INFO)
+    for i, text in enumerate(uniques):
+        masked_unique[i] = text
+        if not isinstance(text, str):
+            continue
 
-    # Determine file path and skip rows based on data source
-    file_path = filepath if use_fake_data else "data/bank_statement_2025.xlsx"
-    rows_to_skip = 0 if use_fake_data else 6
+        match = rules.matcher.match(text)
+        if match is None:
+            continue
 
-    logger.info(f"Loading data from {file_path}")
-    logger.debug(f"Skipping {rows_to_skip} header rows")
+        rule = int(match.lastgroup[len("rule"):])
+        if rule < rules.drop_rules:
+            keep_unique[i] = False
+            masked_unique[i] = None
+        else:
+            masked_unique[i] = rules.labels[rule - rules.drop_rules]
 
-    # Load data
-    loader = DataLoader(file_path, logger=logger)
-    bank_st_df = loader.load_excel_single(skip_rows=rows_to_skip)
+    # Map unique descriptions to sorted category codes, then to rows
+    label_codes, categories = pd.factorize(masked_unique, sort=True)
+    present = codes >= 0
 
-    logger.info(f"Loaded {len(bank_st_df)} transactions")
-    logger.debug("Starting data cleaning...")
+    keep = np.ones(len(codes), dtype=bool)
+    keep[present] = keep_unique[codes[present]]
 
-    # Initialize analyzer
-    analyzer = DataAnalyzer(logger=logger)
+    row_codes = np.full(len(codes), -1, dtype=label_codes.dtype)
+    row_codes[present] = label_codes[codes[present]]
+
+    return keep, Categorical.from_codes(row_codes, categories=categories)
+
+
+# Compiled once from the configuration above
+DESCRIPTION_RULES = compile_description_rules(DROP_PATTERNS, MASKING_MAP)
+
+
+def prepare_transactions(
+    bank_st_df: DataFrame,
+    analyzer: DataAnalyzer,
+    logger: Logger,
+    watermark: Optional[Watermark] = None
+) -> NewTransactions:
+    """
+    Reduce raw statement rows to masked debit transactions not yet cleaned.
+
+    Normalizes column names, keeps debit rows, drops unused columns and
+    parses dates. Rows at or before the high-water mark (see
+    select_new_transactions) are dropped right away, using only the date
+    and reference columns, so rows already cleaned never reach the costlier
+    steps: excluded transactions are then removed and descriptions masked.
+    Works on a whole statement or on one chunk of it.
+    """
+    if watermark is None:
+        watermark = Watermark(None, frozenset())
 
     # Normalize column names
     logger.debug("Normalizing column names")
@@ -120,66 +236,272 @@ def clean_data(
 
     # Drop unnecessary columns
     logger.debug("Removing unnecessary columns")
-    columns_to_drop = [
+    bank_st_df = bank_st_df.drop(columns=[
         "value_date",
         "channel",
         "credit(₦)",
         "balance_after(₦)",
-        "transaction_reference",
-    ]
-    bank_st_df = bank_st_df.drop(columns=columns_to_drop)
+    ])
 
-    # Rename trans._date column
+    # Rename trans._date column and parse it
+    logger.debug("Parsing transaction dates")
     bank_st_df = bank_st_df.rename(columns={"trans._date": "trans_date"})
+    bank_st_df["trans_date"] = parse_dates(bank_st_df["trans_date"])
 
-    # Drop specific transaction types
-    logger.debug("Removing savings and investment transactions")
+    # Keep only transactions past the high-water mark
+    selected = select_new_transactions(bank_st_df, watermark)
+    bank_st_df = selected.rows.drop(columns=["transaction_reference"])
 
-    # Patterns for transactions to exclude
-    phone_numbers = "8051021438|9058929223|8111016740|9037527321"
-    keywords = "Save|OWealth|Fixed"
+    # Drop savings/investment transactions and mask descriptions in one pass
+    logger.debug("Classifying transaction descriptions")
+    keep, masked = classify_descriptions(
+        bank_st_df["description"], DESCRIPTION_RULES
+    )
 
-    before_drop = len(bank_st_df)
-    bank_st_df = drop_description(bank_st_df, "description", phone_numbers)
-    bank_st_df = drop_description(bank_st_df, "description", keywords)
-    dropped = before_drop - len(bank_st_df)
+    bank_st_df = bank_st_df.assign(description=masked)[keep]
+    logger.debug(f"Removed {int((~keep).sum())} excluded transactions")
 
-    logger.debug(f"Removed {dropped} excluded transactions")
+    return selected._replace(rows=bank_st_df)
 
-    # Mask sensitive/specific descriptions with generic labels
-    logger.debug("Masking transaction descriptions")
-    for pattern, generic_desc in MASKING_MAP.items():
-        mask_description(bank_st_df, "description", pattern, generic_desc)
 
+def convert_transactions(
+    bank_st_df: DataFrame,
+    logger: Logger,
+    fixed_point_money: bool = False
+) -> DataFrame:
+    """
+    Convert debits of prepared transactions to naira (or to int64 kobo with
+    fixed_point_money) and add the transaction month.
+    """
     # Convert data types
     logger.debug("Converting data types")
-    bank_st_df["trans_date"] = analyzer.convert_datetime(
-        bank_st_df["trans_date"])
-    bank_st_df["description"] = bank_st_df["description"].astype("category")
-    bank_st_df["debit(₦)"] = analyzer.convert_numeric(bank_st_df["debit(₦)"])
+    if fixed_point_money:
+        bank_st_df[MINOR_AMOUNT_COLUMN] = to_minor_units(
+            bank_st_df[AMOUNT_COLUMN])
+        bank_st_df = bank_st_df.drop(columns=[AMOUNT_COLUMN])
+    else:
+        bank_st_df[AMOUNT_COLUMN] = parse_amounts(bank_st_df[AMOUNT_COLUMN])
 
     # Add derived column: transaction month
     logger.debug("Adding transaction month column")
     bank_st_df["trans_month"] = bank_st_df["trans_date"].dt.to_period("M")
 
-    # Final validation
-    logger.debug("Validating cleaned data")
-    analyzer.validate_columns_exist(
-        bank_st_df,
-        ["trans_date", "description", "debit(₦)", "trans_month"]
-    )
+    return bank_st_df
+
+
+def clean_data(
+    filepath: str = "data/sample_bank_statement_2025.xlsx",
+    savepath: str = "data/cleaned_bank_statement_2025.parquet",
+    use_fake_data: bool = True,
+    logger: Optional[Logger] = None,
+    ingest_options: IngestOptions = IngestOptions(),
+    output_options: OutputOptions = OutputOptions(),
+    can_return: bool = False
+) -> Optional[DataFrame]:
+    """
+    Clean raw bank statement data and save as a month-partitioned dataset.
+
+    Performs the following operations:
+    1. Loads the statement (skipping header rows if needed)
+    2. Normalizes column names
+    3. Filters to debit-only transactions
+    4. Removes unnecessary columns
+    5. Parses dates and drops transactions already cleaned
+    6. Drops specific transaction types (savings, investments)
+    7. Masks sensitive information
+    8. Converts debits
+    9. Adds derived columns (transaction month) and validates the result
+    10. Saves as compressed Parquet, partitioned by trans_month
+
+    ingest_options sets how the statement is read (see ingest.py) and
+    output_options how the dataset is written (see storage.py and
+    incremental.py). With can_return=True the cleaned frame is returned
+    (in incremental mode only the new rows).
+    """
+    # Initialize logger if not provided
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    # Determine file path and skip rows based on data source
+    file_path = filepath if use_fake_data else "data/bank_statement_2025.xlsx"
+    rows_to_skip = 0 if use_fake_data else 6
 
-    logger.info(f"Cleaning completed: {len(bank_st_df)} transactions retained")
+    logger.info(f"Loading data from {file_path}")
+    logger.debug(f"Skipping {rows_to_skip} header rows")
+
+    # Initialize analyzer
+    analyzer = DataAnalyzer(logger=logger)
+
+    incremental = output_options.incremental
+    background_save = output_options.background_save
+    fixed_point_money = output_options.fixed_point_money
+
+    # Keep only transactions past the high-water mark (all of them on a
+    # full run)
+    watermark = Watermark(None, frozenset())
+    if incremental:
+        logger.debug(f"Selecting transactions not yet cleaned into {savepath}")
+        watermark = load_watermark(savepath)
+
+    amount_col = MINOR_AMOUNT_COLUMN if fixed_point_money else AMOUNT_COLUMN
+    schema = CLEANED_BANK_SCHEMA.with_rules(AMOUNT_RULES[amount_col])
+
+    # Append new transactions (and advance the high-water mark), or replace
+    # the cleaned dataset. Files of an interrupted append are published if
+    # the watermark committed them and removed otherwise; the existing
+    # summary is read after that and before any file is added.
+    writer = DatasetWriter(
+        savepath, append=incremental, committed_run=watermark.run_id)
+
+    if incremental:
+        logger.debug(f"Appending to {savepath}")
+        previous_summary = read_summary(savepath)
+    else:
+        logger.debug(f"Saving to {savepath}")
+        previous_summary = None
+
+    chunk_iter = read_statement(
+        file_path, rows_to_skip, ingest_options, logger=logger)
+
+    logger.debug("Starting data cleaning...")
+    loaded = 0
+    chunks: List[DataFrame] = []
+    categories: Set[str] = set()
+    report = ValidationReport(schema.name, 0, {}, [])
+    summary: Optional[DatasetSummary] = None
+    new_watermark = watermark
+    late_count = 0
+
+    for chunk in chunk_iter:
+        # Label rows by their position in the statement, so validation
+        # samples name the same rows however the statement was read
+        chunk.index = pd.RangeIndex(loaded, loaded + len(chunk))
+        loaded += len(chunk)
+
+        selected = prepare_transactions(chunk, analyzer, logger, watermark)
+        new_watermark = merge_watermarks(new_watermark, selected.watermark)
+        late_count += selected.late_count
+
+        chunk = convert_transactions(
+            selected.rows, logger, fixed_point_money)
+
+        # Validate each chunk as it is cleaned: missing or mistyped columns
+        # stop the run at once, other violations are counted over all chunks
+        logger.debug("Validating cleaned data")
+        chunk_report = validate(chunk, schema)
+        raise_for_violations(chunk_report, ["missing_column", "kind"])
+        report = merge_reports(report, chunk_report)
+
+        # Write the chunk out, keeping only its summary (and the chunk
+        # itself if it is to be returned)
+        _save(background_save, writer.write, chunk)
+
+        chunk_summary = compute_summary(chunk)
+        summary = chunk_summary if summary is None else merge_summaries(
+            summary, chunk_summary)
+        categories.update(chunk["description"].dropna().unique())
+
+        if can_return:
+            chunks.append(chunk)
+
+    logger.info(f"Loaded {loaded} transactions")
+
+    if summary is None:
+        raise ValueError(f"No transactions found in {file_path}")
+
+    if late_count:
+        logger.info(
+            f"Discarded {late_count} transactions dated before "
+            f"{watermark.last_date.date()}, the last day already cleaned "
+            "(re-sent or arriving late)"
+        )
+
+    watermark = new_watermark
+    bank_st_df = _concat_chunks(chunks) if can_return else None
+
+    if incremental:
+        if summary.row_count == 0:
+            logger.info("No new transactions since the last run")
+            return bank_st_df
+
+        logger.info(f"Found {summary.row_count} new transactions")
+
+    log_report(report, logger)
+
+    dates = summary.columns["trans_date"]
     logger.info(
-        f"Date range: {bank_st_df['trans_date'].min()} to {bank_st_df['trans_date'].max()}")
-    logger.info(f"Categories: {bank_st_df['description'].nunique()}")
+        f"Cleaning completed: {summary.row_count} transactions retained")
+    logger.info(f"Date range: {dates.min} to {dates.max}")
+    logger.info(f"Categories: {len(categories)}")
+
+    _save(background_save, _save_cleaned,
+          writer, summary, previous_summary, watermark)
+
+    if background_save:
+        logger.info(f"Saving cleaned data to {savepath} in the background")
+    else:
+        logger.info(f"Data cleaned and saved to {savepath}")
 
-    # Save cleaned data
-    logger.debug(f"Saving to {savepath}")
-    saver = DataSaver(logger=logger)
-    saver.save_parquet_compressed(bank_st_df, savepath)
+    return bank_st_df
 
-    logger.info(f"Data cleaned and saved to {savepath}")
+
+def _save(background: bool, func: Callable[..., Any], *args: Any) -> None:
+    """Run a save step now, or queue it on the background writer thread."""
+    if background:
+        save_in_background(func, *args)
+    else:
+        func(*args)
+
+
+def _concat_chunks(chunks: List[DataFrame]) -> DataFrame:
+    """
+    Concatenate cleaned chunks, keeping description categorical.
+
+    Every chunk has its own description categories; pd.concat would fall
+    back to object for differing categoricals, so they are unified first.
+    Chunks without categories (every row dropped) are left out, as their
+    empty categories have no string dtype to unify with.
+    """
+    descriptions = [chunk["description"] for chunk in chunks]
+    categories = union_categoricals(
+        [values for values in descriptions if len(values.cat.categories)]
+        or [Categorical([])],
+        sort_categories=True
+    ).categories
+
+    return pd.concat([
+        chunk.assign(
+            description=chunk["description"].cat.set_categories(categories))
+        for chunk in chunks
+    ])
+
+
+def _save_cleaned(
+    writer: DatasetWriter,
+    summary: DatasetSummary,
+    previous_summary: Optional[DatasetSummary],
+    watermark: Watermark
+) -> None:
+    """
+    Commit the written chunks together with the high-water mark, then write
+    their summary.
+
+    The mark, naming this run, goes into the staged dataset (full run) or
+    is saved before the appended files are renamed into view, so the data
+    and the mark are never out of step (see storage.DatasetWriter).
+    """
+    if watermark.last_date is not None:
+        save_watermark(
+            str(writer.directory), watermark._replace(run_id=writer.run_id))
+
+    writer.commit()
+
+    if not writer.append:
+        write_summary(writer.dataset_dir, summary)
+    elif previous_summary is not None:
+        # The existing summary is extended only if it covered every file
+        write_summary(
+            writer.dataset_dir, merge_summaries(previous_summary, summary))
 
 
 def main() -> None:
@@ -0,0 +1,160 @@
+# incremental.py
+
+"""
+Incremental Bank Statement Cleaning
+
+This module tracks which transactions have already been cleaned so that
+daily statement deltas can be appended to the cleaned dataset instead of
+re-cleaning the full history.
+
+A high-water mark is stored at the root of the cleaned dataset directory in
+_watermark.json: the last transaction day seen, the references of the
+transactions on that day and the id of the run that wrote them. Files
+starting with an underscore are ignored by Parquet dataset readers.
+
+The mark and the data it covers are committed together: a full run writes
+the mark into the staged dataset before it is swapped in, and an appending
+run writes its files hidden, saves the mark naming the run (the commit
+point) and only then renames the files into view (see
+storage.DatasetWriter).
+
+Every cleaning run records the mark. With
+OutputOptions(incremental=True), clean_data keeps only the transactions
+past it, right after their dates are parsed, and appends them to their
+month partitions, so a daily delta costs time in proportion to its size
+rather than the full history. Late transactions (dated before the mark's
+day) are discarded and counted in the log.
+
+Functions:
+    load_watermark: Read the high-water mark of a cleaned dataset
+    save_watermark: Persist the high-water mark of a cleaned dataset
+    select_new_transactions: Keep rows not yet in the cleaned dataset,
+        counting late ones
+    merge_watermarks: Combine watermarks advanced over separate chunks
+"""
+
+import json
+from pathlib import Path
+from typing import FrozenSet, NamedTuple, Optional
+
+import pandas as pd
+from pandas import DataFrame
+
+
+# Configuration: State file kept inside the cleaned dataset directory
+WATERMARK_FILE = "_watermark.json"
+
+
+class Watermark(NamedTuple):
+    """
+    Last cleaned transaction day, the references seen on that day and the
+    run whose files the mark covers (None before it is committed).
+    """
+    last_date: Optional[pd.Timestamp]
+    boundary_refs: FrozenSet[str]
+    run_id: Optional[str] = None
+
+
+class NewTransactions(NamedTuple):
+    """
+    Rows not yet in the cleaned dataset, the watermark advanced past them
+    and the number of late rows (dated before the watermark day) dropped.
+    """
+    rows: DataFrame
+    watermark: Watermark
+    late_count: int
+
+
+def load_watermark(dataset_dir: str) -> Watermark:
+    """Read the high-water mark, or an empty one if nothing was cleaned yet."""
+    state_path = Path(dataset_dir) / WATERMARK_FILE
+
+    if not state_path.exists():
+        return Watermark(None, frozenset())
+
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    return Watermark(
+        pd.Timestamp(state["last_date"]),
+        frozenset(state["boundary_refs"]),
+        state.get("run_id")
+    )
+
+
+def save_watermark(dataset_dir: str, watermark: Watermark) -> None:
+    """Persist the high-water mark atomically."""
+    state_path = Path(dataset_dir) / WATERMARK_FILE
+    temp_path = state_path.with_suffix(".tmp")
+
+    temp_path.write_text(
+        json.dumps({
+            "last_date": watermark.last_date.isoformat(),
+            "boundary_refs": sorted(watermark.boundary_refs),
+            "run_id": watermark.run_id,
+        }),
+        encoding="utf-8"
+    )
+    temp_path.replace(state_path)
+
+
+def select_new_transactions(
+    df: DataFrame,
+    watermark: Watermark,
+    date_col: str = "trans_date",
+    ref_col: str = "transaction_reference"
+) -> NewTransactions:
+    """
+    Keep only transactions that are not yet in the cleaned dataset.
+
+    Rows dated after the watermark day are new. Rows on the watermark day are
+    new unless their reference was already seen. Older rows are treated as
+    already cleaned and counted as late: a statement should not gain rows
+    before a day it has already reported.
+
+    Only the date and reference columns are read, so this can run right
+    after they are parsed, before the costlier cleaning steps.
+    """
+    days = df[date_col].dt.normalize()
+    refs = df[ref_col].astype(str)
+
+    if watermark.last_date is None:
+        is_new = pd.Series(True, index=df.index)
+        late_count = 0
+    else:
+        on_boundary = days == watermark.last_date
+        is_new = (days > watermark.last_date) | (
+            on_boundary & ~refs.isin(watermark.boundary_refs)
+        )
+        late_count = int((days < watermark.last_date).sum())
+
+    new_rows = df[is_new]
+    last_date = days[is_new].max()
+
+    if pd.isna(last_date):
+        return NewTransactions(new_rows, watermark, late_count)
+
+    boundary_refs = frozenset(refs[is_new & (days == last_date)])
+
+    # Same day as before: references seen earlier still count
+    if last_date == watermark.last_date:
+        boundary_refs = boundary_refs | watermark.boundary_refs
+
+    return NewTransactions(
+        new_rows, Watermark(last_date, boundary_refs), late_count)
+
+
+def merge_watermarks(first: Watermark, second: Watermark) -> Watermark:
+    """
+    Combine watermarks advanced over different chunks of one statement.
+
+    The later day wins; on the same day the references seen add up.
+    """
+    if first.last_date is None:
+        return second
+    if second.last_date is None:
+        return first
+
+    if first.last_date == second.last_date:
+        return Watermark(
+            first.last_date, first.boundary_refs | second.boundary_refs)
+
+    return max(first, second, key=lambda watermark: watermark.last_date)
@@ -0,0 +1,444 @@
+# ingest.py
+
+"""
+Bank Statement Ingestion
+
+This module reads raw bank statements in fixed-size chunks so that the
+cleaning stage can filter and reduce rows before the whole statement is in
+memory, and keeps a Parquet cache of parsed Excel statements so XLSX
+parsing only happens when the statement file changes.
+
+With IngestOptions(streaming=True) the statement is read chunk_size rows
+at a time (Excel in read-only mode) and clean_data cleans, validates and
+writes each chunk before reading the next, merging validation reports and
+summaries over the chunks. Peak memory then follows the chunk size rather
+than the file size, unless the caller keeps every cleaned chunk to return
+them.
+
+With use_cache=True the parsed workbook is kept as Parquet in cache_dir,
+keyed by the statement file's size, mtime and content hash, so XLSX
+parsing is skipped until the statement changes.
+
+Classes:
+    IngestOptions: How a statement is read (streaming, chunk size, cache)
+
+Functions:
+    iter_excel_chunks: Stream an Excel worksheet row by row in read-only mode
+    iter_statement_chunks: Stream a statement file (Excel, Parquet or CSV)
+    statement_cache_path: Cache entry path for a statement file's contents
+    load_statement_cached: Load a statement through the Parquet cache
+    iter_statement_chunks_cached: Stream a statement through the cache
+    evict_cache: Trim the cache directory to its size bounds
+    read_statement: Read a statement as chunks, or as one frame, per options
+"""
+
+import os
+import hashlib
+import logging
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+from pandas import DataFrame
+from haashi_pkg.utility import Logger
+from haashi_pkg.data_engine import DataLoader
+
+
+# Configuration: Default number of rows per chunk
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Configuration: Ingestion cache
+DEFAULT_CACHE_DIR = "data/.cache/ingest"
+DEFAULT_CACHE_MAX_ENTRIES = 8
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+EXCEL_SUFFIXES = (".xlsx", ".xlsm")
+
+# Bump when the cached table layout changes to invalidate old entries
+CACHE_FORMAT_VERSION = 1
+
+
+class IngestOptions(NamedTuple):
+    """
+    How a statement is read: whole or in chunks of chunk_size rows, and
+    through the Parquet cache in cache_dir or not.
+    """
+    streaming: bool = False
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    use_cache: bool = True
+    cache_dir: str = DEFAULT_CACHE_DIR
+
+
+def _header_names(header: tuple) -> List[str]:
+    """Name header cells the way pandas does, including blank cells."""
+    return [
+        f"Unnamed: {i}" if cell is None else str(cell)
+        for i, cell in enumerate(header)
+    ]
+
+
+def _decode_dictionaries(batch: pa.RecordBatch) -> DataFrame:
+    """Convert a record batch to pandas with dictionary columns as plain values."""
+    columns = [
+        column.dictionary_decode()
+        if pa.types.is_dictionary(column.type) else column
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(
+        columns, names=batch.schema.names
+    ).to_pandas()
+
+
+def iter_excel_chunks(
+    filepath: str,
+    skip_rows: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    logger: Optional[Logger] = None
+) -> Iterator[DataFrame]:
+    """
+    Stream the active worksheet of an Excel file as DataFrame chunks.
+
+    The workbook is opened in read-only mode, so openpyxl parses rows lazily
+    instead of building the whole sheet. The first row after skip_rows is
+    used as the header, matching DataLoader.load_excel_single(skip_rows=...).
+    Completely empty rows are skipped.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+
+    try:
+        rows = workbook.active.iter_rows(
+            min_row=skip_rows + 1, values_only=True
+        )
+        header = next(rows, None)
+
+        if header is None:
+            logger.debug(f"No rows found in {filepath}")
+            return
+
+        columns = _header_names(header)
+        buffer: List[tuple] = []
+
+        for row in rows:
+            if all(cell is None for cell in row):
+                continue
+
+            buffer.append(row)
+
+            if len(buffer) >= chunk_size:
+                yield DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+
+        if buffer:
+            yield DataFrame.from_records(buffer, columns=columns)
+
+    finally:
+        workbook.close()
+
+
+def iter_statement_chunks(
+    filepath: str,
+    skip_rows: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    logger: Optional[Logger] = None
+) -> Iterator[DataFrame]:
+    """
+    Stream a statement file as DataFrame chunks, based on its extension.
+
+    Excel files go through iter_excel_chunks(). Parquet and CSV files (such
+    as those written by the sample data generator) are read in record
+    batches of chunk_size rows.
+
+    Raises:
+        ValueError: If the file extension is not supported
+    """
+    suffix = Path(filepath).suffix.lower()
+
+    if suffix in EXCEL_SUFFIXES:
+        yield from iter_excel_chunks(filepath, skip_rows, chunk_size, logger)
+
+    elif suffix == ".parquet":
+        parquet_file = pq.ParquetFile(filepath)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield _decode_dictionaries(batch)
+
+    elif suffix == ".csv":
+        yield from pd.read_csv(
+            filepath, skiprows=skip_rows, chunksize=chunk_size
+        )
+
+    else:
+        raise ValueError(
+            f"Unsupported statement format '{suffix}' "
+            "(expected .xlsx, .parquet or .csv)"
+        )
+
+
+def _typed_frame(df: DataFrame) -> DataFrame:
+    """
+    Make a raw statement frame safe to store as typed Parquet.
+
+    Columns that openpyxl filled with a mix of Python types (e.g. numbers
+    and "--" placeholders) are stored as strings; all other columns keep
+    their parsed types.
+    """
+    df = df.copy()
+
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+
+        values = df[col]
+        present = values.notna()
+
+        if values[present].map(type).nunique() > 1:
+            df[col] = values.astype(str).where(present, None)
+
+    return df
+
+
+def _content_digest(filepath: str) -> str:
+    """Hash the file contents in blocks without loading it whole."""
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(filepath, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _source_prefix(filepath: str) -> str:
+    """Cache file prefix shared by every version of one statement file."""
+    resolved = str(Path(filepath).resolve())
+    path_hash = hashlib.blake2b(resolved.encode(), digest_size=4).hexdigest()
+    return f"{Path(filepath).stem}-{path_hash}-"
+
+
+def statement_cache_path(
+    filepath: str,
+    skip_rows: int = 0,
+    cache_dir: str = DEFAULT_CACHE_DIR
+) -> Path:
+    """
+    Return the cache entry path for the current contents of a statement.
+
+    The entry name is keyed by the file's size, modification time and
+    content hash (plus skip_rows), so any change to the statement maps to a
+    new entry and the old one is never read again.
+    """
+    stat = os.stat(filepath)
+    key_source = (
+        f"{stat.st_size}:{stat.st_mtime_ns}:{_content_digest(filepath)}:"
+        f"{skip_rows}:{CACHE_FORMAT_VERSION}"
+    )
+    key = hashlib.blake2b(key_source.encode(), digest_size=12).hexdigest()
+
+    return Path(cache_dir) / f"{_source_prefix(filepath)}{key}.parquet"
+
+
+def evict_cache(
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    logger: Optional[Logger] = None
+) -> None:
+    """
+    Remove least recently used cache entries beyond the configured bounds.
+
+    Entries are touched on every hit, so modification time orders them by
+    last use.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    entries = sorted(
+        Path(cache_dir).glob("*.parquet"),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+
+    kept_bytes = 0
+    for index, entry in enumerate(entries):
+        size = entry.stat().st_size
+
+        if index < max_entries and kept_bytes + size <= max_bytes:
+            kept_bytes += size
+            continue
+
+        logger.debug(f"Evicting cache entry {entry.name}")
+        entry.unlink(missing_ok=True)
+
+
+def _store_entry(
+    filepath: str,
+    temp_path: Path,
+    cache_path: Path,
+    cache_dir: str,
+    max_entries: int,
+    logger: Logger
+) -> None:
+    """Publish a finished cache entry and drop older versions of its source."""
+    prefix = _source_prefix(filepath)
+
+    for stale in Path(cache_dir).glob(f"{prefix}*.parquet"):
+        logger.debug(f"Removing outdated cache entry {stale.name}")
+        stale.unlink(missing_ok=True)
+
+    os.replace(temp_path, cache_path)
+    evict_cache(cache_dir, max_entries, logger=logger)
+
+
+def load_statement_cached(
+    filepath: str,
+    skip_rows: int = 0,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    logger: Optional[Logger] = None
+) -> DataFrame:
+    """
+    Load an Excel statement, parsing the workbook only on a cache miss.
+
+    On a miss the workbook is loaded with DataLoader.load_excel_single() and
+    written to the cache as typed Parquet; later calls for the same file
+    contents read that Parquet file instead.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    cache_path = statement_cache_path(filepath, skip_rows, cache_dir)
+
+    if cache_path.exists():
+        logger.debug(f"Ingestion cache hit: {cache_path}")
+        os.utime(cache_path)
+        return pd.read_parquet(cache_path)
+
+    logger.debug(f"Ingestion cache miss for {filepath}")
+    loader = DataLoader(filepath, logger=logger)
+    df = _typed_frame(loader.load_excel_single(skip_rows=skip_rows))
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_suffix(".tmp")
+    df.to_parquet(temp_path, index=False)
+    _store_entry(filepath, temp_path, cache_path, cache_dir, max_entries, logger)
+
+    logger.debug(f"Cached parsed statement at {cache_path}")
+    return df
+
+
+def iter_statement_chunks_cached(
+    filepath: str,
+    skip_rows: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    logger: Optional[Logger] = None
+) -> Iterator[DataFrame]:
+    """
+    Stream a statement in chunks, reading from the Parquet cache when possible.
+
+    On a cache hit chunks come from the cached Parquet file. On a miss the
+    workbook is streamed as usual and each chunk is also appended to a new
+    cache entry, which is published only once the whole sheet has been read.
+    If chunk types cannot be reconciled into one schema, caching is skipped
+    for this run. Non-Excel files are streamed directly.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    if Path(filepath).suffix.lower() not in EXCEL_SUFFIXES:
+        yield from iter_statement_chunks(filepath, skip_rows, chunk_size, logger)
+        return
+
+    cache_path = statement_cache_path(filepath, skip_rows, cache_dir)
+
+    if cache_path.exists():
+        logger.debug(f"Ingestion cache hit: {cache_path}")
+        os.utime(cache_path)
+        yield from iter_statement_chunks(
+            str(cache_path), chunk_size=chunk_size, logger=logger
+        )
+        return
+
+    logger.debug(f"Ingestion cache miss for {filepath}")
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_suffix(".tmp")
+
+    writer: Optional[pq.ParquetWriter] = None
+    caching = True
+    completed = False
+
+    try:
+        for chunk in iter_excel_chunks(filepath, skip_rows, chunk_size, logger):
+            chunk = _typed_frame(chunk)
+
+            if caching:
+                try:
+                    table = pa.Table.from_pandas(
+                        chunk,
+                        schema=writer.schema if writer else None,
+                        preserve_index=False
+                    )
+                    if writer is None:
+                        writer = pq.ParquetWriter(temp_path, table.schema)
+                    writer.write_table(table)
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    logger.debug(f"Statement not cached (mixed chunk types): {e}")
+                    caching = False
+
+            yield chunk
+
+        completed = True
+
+    finally:
+        if writer is not None:
+            writer.close()
+
+        if caching and completed and writer is not None:
+            _store_entry(
+                filepath, temp_path, cache_path, cache_dir, max_entries, logger
+            )
+            logger.debug(f"Cached parsed statement at {cache_path}")
+        else:
+            temp_path.unlink(missing_ok=True)
+
+
+def read_statement(
+    filepath: str,
+    skip_rows: int = 0,
+    options: IngestOptions = IngestOptions(),
+    logger: Optional[Logger] = None
+) -> Iterator[DataFrame]:
+    """
+    Read a statement as DataFrame chunks (streaming) or as a single frame
+    loaded at once, through the ingestion cache if options.use_cache.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    if options.streaming:
+        logger.debug(
+            f"Streaming statement in chunks of {options.chunk_size} rows")
+
+        if options.use_cache:
+            yield from iter_statement_chunks_cached(
+                filepath, skip_rows, options.chunk_size, options.cache_dir,
+                logger=logger
+            )
+        else:
+            yield from iter_statement_chunks(
+                filepath, skip_rows, options.chunk_size, logger=logger
+            )
+
+    elif options.use_cache:
+        yield load_statement_cached(
+            filepath, skip_rows, options.cache_dir, logger=logger
+        )
+
+    else:
+        loader = DataLoader(filepath, logger=logger)
+        yield loader.load_excel_single(skip_rows=skip_rows)
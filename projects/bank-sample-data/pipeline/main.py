@@ -13,21 +13,35 @@ The pipeline consists of:
 2. Clean and transform raw data
 3. Visualize results in comprehensive dashboard
 
+Steps whose inputs, parameters and code are unchanged since their last
+successful run are skipped and their outputs reused.
+
 Usage:
     python main.py              # Run with INFO logging
     python main.py -d           # Run with DEBUG logging
     python main.py --debug      # Run with DEBUG logging
+    python main.py --force      # Re-run every step
 """
 
 import sys
 import logging
 
 from haashi_pkg.utility import Logger
-from clean_data import clean_data
+import shared_path  # noqa: F401
+from background import wait_for_saves
+from clean_data import DROP_PATTERNS, MASKING_MAP, clean_data
 from sample_data_generator import generate_sample_bank_statement
+from stages import Stage, StageRunner
+from storage import OutputOptions
 from visualize_data import visualize_data
 
 
+# Stage inputs and outputs (the modules' default paths)
+SAMPLE_PATH = "data/sample_bank_statement_2025.xlsx"
+CLEANED_PATH = "data/cleaned_bank_statement_2025.parquet"
+PLOT_PATH = "data/plots/bank_statement_2025.png"
+
+
 def parse_args() -> int:
     """
     Parse command line arguments for logging level.
@@ -41,6 +55,11 @@ def parse_args() -> int:
     return logging.INFO
 
 
+def parse_force() -> bool:
+    """Return True if every step should re-run (-f or --force)."""
+    return "-f" in sys.argv or "--force" in sys.argv
+
+
 def main() -> None:
     """
     Run the complete bank statement analysis pipeline.
@@ -50,7 +69,9 @@ def main() -> None:
         2. Clean and transform the data
         3. Create visualization dashboard
 
-    All steps use the same logger instance for consistent logging.
+    All steps use the same logger instance for consistent logging. The
+    cleaned data is handed to the visualization step in memory while the
+    Parquet output is written in the background.
 
     Raises:
         SystemExit: Exit code 0 on success, 1 on error
@@ -64,20 +85,57 @@ def main() -> None:
     logger.info("=" * 60)
 
     try:
+        runner = StageRunner(force=parse_force(), logger=logger)
+
         # Step 1: Generate sample data
         logger.info("\n[Step 1/3] Generating sample bank statement data...")
-        generate_sample_bank_statement(logger=logger)
-        logger.info("✓ Sample data generation completed")
+        ran, _ = runner.run(Stage(
+            name="generate",
+            func=lambda: generate_sample_bank_statement(logger=logger),
+            inputs=[],
+            outputs=[SAMPLE_PATH],
+            code=["sample_data_generator"],
+        ))
+        if ran:
+            logger.info("✓ Sample data generation completed")
 
         # Step 2: Clean data
         logger.info("\n[Step 2/3] Cleaning bank statement data...")
-        clean_data(logger=logger)
-        logger.info("✓ Data cleaning completed")
-
-        # Step 3: Visualize results
+        ran, cleaned_df = runner.run(Stage(
+            name="clean",
+            func=lambda: clean_data(
+                logger=logger,
+                output_options=OutputOptions(background_save=True),
+                can_return=True
+            ),
+            inputs=[SAMPLE_PATH],
+            outputs=[CLEANED_PATH],
+            params={
+                "masking_map": MASKING_MAP,
+                "drop_patterns": DROP_PATTERNS,
+            },
+            code=["clean_data"],
+        ))
+        if ran:
+            logger.info("✓ Data cleaning completed")
+
+        # Step 3: Visualize results (cleaned data handed over in memory
+        # when step 2 ran)
         logger.info("\n[Step 3/3] Creating visualization dashboard...")
-        visualize_data(logger=logger)
-        logger.info("✓ Visualization completed")
+        ran, _ = runner.run(Stage(
+            name="visualize",
+            func=lambda: visualize_data(logger=logger, bank_st_df=cleaned_df),
+            inputs=[CLEANED_PATH],
+            outputs=[PLOT_PATH],
+            code=["visualize_data"],
+        ))
+        if ran:
+            logger.info("✓ Visualization completed")
+
+        # Make sure the cleaned data finished writing, then record the
+        # fingerprints of the steps that ran
+        wait_for_saves()
+        runner.commit()
 
         # Success summary
         logger.info("\n" + "=" * 60)
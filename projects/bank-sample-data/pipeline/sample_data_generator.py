@@ -11,18 +11,59 @@ descriptions, and amounts.
 
 Functions:
     generate_sample_bank_statement: Generate fake bank statement Excel file
+    generate_sample_bank_statement_fast: Vectorized generator for large
+        load-test statements (Parquet, CSV or Excel)
+    generate_sharded_sample_bank_statement: Parallel generator writing one
+        file per shard with deterministic per-shard seeds
+    build_sample_transactions: Build a sample statement DataFrame in memory
+    make_reference_strings: Build fixed-width transaction references
+    write_sample_frame: Save a sample statement based on file extension
 """
 
 import sys
 import logging
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pandas import DataFrame
 from haashi_pkg.utility import Logger, FileHandler
 
 
+# Configuration: Sample statement settings
+SAMPLE_START_DATE = np.datetime64("2025-01-01", "D")
+SAMPLE_DAYS = 365
+MIN_DEBIT = 500
+MAX_DEBIT = 50000
+REFERENCE_PREFIX = "REF"
+REFERENCE_MIN_WIDTH = 6
+
+# Realistic transaction descriptions
+DESCRIPTIONS = [
+    "Transfer to John Doe",
+    "POS Merchant Purchase - Sample Store",
+    "Mobile Data - Sample Telco",
+    "Electricity Bill - Sample Disco",
+    "ATM Card Withdrawal",
+    "Online Merchant Purchase - Sample Site",
+    "Airtime Recharge",
+    "USSD Charge",
+]
+
+# Excel worksheets cannot hold more rows than this (header included)
+EXCEL_MAX_ROWS = 1_048_576
+
+# Sharded generation: rows per output file
+DEFAULT_SHARD_ROWS = 1_000_000
+
+# Type alias for per-shard summary: (rows, total debits, first date, last date)
+ShardSummary = Tuple[int, int, str, str]
+
+
 def generate_sample_bank_statement(
     num_transactions: int = 100,
     save_path: str = "data/sample_bank_statement_2025.xlsx",
@@ -48,18 +89,6 @@ def generate_sample_bank_statement(
         for _ in range(num_transactions)
     ]
 
-    # Define realistic transaction descriptions
-    descriptions = [
-        "Transfer to John Doe",
-        "POS Merchant Purchase - Sample Store",
-        "Mobile Data - Sample Telco",
-        "Electricity Bill - Sample Disco",
-        "ATM Card Withdrawal",
-        "Online Merchant Purchase - Sample Site",
-        "Airtime Recharge",
-        "USSD Charge",
-    ]
-
     # Generate random transaction amounts (₦500 to ₦50,000)
     logger.debug("Generating random transaction amounts")
     debits = np.random.randint(500, 50000, num_transactions)
@@ -69,7 +98,7 @@ def generate_sample_bank_statement(
     df = pd.DataFrame({
         "Trans. Date": dates,
         "Value Date": dates,
-        "Description": np.random.choice(descriptions, num_transactions),
+        "Description": np.random.choice(DESCRIPTIONS, num_transactions),
         "Debit(₦)": debits,
         "Credit(₦)": ["--"] * num_transactions,
         "Balance After(₦)": ["--"] * num_transactions,
@@ -102,6 +131,278 @@ def generate_sample_bank_statement(
     logger.info(f"  Average transaction: ₦{avg_amount:,.2f}")
 
 
+def make_reference_strings(
+    start: int,
+    count: int,
+    width: int = REFERENCE_MIN_WIDTH,
+    prefix: str = REFERENCE_PREFIX
+) -> pd.api.extensions.ExtensionArray:
+    """
+    Build zero-padded transaction references (e.g. 'REF000042') without a
+    Python-level loop.
+
+    Digits are written column by column into a fixed-width byte buffer, so
+    the cost is one vectorized pass per digit rather than one f-string per
+    row. The buffer is wrapped as an Arrow large_string array without
+    copying.
+    """
+    ids = np.arange(start, start + count, dtype=np.int64)
+    prefix_bytes = np.frombuffer(prefix.encode("ascii"), dtype=np.uint8)
+    row_width = len(prefix_bytes) + width
+
+    buffer = np.empty((count, row_width), dtype=np.uint8)
+    buffer[:, :len(prefix_bytes)] = prefix_bytes
+
+    for position in range(width):
+        place = 10 ** (width - 1 - position)
+        buffer[:, len(prefix_bytes) + position] = (ids // place) % 10 + 48
+
+    # 64-bit offsets: 32-bit ones overflow past 2 GiB of text (~200M rows)
+    offsets = np.arange(0, (count + 1) * row_width, row_width, dtype=np.int64)
+    references = pa.Array.from_buffers(
+        pa.large_string(),
+        count,
+        [None, pa.py_buffer(offsets), pa.py_buffer(buffer)]
+    )
+    return pd.arrays.ArrowExtensionArray(references)
+
+
+def build_sample_transactions(
+    num_transactions: int,
+    rng: np.random.Generator,
+    ref_start: int = 0,
+    ref_width: Optional[int] = None
+) -> DataFrame:
+    """
+    Build a sample bank statement DataFrame with vectorized column generation.
+
+    Dates are produced as numpy datetime64 day offsets and sorted directly,
+    descriptions are drawn as categorical codes, and references come from
+    make_reference_strings(). The frame has the same columns as the Excel
+    statement written by generate_sample_bank_statement().
+    """
+    if ref_width is None:
+        ref_width = max(
+            REFERENCE_MIN_WIDTH, len(str(max(ref_start + num_transactions - 1, 0)))
+        )
+
+    # Columns are independent draws, so sorting the day offsets alone is
+    # equivalent to sorting whole rows by date
+    day_offsets = np.sort(rng.integers(0, SAMPLE_DAYS, num_transactions))
+    dates = SAMPLE_START_DATE + day_offsets.astype("timedelta64[D]")
+
+    descriptions = pd.Categorical.from_codes(
+        rng.integers(0, len(DESCRIPTIONS), num_transactions, dtype=np.int8),
+        categories=DESCRIPTIONS
+    )
+    debits = rng.integers(MIN_DEBIT, MAX_DEBIT, num_transactions)
+
+    # Constant columns share a single dictionary entry
+    zeros = np.zeros(num_transactions, dtype=np.int8)
+
+    return DataFrame({
+        "Trans. Date": dates,
+        "Value Date": dates,
+        "Description": descriptions,
+        "Debit(₦)": debits,
+        "Credit(₦)": pd.Categorical.from_codes(zeros, categories=["--"]),
+        "Balance After(₦)": pd.Categorical.from_codes(zeros, categories=["--"]),
+        "Channel": pd.Categorical.from_codes(zeros, categories=["Mobile"]),
+        "Transaction Reference": make_reference_strings(
+            ref_start, num_transactions, width=ref_width
+        ),
+    })
+
+
+def write_sample_frame(df: DataFrame, save_path: str) -> None:
+    """
+    Save a sample statement in the format given by the file extension.
+
+    Supports .parquet, .csv and .xlsx.
+
+    Raises:
+        ValueError: If the extension is unsupported, or the frame is too
+            large for an Excel worksheet
+    """
+    suffix = Path(save_path).suffix.lower()
+
+    if suffix == ".parquet":
+        df.to_parquet(save_path, index=False)
+    elif suffix == ".csv":
+        df.to_csv(save_path, index=False)
+    elif suffix == ".xlsx":
+        if len(df) + 1 > EXCEL_MAX_ROWS:
+            raise ValueError(
+                f"{len(df):,} rows do not fit in an Excel worksheet; "
+                "use a .parquet or .csv save path instead"
+            )
+        df.to_excel(save_path, index=False)
+    else:
+        raise ValueError(
+            f"Unsupported sample data format '{suffix}' "
+            "(expected .parquet, .csv or .xlsx)"
+        )
+
+
+def generate_sample_bank_statement_fast(
+    num_transactions: int = 1_000_000,
+    save_path: str = "data/sample_bank_statement_2025.parquet",
+    seed: int = 42,
+    logger: Optional[Logger] = None
+) -> None:
+    """
+    Generate a large fake bank statement with the vectorized generator.
+
+    Uses a local np.random.Generator instead of global seeding and writes
+    Parquet or CSV directly (Excel is still accepted for small outputs), so
+    millions of rows can be produced for load-testing the cleaning stage.
+    """
+    # Initialize logger if not provided
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    logger.info(
+        f"Generating {num_transactions:,} sample bank transactions "
+        "(vectorized)...")
+
+    rng = np.random.default_rng(seed)
+
+    logger.debug("Building transactions")
+    df = build_sample_transactions(num_transactions, rng)
+
+    # Ensure directory exists
+    logger.debug(f"Ensuring directory exists for {save_path}")
+    file_handler = FileHandler(logger=logger)
+    validated_path = str(file_handler.ensure_writable_path(save_path))
+
+    logger.debug(f"Saving to {validated_path}")
+    write_sample_frame(df, validated_path)
+
+    # Calculate summary stats (dates are already sorted)
+    total_amount = int(df["Debit(₦)"].sum())
+    avg_amount = df["Debit(₦)"].mean()
+    dates = df["Trans. Date"]
+    date_range = (
+        f"{dates.iloc[0].strftime('%Y-%m-%d')} to "
+        f"{dates.iloc[-1].strftime('%Y-%m-%d')}"
+        if num_transactions else "n/a"
+    )
+
+    logger.info(f"Sample data generated and saved to {validated_path}")
+    logger.info(f"  Transactions: {num_transactions:,}")
+    logger.info(f"  Date range: {date_range}")
+    logger.info(f"  Total debits: ₦{total_amount:,}")
+    logger.info(f"  Average transaction: ₦{avg_amount:,.2f}")
+
+
+def _generate_shard(
+    seed_seq: np.random.SeedSequence,
+    ref_start: int,
+    num_rows: int,
+    ref_width: int,
+    save_path: str
+) -> ShardSummary:
+    """Build and save one shard; runs inside a worker process."""
+    rng = np.random.default_rng(seed_seq)
+    df = build_sample_transactions(
+        num_rows, rng, ref_start=ref_start, ref_width=ref_width
+    )
+    write_sample_frame(df, save_path)
+
+    dates = df["Trans. Date"]
+    return (
+        num_rows,
+        int(df["Debit(₦)"].sum()),
+        dates.iloc[0].strftime("%Y-%m-%d"),
+        dates.iloc[-1].strftime("%Y-%m-%d"),
+    )
+
+
+def generate_sharded_sample_bank_statement(
+    num_transactions: int = 100_000_000,
+    save_dir: str = "data/sample_bank_statement_2025",
+    rows_per_shard: int = DEFAULT_SHARD_ROWS,
+    file_format: str = "parquet",
+    seed: int = 42,
+    max_workers: Optional[int] = None,
+    logger: Optional[Logger] = None
+) -> List[str]:
+    """
+    Generate a fake bank statement as a directory of shard files in parallel.
+
+    The shard layout depends only on num_transactions and rows_per_shard, and
+    each shard's generator is seeded from SeedSequence(seed).spawn(), so the
+    files written are byte-identical whatever max_workers is. Shards are
+    written as part-00000.<format>, part-00001.<format>, ... with
+    transaction references numbered globally across shards and dates sorted
+    within each shard. No process holds more than one shard in memory.
+
+    Returns:
+        List of shard file paths in shard order
+    """
+    # Initialize logger if not provided
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    if num_transactions < 1:
+        raise ValueError("num_transactions must be positive")
+
+    if rows_per_shard <= 0:
+        raise ValueError("rows_per_shard must be positive")
+
+    num_shards = max(1, -(-num_transactions // rows_per_shard))
+    logger.info(
+        f"Generating {num_transactions:,} sample bank transactions in "
+        f"{num_shards} shard(s)...")
+
+    # Ensure directory exists and remove shards from earlier runs
+    file_handler = FileHandler(logger=logger)
+    shard_dir = Path(file_handler.ensure_writable_path(
+        str(Path(save_dir) / f"part-00000.{file_format}")
+    )).parent
+
+    for stale in shard_dir.glob(f"part-*.{file_format}"):
+        logger.debug(f"Removing stale shard {stale}")
+        stale.unlink()
+
+    # Fixed shard boundaries and seeds, independent of the worker count
+    starts = [i * rows_per_shard for i in range(num_shards)]
+    sizes = [
+        min(rows_per_shard, num_transactions - start) for start in starts
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(num_shards)
+    ref_width = max(
+        REFERENCE_MIN_WIDTH, len(str(max(num_transactions - 1, 0)))
+    )
+    paths = [
+        str(shard_dir / f"part-{i:05d}.{file_format}")
+        for i in range(num_shards)
+    ]
+
+    shard_args = (seeds, starts, sizes, [ref_width] * num_shards, paths)
+
+    if max_workers == 1:
+        summaries = list(map(_generate_shard, *shard_args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            summaries = list(executor.map(_generate_shard, *shard_args))
+
+    # Combine shard summaries without reloading any data
+    total_amount = sum(summary[1] for summary in summaries)
+    first_date = min(summary[2] for summary in summaries if summary[0])
+    last_date = max(summary[3] for summary in summaries if summary[0])
+    avg_amount = total_amount / num_transactions if num_transactions else 0.0
+
+    logger.info(f"Sample data generated in {shard_dir}")
+    logger.info(f"  Shards: {num_shards}")
+    logger.info(f"  Transactions: {num_transactions:,}")
+    logger.info(f"  Date range: {first_date} to {last_date}")
+    logger.info(f"  Total debits: ₦{total_amount:,}")
+    logger.info(f"  Average transaction: ₦{avg_amount:,.2f}")
+
+    return paths
+
+
 def main() -> None:
     """Run sample data generator as standalone script."""
     logger = Logger(level=logging.INFO)
@@ -0,0 +1,321 @@
+# storage.py
+
+"""
+Cleaned Bank Statement Storage
+
+This module stores cleaned transactions as a Hive-partitioned Parquet
+dataset (one trans_month=YYYY-MM directory per month) and reads it back with
+month filters pushed down to partition pruning and row-group statistics.
+
+OutputOptions sets how clean_data writes the dataset. incremental=True
+appends to the existing month partitions instead of replacing the dataset
+(see incremental.py). background_save=True writes on a background thread,
+overlapping the writes with cleaning the next chunk; call
+background.wait_for_saves() before relying on the files.
+fixed_point_money=True stores debits as int64 kobo in a debit(kobo)
+column (read exactly from the statement digits) instead of debit(₦), so
+every later sum is exact and independent of chunking or row order; keep
+the same setting for incremental runs into one dataset.
+
+Classes:
+    OutputOptions: How the cleaned dataset is written (append, background
+        saves, fixed-point money)
+    DatasetWriter: Write (replace or append) the cleaned dataset chunk by
+        chunk
+
+Functions:
+    read_cleaned_dataset: Load the cleaned dataset, optionally by month range
+    dataset_columns: Column names of the cleaned dataset, from metadata only
+    filter_months: Apply a month range to an in-memory cleaned frame
+"""
+
+import shutil
+import uuid
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from pandas import DataFrame
+
+
+# Configuration: Dataset layout
+PARTITION_COLUMN = "trans_month"
+DATE_COLUMN = "trans_date"
+PARQUET_COMPRESSION = "zstd"
+
+# Debit amounts are stored in naira, or as int64 kobo with fixed-point money
+AMOUNT_COLUMN = "debit(₦)"
+MINOR_AMOUNT_COLUMN = "debit(kobo)"
+
+# Hive partition values are kept as "YYYY-MM" strings, which sort by month
+PARTITIONING = ds.partitioning(
+    pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive"
+)
+
+# Appended files are written hidden (readers skip names starting with '.')
+# and renamed to their final name once committed
+PENDING_PREFIX = ".pending-"
+PART_PREFIX = "part-"
+
+# Datasets are read through memory-mapped files: column chunks are paged in
+# from the OS cache on demand instead of being copied into read buffers
+MMAP_FILESYSTEM = pafs.LocalFileSystem(use_mmap=True)
+
+
+class OutputOptions(NamedTuple):
+    """
+    How the cleaned dataset is written: appended to or replaced, on the
+    background writer thread or not, and with debits in naira or kobo.
+    """
+    incremental: bool = False
+    background_save: bool = False
+    fixed_point_money: bool = False
+
+
+def _to_table(df: DataFrame) -> pa.Table:
+    """Convert cleaned rows to Arrow, sorted by date for tight statistics."""
+    df = df.sort_values(DATE_COLUMN)
+    df = df.assign(**{PARTITION_COLUMN: df[PARTITION_COLUMN].astype(str)})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _write(
+    table: pa.Table,
+    dataset_dir: str,
+    basename_template: str,
+    existing_data_behavior: str
+) -> None:
+    """Write a table into month partitions of dataset_dir."""
+    file_format = ds.ParquetFileFormat()
+
+    ds.write_dataset(
+        table,
+        dataset_dir,
+        format=file_format,
+        partitioning=PARTITIONING,
+        basename_template=basename_template,
+        existing_data_behavior=existing_data_behavior,
+        file_options=file_format.make_write_options(
+            compression=PARQUET_COMPRESSION
+        ),
+    )
+
+
+class DatasetWriter:
+    """
+    Write cleaned rows into the month partitions of a dataset, one chunk at
+    a time, so a statement never has to be held in memory whole.
+
+    A replacing writer fills a staging directory next to dataset_dir
+    (self.directory) that commit() swaps in once every chunk is written;
+    files at the dataset root (such as the incremental watermark) are not
+    carried over, so state that belongs to the new data is written into
+    the staging directory before commit().
+
+    An appending writer adds hidden files next to the existing ones, which
+    commit() renames into view. State recorded before commit() (the
+    watermark, naming run_id) is the commit point: when an append is
+    interrupted after it, the next appending writer given that run as
+    committed_run publishes the run's hidden files, and it removes hidden
+    files of any other run.
+
+    Raises:
+        ValueError: If appending to a single Parquet file
+    """
+
+    def __init__(
+        self,
+        dataset_dir: str,
+        append: bool = False,
+        committed_run: Optional[str] = None
+    ) -> None:
+        target = Path(dataset_dir)
+
+        if append and target.is_file():
+            raise ValueError(
+                f"{dataset_dir} is a single Parquet file; rewrite it with a "
+                "full cleaning run before appending"
+            )
+
+        self.dataset_dir = dataset_dir
+        self.append = append
+        self.run_id = uuid.uuid4().hex[:12]
+        self.chunks_written = 0
+
+        if append:
+            self.directory = target
+            if target.is_dir():
+                self._recover(committed_run)
+        else:
+            self.directory = target.with_name(f"{target.name}.tmp")
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory.mkdir(parents=True)
+
+    def write(self, df: DataFrame) -> None:
+        """Write one chunk of cleaned rows as new files."""
+        if df.empty:
+            return
+
+        prefix = PENDING_PREFIX if self.append else PART_PREFIX
+        _write(
+            _to_table(df),
+            str(self.directory),
+            f"{prefix}{self.run_id}-{self.chunks_written}-{{i}}.parquet",
+            "overwrite_or_ignore"
+        )
+        self.chunks_written += 1
+
+    def _publish(self, run_id: str) -> None:
+        """Rename the hidden files of a run to their final names."""
+        for pending in self.directory.rglob(f"{PENDING_PREFIX}{run_id}-*"):
+            pending.rename(pending.with_name(
+                PART_PREFIX + pending.name[len(PENDING_PREFIX):]))
+
+    def _recover(self, committed_run: Optional[str]) -> None:
+        """Finish the committed run's append and drop interrupted ones."""
+        if committed_run is not None:
+            self._publish(committed_run)
+
+        for pending in self.directory.rglob(f"{PENDING_PREFIX}*"):
+            pending.unlink()
+
+    def commit(self) -> None:
+        """Rename appended files into view, or swap the staged dataset in."""
+        if self.append:
+            self._publish(self.run_id)
+            return
+
+        # A single-file dataset from older runs is replaced as well
+        target = Path(self.dataset_dir)
+        if target.is_dir():
+            shutil.rmtree(target)
+        elif target.exists():
+            target.unlink()
+
+        self.directory.rename(target)
+
+
+def _open_dataset(path: str) -> ds.Dataset:
+    """Open a cleaned dataset (directory or single file) memory-mapped."""
+    partitioned = Path(path).is_dir()
+    return ds.dataset(
+        path,
+        format="parquet",
+        partitioning=PARTITIONING if partitioned else None,
+        filesystem=MMAP_FILESYSTEM
+    )
+
+
+def _to_pandas(table: pa.Table) -> DataFrame:
+    """
+    Convert a table to pandas without holding two copies of it.
+
+    split_blocks keeps one block per column, so numeric columns without
+    nulls are zero-copy views of the Arrow buffers instead of being
+    consolidated into a new 2-D block; self_destruct releases each Arrow
+    column once converted. The table must not be used afterwards.
+    """
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _month_filter(
+    start_month: Optional[str],
+    end_month: Optional[str],
+    partitioned: bool
+) -> Optional[pc.Expression]:
+    """
+    Build a filter for an inclusive YYYY-MM month range.
+
+    The trans_month test prunes whole partitions; the trans_date test lets
+    Parquet row-group min/max statistics skip data inside files (and is the
+    only pruning available for a single-file dataset).
+    """
+    conditions: List[pc.Expression] = []
+
+    # Partition values are canonical YYYY-MM strings, so bounds given as
+    # e.g. "2024-1" are normalized before they are compared as text
+    if start_month is not None:
+        start = pd.Period(start_month, freq="M")
+        conditions.append(
+            ds.field(DATE_COLUMN) >= pa.scalar(start.start_time))
+        if partitioned:
+            conditions.append(ds.field(PARTITION_COLUMN) >= str(start))
+
+    if end_month is not None:
+        end = pd.Period(end_month, freq="M")
+        conditions.append(
+            ds.field(DATE_COLUMN) < pa.scalar((end + 1).start_time))
+        if partitioned:
+            conditions.append(ds.field(PARTITION_COLUMN) <= str(end))
+
+    if not conditions:
+        return None
+
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def read_cleaned_dataset(
+    path: str,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    columns: Optional[List[str]] = None
+) -> DataFrame:
+    """
+    Load cleaned transactions, reading only the months requested.
+
+    Accepts a partitioned dataset directory or a single Parquet file.
+    Months are "YYYY-MM" strings and the range is inclusive; either bound
+    may be omitted. trans_month is returned as a monthly period column.
+
+    Only the requested columns are decoded, from memory-mapped files, and
+    converted to pandas without an intermediate copy, so peak memory
+    follows the size of those columns rather than of the dataset.
+    """
+    partitioned = Path(path).is_dir()
+    table = _open_dataset(path).to_table(
+        columns=columns,
+        filter=_month_filter(start_month, end_month, partitioned)
+    )
+    # Partition values repeat per row; convert each distinct month once
+    if partitioned and PARTITION_COLUMN in table.column_names:
+        index = table.column_names.index(PARTITION_COLUMN)
+        table = table.set_column(
+            index, PARTITION_COLUMN, table.column(index).dictionary_encode()
+        )
+
+    df = _to_pandas(table)
+
+    if PARTITION_COLUMN in df.columns and partitioned:
+        months = df[PARTITION_COLUMN].cat
+        periods = pd.PeriodIndex(months.categories.astype(str), freq="M")
+        df[PARTITION_COLUMN] = periods.take(months.codes.to_numpy()).array
+
+    return df
+
+
+def dataset_columns(path: str) -> List[str]:
+    """Column names of a cleaned dataset (directory or file), without reading rows."""
+    return _open_dataset(path).schema.names
+
+
+def filter_months(
+    df: DataFrame,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None
+) -> DataFrame:
+    """Keep rows of an in-memory cleaned frame within an inclusive month range."""
+    keep = pd.Series(True, index=df.index)
+
+    if start_month is not None:
+        keep &= df[PARTITION_COLUMN] >= pd.Period(start_month, freq="M")
+    if end_month is not None:
+        keep &= df[PARTITION_COLUMN] <= pd.Period(end_month, freq="M")
+
+    return df[keep]
@@ -17,14 +17,18 @@ import logging
 from typing import Optional
 
 import matplotlib.dates as mdates
+from pandas import DataFrame
 from haashi_pkg.plot_engine import PlotEngine
 from haashi_pkg.utility import Logger
+import shared_path  # noqa: F401
 from analyze_data import aggregations
+from money import from_minor_units, sum_minor_units
 
 
 def visualize_data(
     save_path: str = "data/plots/bank_statement_2025.png",
-    logger: Optional[Logger] = None
+    logger: Optional[Logger] = None,
+    bank_st_df: Optional[DataFrame] = None
 ) -> None:
     """
     Create comprehensive bank statement visualization dashboard.
@@ -37,7 +41,8 @@ def visualize_data(
 
     Note:
         Calls aggregations() to get processed data. Ensure cleaned data
-        exists at the default path before running.
+        exists at the default path before running, or pass the cleaned
+        frame as bank_st_df.
     """
     # Initialize logger if not provided
     if logger is None:
@@ -51,7 +56,7 @@ def visualize_data(
 
     # Get aggregated data
     logger.debug("Loading aggregated data")
-    result = aggregations(logger=logger)
+    result = aggregations(logger=logger, bank_st_df=bank_st_df)
 
     if result is None:
         logger.error("Aggregations returned None - cannot visualize")
@@ -249,8 +254,15 @@ def visualize_data(
 
     logger.debug("Creating summary statistics box")
 
+    # Exact total when the data was cleaned with fixed-point money
+    if "total_spending_kobo" in spend_by_category.columns:
+        total_spent = from_minor_units(
+            sum_minor_units(spend_by_category.total_spending_kobo))
+    else:
+        total_spent = spendings.sum()
+
     stats = {
-        "Total Spent": f"₦{spendings.sum():,.0f}",
+        "Total Spent": f"₦{total_spent:,.0f}",
         "Avg Per Month": f"₦{avg_per_month:,.0f}",
         "Total Transactions": f"{transaction_count}",
         "Biggest Expense": f"₦{max_expense:,.2f}",
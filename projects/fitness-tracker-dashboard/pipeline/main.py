@@ -3,14 +3,25 @@
 # main.py
 
 
-"""Fitness Tracker Dashboard - Main entry point."""
+"""
+Fitness Tracker Dashboard - Main entry point.
+
+The dashboard is skipped when its code is unchanged since the last
+successful run; pass -f/--force to re-create it.
+"""
 
 import sys
 import logging
 from haashi_pkg.utility import Logger
+import shared_path  # noqa: F401
+from stages import Stage, StageRunner
 from visualize_data import visualize_data
 
 
+# Stage output (the module's default path)
+PLOT_PATH = "data/plots/fitness_tracker_dashboard.png"
+
+
 def parse_args() -> int:
     """Parse command line args for logging level."""
     if len(sys.argv) > 1:
@@ -19,6 +30,11 @@ def parse_args() -> int:
     return logging.INFO
 
 
+def parse_force() -> bool:
+    """Return True if the dashboard should be re-created (-f or --force)."""
+    return "-f" in sys.argv or "--force" in sys.argv
+
+
 def main() -> None:
     """Run the fitness tracker dashboard generator."""
     log_level = parse_args()
@@ -29,9 +45,20 @@ def main() -> None:
     logger.info("=" * 60)
 
     try:
+        runner = StageRunner(force=parse_force(), logger=logger)
+
         logger.info("\nCreating fitness tracker dashboard...")
-        visualize_data(logger=logger)
-        logger.info("✓ Dashboard created successfully")
+        ran, _ = runner.run(Stage(
+            name="visualize",
+            func=lambda: visualize_data(logger=logger),
+            inputs=[],
+            outputs=[PLOT_PATH],
+            code=["visualize_data"],
+        ))
+        if ran:
+            logger.info("✓ Dashboard created successfully")
+
+        runner.commit()
 
         logger.info("\n" + "=" * 60)
         logger.info("Dashboard ready!")
@@ -10,7 +10,30 @@ from typing import Optional, Tuple
 
 from pandas import DataFrame
 from haashi_pkg.utility import Logger
-from haashi_pkg.data_engine import DataAnalyzer
+import shared_path  # noqa: F401
+from validation import (
+    ColumnRule,
+    Schema,
+    log_report,
+    raise_for_violations,
+    validate,
+)
+
+
+# Configuration: Expectations for the dashboard data
+WEEKLY_STEPS_SCHEMA = Schema("weekly_steps", (
+    ColumnRule("days", "text", nullable=False, allowed=(
+        "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")),
+    ColumnRule("alex", "integer", nullable=False, min_value=0),
+    ColumnRule("bree", "integer", nullable=False, min_value=0),
+    ColumnRule("carlos", "integer", nullable=False, min_value=0),
+))
+USER_METRICS_SCHEMA = Schema("user_metrics", (
+    ColumnRule("users", "text", nullable=False),
+    ColumnRule("calories", "number", nullable=False, min_value=0),
+    ColumnRule("average_sleep_hours", "number", nullable=False,
+               min_value=0, max_value=24),
+))
 
 
 def setup_data(
@@ -27,9 +50,6 @@ def setup_data(
 
     logger.debug("Setting up fitness tracker data...")
 
-    # Initialize analyzer
-    analyzer = DataAnalyzer(logger=logger)
-
     # Days of the week
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
@@ -55,15 +75,14 @@ def setup_data(
     logger.debug(f"Created weekly steps data: {len(weekly_steps_df)} days")
     logger.debug(f"Created user metrics: {len(user_metrics_df)} users")
 
-    # Validate data structure
-    analyzer.validate_columns_exist(
-        weekly_steps_df,
-        ['days', 'alex', 'bree', 'carlos']
-    )
-    analyzer.validate_columns_exist(
-        user_metrics_df,
-        ['users', 'calories', 'average_sleep_hours']
-    )
+    # Validate data structure and values
+    for df, schema in (
+        (weekly_steps_df, WEEKLY_STEPS_SCHEMA),
+        (user_metrics_df, USER_METRICS_SCHEMA),
+    ):
+        report = validate(df, schema)
+        log_report(report, logger)
+        raise_for_violations(report)
 
     logger.info("Data setup completed")
     logger.info(f"  Users: {len(user_metrics_df)}")
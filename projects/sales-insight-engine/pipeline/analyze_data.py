@@ -6,15 +6,63 @@
 
 import sys
 import logging
-from typing import Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 
-from pandas import DataFrame
+import pandas as pd
+from pandas import DataFrame, Series
 from haashi_pkg.utility import Logger
-from haashi_pkg.data_engine import DataAnalyzer, DataLoader
-
+from haashi_pkg.data_engine import DataAnalyzer
+import shared_path  # noqa: F401
+from background import wait_for_saves
+from arrow_dtypes import is_month_key, month_key_to_period
+from cube import cube_rollup, cube_slice, read_cube, whole_months
+from growth import amount_columns, growth_metrics
+from money import from_minor_units, sum_minor_units
+from parallel_agg import parallel_file_rollups, parallel_rollups
+from rollups import ROLLUP_DIMENSIONS, stream_rollups, sum_by_group
+from storage import (
+    filter_dates,
+    parquet_columns,
+    read_sales_parquet,
+)
+from summary import ColumnStats, DatasetSummary, summary_statistics
+
+
+# Columns the analysis reads from the cleaned file (plus the revenue column,
+# and sale_date when filtering by date)
+ANALYSIS_COLUMNS = ["sale_month", "category", "region"]
+
+
+class AnalysisResult(NamedTuple):
+    """
+    Aggregates and headline numbers of an analysis.
 
-# Type alias for return value
-AnalysisResult = Tuple[DataFrame, DataFrame, DataFrame, DataFrame, str, str]
+    Only small frames (one row per category, region or month) and scalars
+    are kept, so holding a result does not keep the dataset in memory. The
+    analyzed rows can be read back from filepath with load_sales().
+    """
+    revenue_by_category: DataFrame
+    revenue_by_region: DataFrame
+    revenue_by_month: DataFrame
+    start_label: str
+    end_label: str
+    row_count: int
+    total_revenue: float
+    total_revenue_cents: Optional[int]
+    filepath: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+    def load_sales(self, columns: Optional[List[str]] = None) -> DataFrame:
+        """
+        Read the analyzed rows (within the analysis date range) on request.
+
+        Waits for background saves first, as the data may have been handed
+        over in memory while its file was still being written.
+        """
+        wait_for_saves()
+        return read_sales_parquet(
+            self.filepath, columns, self.start_date, self.end_date)
 
 
 def aggregate_revenue(
@@ -27,21 +75,47 @@ def aggregate_revenue(
     analyzer: Optional[DataAnalyzer] = None
 ) -> DataFrame:
     """Aggregate revenue data by specified column."""
-    if analyzer is None:
-        analyzer = DataAnalyzer()
+    totals = sum_by_group(df, target_col, groupby_col, analyzer)
+    return rollup_frame(totals, target_col, sort_col, new_name, ascending)
+
 
+def rollup_frame(
+    totals: Series,
+    target_col: str,
+    sort_col: str,
+    new_name: str,
+    ascending: bool = True
+) -> DataFrame:
+    """Turn revenue sums indexed by group into a sorted rollup frame."""
     return (
-        analyzer.aggregate(df, target_col, groupby_col, op="sum")
+        totals
         .reset_index()
         .sort_values(by=sort_col, ascending=ascending)
         .rename(columns={target_col: new_name})
     )
 
 
-def get_date_range_labels(df: DataFrame, date_col: str) -> Tuple[str, str]:
-    """Get formatted start and end date labels (e.g., 'Jan 2024')."""
-    start_date = df[date_col].min()
-    end_date = df[date_col].max()
+def get_date_range_labels(
+    df: DataFrame,
+    date_col: str,
+    summary: Optional[DatasetSummary] = None
+) -> Tuple[str, str]:
+    """
+    Get formatted start and end date labels (e.g., 'Jan 2024').
+
+    With a summary of the dataset the range is taken from its statistics
+    and df is not touched.
+    """
+    if summary is not None:
+        start_date = summary.columns[date_col].min
+        end_date = summary.columns[date_col].max
+    else:
+        start_date = df[date_col].min()
+        end_date = df[date_col].max()
+
+    # No rows (e.g. a date filter matching nothing)
+    if pd.isna(start_date) or pd.isna(end_date):
+        return "N/A", "N/A"
 
     return start_date.strftime("%b %Y"), end_date.strftime("%b %Y")
 
@@ -49,88 +123,228 @@ def get_date_range_labels(df: DataFrame, date_col: str) -> Tuple[str, str]:
 def analyze_data(
     filepath: str = "data/cleaned_retail_sales.parquet",
     logger: Optional[Logger] = None,
-    can_return: bool = True
+    can_return: bool = True,
+    sales_df: Optional[DataFrame] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    out_of_core: bool = False,
+    workers: int = 1,
+    use_cube: bool = True
 ) -> Optional[AnalysisResult]:
     """
     Analyze retail sales data and calculate revenue metrics.
 
-    Aggregates revenue by category, region, and month. Calculates
-    month-over-month percentage changes.
+    Aggregates revenue by category, region, and month. The monthly frame
+    covers every month of the range and carries month-over-month and
+    year-over-year changes, rolling 3/6/12-month and cumulative revenue
+    (see growth.py). If sales_df is given (e.g. from
+    clean_data(can_return=True)) it is used directly instead of loading
+    filepath.
+
+    Returns an AnalysisResult with the three rollups, the date range
+    labels, the row count and total revenue; the rows themselves are not
+    kept (see AnalysisResult.load_sales).
+
+    Only the columns the analysis needs are read from filepath, and the
+    date range of the full dataset comes from the summary written at clean
+    time (see summary.summary_statistics). start_date and end_date
+    ("YYYY-MM-DD", inclusive, either optional) limit the analysis to a date
+    range; row groups outside it are skipped using their sale_date
+    statistics.
+
+    Data cleaned with fixed-point money (a revenue_cents column) is summed
+    exactly in cents; total_revenue is then reported in dollars and the
+    exact sums are kept in total_revenue_cents.
+
+    Data cleaned with arrow_dtypes=True is aggregated in its Arrow-backed
+    dtypes; only the monthly result's integer month keys are turned into
+    periods.
+
+    With out_of_core=True filepath is never loaded whole: record batches
+    are streamed and reduced to partial revenue sums per category, region
+    and month, which are merged as they arrive (see rollups.py). Memory is
+    bounded by the batch size; the rollups are the same.
+
+    With workers > 1 the rollups are computed on that many processes (see
+    parallel_agg.py): an in-memory frame is shared with them through an
+    Arrow IPC file in shared memory, and in out-of-core mode each process
+    streams its own share of the file's row groups.
+
+    When filepath has a current revenue cube (written by clean_data, see
+    cube.py) and the date range, if any, is made of whole months, the
+    rollups are answered from the cube without reading any rows. Pass
+    use_cube=False to always aggregate the rows.
     """
     if logger is None:
         logger = Logger(level=logging.INFO)
 
-    logger.debug(f"Loading data from {filepath}")
-
-    # Load data
-    loader = DataLoader(filepath, logger=logger)
-    sales_df = loader.load_parquet_single()
-
-    logger.debug(f"Loaded {len(sales_df)} sales records")
-    logger.debug("Performing revenue aggregations...")
-
     # Initialize analyzer
     analyzer = DataAnalyzer(logger=logger)
 
+    # Load data
+    summary: Optional[DatasetSummary] = None
+
+    cube = None
+    months = whole_months(start_date, end_date)
+    if sales_df is None and use_cube and months is not None:
+        cube = read_cube(filepath)
+
+    if cube is not None:
+        logger.debug(f"Answering rollups from the revenue cube of {filepath}")
+        cube = cube_slice(cube, *months)
+        revenue_col = cube.revenue_col
+        totals = {
+            dim: cube_rollup(cube, [dim], [revenue_col])[revenue_col]
+            for dim in ROLLUP_DIMENSIONS
+        }
+        row_count = int(cube.cells.row_count.sum())
+
+        # Without a date filter the full date range comes from metadata;
+        # with one, the months left in the cube give the labels
+        if start_date or end_date:
+            observed = cube.cells.sale_month.dropna()
+            first, last = observed.min(), observed.max()
+            summary = DatasetSummary(
+                row_count,
+                {"sale_date": ColumnStats(
+                    first.to_timestamp(), last.to_timestamp(), None, 0)},
+                source="cube",
+            )
+        else:
+            summary = summary_statistics(filepath, ["sale_date"])
+
+    elif out_of_core:
+        logger.debug(f"Streaming record batches from {filepath}")
+        revenue_col = "revenue_cents" \
+            if "revenue_cents" in parquet_columns(filepath) else "revenue"
+
+        if workers > 1:
+            rollups = parallel_file_rollups(
+                filepath, revenue_col, start_date=start_date,
+                end_date=end_date, workers=workers
+            )
+        else:
+            rollups = stream_rollups(
+                filepath, revenue_col, start_date=start_date,
+                end_date=end_date, analyzer=analyzer
+            )
+        totals = rollups.totals
+        sales_df = None
+        row_count = rollups.summary.row_count
+
+        # Without a date filter the full date range comes from metadata
+        if start_date or end_date:
+            summary = rollups.summary
+        else:
+            summary = summary_statistics(filepath, ["sale_date"])
+
+    elif sales_df is None:
+        logger.debug(f"Loading data from {filepath}")
+        available = parquet_columns(filepath)
+        columns = ANALYSIS_COLUMNS + [
+            col for col in ("revenue", "revenue_cents") if col in available
+        ]
+
+        # The full date range comes from metadata; sale_date rows are only
+        # needed to filter
+        if start_date or end_date:
+            columns.append("sale_date")
+        else:
+            summary = summary_statistics(filepath, ["sale_date"])
+            logger.debug(f"Summary statistics read from {summary.source}")
+
+        sales_df = read_sales_parquet(filepath, columns, start_date, end_date)
+    else:
+        logger.debug("Using cleaned data handed over in memory")
+        if start_date or end_date:
+            sales_df = filter_dates(sales_df, start_date, end_date)
+
+    if cube is None and not out_of_core:
+        logger.debug(f"Loaded {len(sales_df)} sales records")
+        logger.debug("Performing revenue aggregations...")
+        row_count = len(sales_df)
+
+        # Fixed-point data is summed in cents
+        revenue_col = "revenue_cents" \
+            if "revenue_cents" in sales_df.columns else "revenue"
+
+        if workers > 1:
+            logger.debug(f"Aggregating on {workers} processes")
+            totals = parallel_rollups(sales_df, revenue_col, workers=workers)
+        else:
+            totals = {
+                dim: sum_by_group(sales_df, revenue_col, dim, analyzer)
+                for dim in ROLLUP_DIMENSIONS
+            }
+
     # Revenue by category
-    revenue_by_cat = aggregate_revenue(
-        sales_df, "revenue", "category", "revenue",
-        "total_revenue", ascending=False, analyzer=analyzer
+    revenue_by_cat = rollup_frame(
+        totals["category"], revenue_col, revenue_col,
+        "total_revenue", ascending=False
     )
 
     # Revenue by region
-    revenue_by_region = aggregate_revenue(
-        sales_df, "revenue", "region", "revenue",
-        "total_revenue", ascending=False, analyzer=analyzer
-    )
-
-    # Revenue by month
-    revenue_by_month = aggregate_revenue(
-        sales_df, "revenue", "sale_month", "sale_month",
-        "total_revenue", ascending=True, analyzer=analyzer
+    revenue_by_region = rollup_frame(
+        totals["region"], revenue_col, revenue_col,
+        "total_revenue", ascending=False
     )
 
-    # Calculate month-over-month percentage change
-    logger.debug("Calculating month-over-month growth rates")
-    pct_change = (
-        revenue_by_month.set_index("sale_month")
-        .resample("M")["total_revenue"]
-        .sum()
-        .pct_change()
-        .reset_index()
-    )
-
-    # Merge percentage change back
-    revenue_by_month = (
-        analyzer.merge(revenue_by_month, pct_change, "sale_month")
-        .rename(columns={
-            "total_revenue_x": "total_revenue",
-            "total_revenue_y": "revenue_pct_change"
-        })
-        .fillna(0)
-    )
-
-    revenue_by_month["revenue_pct_change_pct"] = (
-        revenue_by_month.revenue_pct_change * 100
-    )
+    # Integer month keys (Arrow dtype mode) become periods once aggregated
+    monthly = totals["sale_month"]
+    if is_month_key(monthly.index.to_series()):
+        monthly = monthly.set_axis(pd.PeriodIndex(
+            month_key_to_period(monthly.index.to_series()), name="sale_month"
+        ))
+
+    # Revenue by month with growth metrics (month-over-month, year-over-
+    # year, rolling and cumulative revenue) over every month in the range
+    logger.debug("Calculating monthly growth metrics")
+    revenue_by_month = growth_metrics(monthly)
+
+    # Exact cent totals are kept alongside dollars for display
+    if revenue_col == "revenue_cents":
+        for frame in (revenue_by_cat, revenue_by_region, revenue_by_month):
+            frame["total_revenue_cents"] = frame["total_revenue"]
+            frame["total_revenue"] = from_minor_units(frame["total_revenue"])
+
+        # The month frame's rolling and cumulative sums are amounts too
+        for col in amount_columns():
+            if col == "total_revenue":
+                continue
+            revenue_by_month[col] = from_minor_units(revenue_by_month[col])
 
     # Get date range labels
-    start_date, end_date = get_date_range_labels(sales_df, "sale_date")
+    start_label, end_label = get_date_range_labels(
+        sales_df, "sale_date", summary)
+
+    # Total revenue (exact when the data was cleaned with fixed-point money)
+    total_revenue_cents = None
+    if "total_revenue_cents" in revenue_by_month.columns:
+        total_revenue_cents = sum_minor_units(
+            revenue_by_month.total_revenue_cents)
+        total_revenue = from_minor_units(total_revenue_cents)
+    else:
+        total_revenue = float(revenue_by_month.total_revenue.sum())
 
     logger.info("Analysis completed successfully")
-    logger.info(f"  Date range: {start_date} - {end_date}")
-    logger.info(f"  Total sales: {len(sales_df):,}")
+    logger.info(f"  Date range: {start_label} - {end_label}")
+    logger.info(f"  Total sales: {row_count:,}")
     logger.info(f"  Categories: {len(revenue_by_cat)}")
     logger.info(f"  Regions: {len(revenue_by_region)}")
 
     if can_return:
-        return (
-            sales_df,
-            revenue_by_cat,
-            revenue_by_region,
-            revenue_by_month,
-            start_date,
-            end_date,
+        return AnalysisResult(
+            revenue_by_category=revenue_by_cat,
+            revenue_by_region=revenue_by_region,
+            revenue_by_month=revenue_by_month,
+            start_label=start_label,
+            end_label=end_label,
+            row_count=row_count,
+            total_revenue=total_revenue,
+            total_revenue_cents=total_revenue_cents,
+            filepath=filepath,
+            start_date=start_date,
+            end_date=end_date,
         )
 
     return None
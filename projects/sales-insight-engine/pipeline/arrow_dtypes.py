@@ -0,0 +1,117 @@
+# arrow_dtypes.py
+
+"""
+Arrow-Backed Dtypes
+
+Opt-in mode in which the cleaned sales frame keeps Arrow-backed columns
+(pd.ArrowDtype) from the CSV read through the Parquet write, the analysis
+read and the aggregations, instead of converting to numpy, category,
+datetime64 and period dtypes. The columns are then the buffers pyarrow
+itself reads and writes, so Parquet round trips need no conversion:
+
+- text columns are Arrow strings, category and region dictionary-encoded
+- sale_date is an Arrow timestamp
+- sale_month is an int32 month key (months since January 1970, the same
+  number as a monthly period's ordinal) instead of a period object
+
+Only aggregated results, a few rows per month, are turned back into
+periods.
+
+Functions:
+    iter_csv_arrow: Read a CSV batch by batch into Arrow-backed columns
+    to_dictionary: Dictionary-encode a text column
+    to_arrow_dates: Convert a column of dates to an Arrow timestamp column
+    month_key: Month key of each date in an Arrow timestamp column
+    is_month_key: Whether a month column holds integer month keys
+    month_key_to_period: Convert month keys back to monthly periods
+"""
+
+from typing import Iterator, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from pandas import DataFrame, Series
+import shared_path  # noqa: F401
+from parsing import parse_dates
+
+
+# Configuration: Arrow types used for dictionary text, dates and month keys
+DICTIONARY_DTYPE = pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string()))
+TIMESTAMP_DTYPE = pd.ArrowDtype(pa.timestamp("ns"))
+MONTH_KEY_DTYPE = pd.ArrowDtype(pa.int32())
+
+# Month keys count from January of this year
+MONTH_KEY_EPOCH_YEAR = 1970
+
+# Configuration: Bytes of CSV decoded into each batch when streaming
+CSV_BLOCK_BYTES = 32 << 20
+
+
+def iter_csv_arrow(
+    filepath: str,
+    text_columns: Sequence[str] = (),
+    block_bytes: int = CSV_BLOCK_BYTES
+) -> Iterator[DataFrame]:
+    """
+    Read a CSV batch by batch with the streaming pyarrow reader, keeping
+    Arrow-backed columns.
+
+    Column types are inferred from the first block, except text_columns,
+    which are always read as strings. Empty fields are nulls, as with
+    pandas.
+    """
+    reader = pacsv.open_csv(
+        filepath,
+        read_options=pacsv.ReadOptions(block_size=block_bytes),
+        convert_options=pacsv.ConvertOptions(
+            column_types={col: pa.string() for col in text_columns},
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def to_dictionary(values: Series) -> Series:
+    """Dictionary-encode a text column (Arrow counterpart of 'category')."""
+    return values.astype(DICTIONARY_DTYPE)
+
+
+def to_arrow_dates(values: Series) -> Series:
+    """
+    Convert a column of dates to an Arrow timestamp column.
+
+    Columns the CSV reader already typed as dates or timestamps are cast
+    directly; text goes through parsing.parse_dates first.
+    """
+    dtype = values.dtype
+
+    if isinstance(dtype, pd.ArrowDtype) and (
+        pa.types.is_date(dtype.pyarrow_dtype)
+        or pa.types.is_timestamp(dtype.pyarrow_dtype)
+    ):
+        return values.astype(TIMESTAMP_DTYPE)
+
+    return parse_dates(values).astype(TIMESTAMP_DTYPE)
+
+
+def month_key(dates: Series) -> Series:
+    """Months since January 1970 of each date (a monthly period ordinal)."""
+    keys = (
+        (dates.dt.year - MONTH_KEY_EPOCH_YEAR) * 12 + dates.dt.month - 1
+    )
+    return keys.astype(MONTH_KEY_DTYPE)
+
+
+def is_month_key(values: Series) -> bool:
+    """Whether a month column holds integer month keys rather than periods."""
+    return pd.api.types.is_integer_dtype(values.dtype)
+
+
+def month_key_to_period(keys: Series) -> Series:
+    """Convert month keys back to monthly periods (for small results)."""
+    periods = pd.PeriodIndex.from_ordinals(
+        keys.to_numpy(dtype="int64"), freq="M"
+    )
+    return Series(periods, index=keys.index, name=keys.name)
@@ -0,0 +1,268 @@
+# benchmark.py
+
+"""
+Sales Pipeline Benchmarks
+
+Dtype modes: runs the clean and analyze stages on a synthetic raw sales
+CSV (see generate_data.py) once with the default numpy/category/period
+dtypes and once with Arrow-backed dtypes (clean_data(arrow_dtypes=True)),
+and compares their time, cleaned frame size and peak memory. Each run
+happens in a fresh process so peak memory is measured per mode; the two
+runs must produce the same revenue totals.
+
+Scaling: times the revenue rollups of a synthetic cleaned frame with
+pandas on one core and with parallel_agg on increasing numbers of worker
+processes, both from memory and from a Parquet file.
+
+Functions:
+    run_stages: Clean and analyze a CSV in one dtype mode, with measurements
+    benchmark_dtypes: Compare the default and Arrow dtype modes
+    make_cleaned_sales: Build a cleaned sales frame for aggregation
+    benchmark_scaling: Rollup time and speedup by number of workers
+"""
+
+import os
+import sys
+import time
+import logging
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from haashi_pkg.utility import Logger
+import shared_path  # noqa: F401
+from timing import DEFAULT_REPEATS, time_best
+from analyze_data import analyze_data
+from clean_data import clean_data
+from generate_data import CATEGORIES, DEFAULT_PROFILE, REGIONS, write_sales_csv
+from parallel_agg import parallel_file_rollups, parallel_rollups
+from rollups import ROLLUP_DIMENSIONS, sum_by_group
+from storage import write_sales_parquet
+
+
+# Configuration: Benchmark sizes
+DEFAULT_BENCHMARK_ROWS = 5_000_000
+DEFAULT_SCALING_ROWS = 100_000_000
+
+
+def run_stages(raw_path: str, workdir: str, arrow_dtypes: bool) -> dict:
+    """
+    Clean and analyze raw_path in one dtype mode, measuring each stage.
+
+    Meant to run in a fresh process: peak_rss_mb is the process's peak
+    resident memory.
+    """
+    logger = Logger(level=logging.WARNING)
+    savepath = os.path.join(workdir, f"cleaned_arrow_{arrow_dtypes}.parquet")
+
+    start = time.perf_counter()
+    cleaned = clean_data(
+        raw_path, savepath, logger=logger, can_return=True,
+        arrow_dtypes=arrow_dtypes
+    )
+    clean_seconds = time.perf_counter() - start
+
+    frame_mb = cleaned.memory_usage(deep=True).sum() / 2**20
+    del cleaned
+
+    start = time.perf_counter()
+    # Aggregate the rows (not the cube) to compare the dtype modes
+    result = analyze_data(savepath, logger=logger, use_cube=False)
+    analyze_seconds = time.perf_counter() - start
+
+    return {
+        "dtypes": "arrow" if arrow_dtypes else "default",
+        "clean_seconds": round(clean_seconds, 3),
+        "analyze_seconds": round(analyze_seconds, 3),
+        "frame_mb": round(frame_mb, 1),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "total_revenue": result.total_revenue,
+    }
+
+
+def benchmark_dtypes(
+    num_rows: int = DEFAULT_BENCHMARK_ROWS,
+    logger: Optional[Logger] = None
+) -> DataFrame:
+    """
+    Compare the default and Arrow dtype modes on num_rows synthetic rows.
+
+    Returns one row per mode with stage times, cleaned frame size and peak
+    process memory. Raises AssertionError if the modes' revenue totals
+    differ.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    results: List[dict] = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        raw_path = os.path.join(workdir, "retail_sales.csv")
+
+        logger.info(f"Writing {num_rows:,} raw rows")
+        write_sales_csv(raw_path, num_rows)
+
+        for arrow_dtypes in (False, True):
+            # A fresh process per mode so peak memory is not shared
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=get_context("spawn")
+            ) as pool:
+                result = pool.submit(
+                    run_stages, raw_path, workdir, arrow_dtypes).result()
+
+            logger.info(
+                f"{result['dtypes']}: clean {result['clean_seconds']:.2f}s, "
+                f"analyze {result['analyze_seconds']:.2f}s, "
+                f"frame {result['frame_mb']:.0f} MB, "
+                f"peak {result['peak_rss_mb']:.0f} MB"
+            )
+            results.append(result)
+
+    default, arrow = results
+    if not np.isclose(default["total_revenue"], arrow["total_revenue"]):
+        raise AssertionError("Revenue totals differ between dtype modes")
+
+    return DataFrame(results)
+
+
+def make_cleaned_sales(num_rows: int, seed: int = 42) -> DataFrame:
+    """Build the columns analyze_data aggregates, as clean_data types them."""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(
+        pd.Period(DEFAULT_PROFILE.start_date, "M"),
+        periods=DEFAULT_PROFILE.num_days // 30, freq="M")
+
+    return DataFrame({
+        "category": pd.Categorical.from_codes(
+            rng.integers(0, len(CATEGORIES), num_rows), CATEGORIES),
+        "region": pd.Categorical.from_codes(
+            rng.integers(0, len(REGIONS), num_rows), REGIONS),
+        "sale_month": pd.PeriodIndex.from_ordinals(
+            months.asi8[rng.integers(0, len(months), num_rows)], freq="M"),
+        "revenue": np.round(rng.uniform(5, 5000, num_rows), 2),
+    })
+
+
+def benchmark_scaling(
+    num_rows: int = DEFAULT_SCALING_ROWS,
+    worker_counts: Optional[List[int]] = None,
+    repeats: int = DEFAULT_REPEATS,
+    logger: Optional[Logger] = None
+) -> DataFrame:
+    """
+    Time the category/region/month revenue rollups by number of workers.
+
+    worker_counts defaults to powers of two up to the number of CPUs. The
+    baseline is the three pandas groupbys on one core; speedup and
+    efficiency (speedup per worker) are relative to one parallel worker.
+    Raises AssertionError if a parallel result differs from the baseline.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = [2 ** i for i in range(cpus.bit_length())
+                         if 2 ** i <= cpus]
+
+    logger.info(f"Building {num_rows:,} cleaned rows")
+    sales_df = make_cleaned_sales(num_rows)
+
+    expected = {
+        dim: sum_by_group(sales_df, "revenue", dim)
+        for dim in ROLLUP_DIMENSIONS
+    }
+    baseline = time_best(
+        lambda: [sum_by_group(sales_df, "revenue", dim)
+                 for dim in ROLLUP_DIMENSIONS],
+        repeats=repeats
+    )
+    logger.info(f"pandas, 1 core: {baseline:.2f}s")
+
+    results: List[dict] = [{
+        "source": "memory", "method": "pandas groupby", "workers": 1,
+        "seconds": round(baseline, 3), "speedup": 1.0, "efficiency": 1.0,
+    }]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "cleaned.parquet")
+        sales_df["sale_date"] = sales_df.sale_month.dt.to_timestamp()
+        write_sales_parquet(sales_df, path)
+        sales_df = sales_df.drop(columns=["sale_date"])
+
+        for source, run in (
+            ("memory", lambda workers: parallel_rollups(
+                sales_df, "revenue", workers=workers)),
+            ("parquet", lambda workers: parallel_file_rollups(
+                path, "revenue", workers=workers).totals),
+        ):
+            single = None
+            for workers in worker_counts:
+                totals = run(workers)
+                for dim, sums in expected.items():
+                    if not np.allclose(
+                        totals[dim].sort_index().to_numpy(),
+                        sums.sort_index().to_numpy()
+                    ):
+                        raise AssertionError(
+                            f"Parallel {dim} totals differ ({source})")
+
+                seconds = time_best(run, workers, repeats=repeats)
+                single = single or seconds
+                results.append({
+                    "source": source,
+                    "method": "parallel_agg",
+                    "workers": workers,
+                    "seconds": round(seconds, 3),
+                    "speedup": round(single / seconds, 2),
+                    "efficiency": round(single / seconds / workers, 2),
+                })
+                logger.info(
+                    f"{source}, {workers} workers: {seconds:.2f}s "
+                    f"({single / seconds:.1f}x)"
+                )
+
+    return DataFrame(results)
+
+
+def main() -> None:
+    """
+    Run benchmarks as standalone script.
+
+    Usage: benchmark.py [dtypes|scaling] [rows]
+    """
+    logger = Logger(level=logging.INFO)
+
+    try:
+        args = sys.argv[1:]
+        which = args.pop(0) if args and not args[0].isdigit() else "dtypes"
+
+        if which == "scaling":
+            num_rows = int(args[0]) if args else DEFAULT_SCALING_ROWS
+            logger.info("Benchmarking parallel rollup scaling...")
+            results = benchmark_scaling(num_rows, logger=logger)
+        else:
+            num_rows = int(args[0]) if args else DEFAULT_BENCHMARK_ROWS
+            logger.info("Benchmarking default vs. Arrow-backed dtypes...")
+            results = benchmark_dtypes(num_rows, logger=logger)
+
+        logger.info("\n" + results.to_string(index=False))
+
+    except KeyboardInterrupt:
+        logger.info("\n\nProcess interrupted by user")
+        sys.exit(0)
+
+    except Exception as e:
+        logger.error(exception=e, save_to_json=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,92 +6,152 @@
 
 import sys
 import logging
-from typing import Optional, Union, List
+from typing import Dict, List, Optional
 
+import pandas as pd
 from pandas import DataFrame, Series
 from haashi_pkg.utility import Logger
-from haashi_pkg.data_engine import (
-    DataAnalyzer,
-    DataLoader,
-    DataSaver,
-    DataValidationError
+import shared_path  # noqa: F401
+from background import save_in_background
+from arrow_dtypes import (
+    iter_csv_arrow,
+    month_key,
+    to_arrow_dates,
+    to_dictionary,
+)
+from cube import build_cube, write_cube
+from money import (
+    from_minor_units,
+    multiply_minor_units,
+    sum_minor_units,
+    to_minor_units,
+)
+from parsing import parse_dates
+from profiling import (
+    PROFILE_BATCH_ROWS,
+    DatasetProfile,
+    Profiler,
+    log_missing,
+    profile_frame,
+    write_profiles,
+)
+from storage import write_sales_parquet
+from summary import compute_summary, write_summary
+from validation import (
+    ColumnRule,
+    Schema,
+    log_report,
+    raise_for_violations,
+    validate,
 )
 
 
-def validate_numeric_columns(
-    df: DataFrame,
-    columns: Union[str, List[str]],
-    analyzer: DataAnalyzer,
-    logger: Logger
-) -> None:
-    """Validate that numeric columns are non-negative."""
-    cols_to_check = [columns] if isinstance(columns, str) else columns
-
-    for col in cols_to_check:
-        try:
-            analyzer.validate_numeric_non_negative(df, col)
-            logger.debug(f"✓ Column '{col}' validated")
-        except DataValidationError as e:
-            logger.error(
-                f"Validation failed for column '{col}'",
-                exception=e,
-                save_to_json=True
-            )
-
-
-def inspect_missing_data(
-    df: DataFrame,
-    analyzer: DataAnalyzer,
-    logger: Logger
-) -> None:
-    """Log missing value counts for all columns."""
-    all_columns = list(df.columns)
-    missing_counts = analyzer.count_missing(df, all_columns)
-
-    total_missing = sum(missing_counts)
-    if total_missing > 0:
-        logger.debug(f"Missing values found: {total_missing} total")
-        for col, count in zip(all_columns, missing_counts):
-            if count > 0:
-                logger.debug(f"  {col}: {count} missing")
-    else:
-        logger.debug("No missing values found")
+# Cleaned columns profiled for labels (the raw data is profiled in full)
+CLEANED_PROFILE_COLUMNS = ["sale_date", "category", "region"]
+
+# Raw columns always read as text, whatever the first rows hold
+RAW_TEXT_COLUMNS = ["product_id", "category", "region"]
+
+# Categories and regions of the source data, plus the fill value
+ALLOWED_CATEGORIES = (
+    "Beauty", "Clothing", "Electronics", "Furniture",
+    "Groceries", "Sports", "Toys", "Unknown",
+)
+ALLOWED_REGIONS = ("Central", "East", "North", "South", "West", "Unknown")
+
+# Configuration: Expectations for cleaned sales (either dtype mode); the
+# money columns depend on fixed_point_money
+CLEANED_SALES_SCHEMA = Schema("cleaned_sales", (
+    ColumnRule("raw_id", "text", nullable=False),
+    ColumnRule("category", "text", nullable=False,
+               allowed=ALLOWED_CATEGORIES),
+    ColumnRule("region", "text", nullable=False, allowed=ALLOWED_REGIONS),
+    ColumnRule("quantity", "number", nullable=False, min_value=0),
+    ColumnRule("sale_date", "date", nullable=False,
+               min_date="2000-01-01", max_date="today"),
+    ColumnRule("sale_month", "month", nullable=False),
+))
+FLOAT_MONEY_RULES = (
+    ColumnRule("price", "number", nullable=False, min_value=0),
+    ColumnRule("revenue", "number", nullable=False, min_value=0),
+)
+FIXED_POINT_MONEY_RULES = (
+    ColumnRule("price_cents", "integer", nullable=False, min_value=0),
+    ColumnRule("revenue_cents", "integer", nullable=False, min_value=0),
+)
 
 
 def clean_data(
     filepath: str = "data/retail_sales.csv",
     savepath: str = "data/cleaned_retail_sales.parquet",
-    logger: Optional[Logger] = None
-) -> None:
+    logger: Optional[Logger] = None,
+    can_return: bool = False,
+    background_save: bool = False,
+    fixed_point_money: bool = False,
+    arrow_dtypes: bool = False
+) -> Optional[DataFrame]:
     """
     Clean retail sales data and save as Parquet.
 
     Steps:
-    - Load CSV data
+    - Load CSV data batch by batch, profiling each batch as it is read
+      (null counts for the inspection log, min/max, distinct counts, top
+      values)
     - Fill missing categories/regions with 'Unknown'
     - Convert data types
     - Remove invalid rows (negative/zero prices or quantities)
     - Calculate revenue and add sale month
-    - Validate cleaned data
-    - Save as Parquet
+    - Validate cleaned data against CLEANED_SALES_SCHEMA in one pass (see
+      validation.py); violations are logged with sample row labels
+    - Save as Parquet (sorted by sale_date, row groups with date statistics
+      and dictionary-encoded category/region; see storage.CLEANED_SALES_LAYOUT)
+      with a summary of counts, min/max and sums (see summary.py), a
+      revenue cube by category, region and month (see cube.py) and column
+      profiles of the raw and cleaned data (see profiling.py)
+
+    With can_return=True the cleaned frame is returned for in-memory
+    handoff to analyze_data(). With background_save=True the Parquet file is
+    written on a background thread; call background.wait_for_saves() before
+    relying on it.
+
+    With fixed_point_money=True prices and revenue are stored as int64
+    cents (price_cents, revenue_cents) instead of float dollars, so revenue
+    sums are exact and do not depend on how rows are grouped or split.
+
+    With arrow_dtypes=True the frame keeps Arrow-backed columns from the
+    CSV read onwards: dictionary-encoded category/region, an Arrow
+    timestamp sale_date and an int32 month key as sale_month (see
+    arrow_dtypes.py). The Parquet file is then written, and read back by
+    analyze_data(), without dtype conversions.
     """
     if logger is None:
         logger = Logger(level=logging.INFO)
 
     logger.info(f"Loading data from {filepath}")
 
-    # Load data
-    loader = DataLoader(filepath, logger=logger)
-    sales_df = loader.load_csv_single()
+    # Load data, profiling each batch as it is read
+    if arrow_dtypes:
+        reader = iter_csv_arrow(filepath, RAW_TEXT_COLUMNS)
+    else:
+        reader = pd.read_csv(filepath, chunksize=PROFILE_BATCH_ROWS)
 
-    logger.info(f"Loaded {len(sales_df)} records")
+    profiler = Profiler()
+    batches: List[DataFrame] = []
+    for batch in reader:
+        profiler.update(batch)
+        batches.append(batch)
 
-    # Initialize analyzer
-    analyzer = DataAnalyzer(logger=logger)
+    if not batches:
+        raise ValueError(f"No records found in {filepath}")
+
+    sales_df = pd.concat(batches, ignore_index=True)
+    del batches
+    logger.info(f"Loaded {len(sales_df)} records")
 
-    # Initial inspection
+    # Initial inspection from the profile gathered while loading
     logger.debug("Performing initial data inspection")
-    inspect_missing_data(sales_df, analyzer, logger)
+    raw_profile = profiler.profile()
+    log_missing(raw_profile, logger)
 
     # Cleaning operations
     logger.debug("Starting data cleaning...")
@@ -106,10 +166,14 @@ def clean_data(
 
     # Convert data types
     logger.debug("Converting data types")
-    sales_df["sale_date"] = analyzer.convert_datetime(
-        Series(sales_df["sale_date"]))
-    sales_df["category"] = sales_df["category"].astype("category")
-    sales_df["region"] = sales_df["region"].astype("category")
+    if arrow_dtypes:
+        sales_df["sale_date"] = to_arrow_dates(sales_df["sale_date"])
+        sales_df["category"] = to_dictionary(sales_df["category"])
+        sales_df["region"] = to_dictionary(sales_df["region"])
+    else:
+        sales_df["sale_date"] = parse_dates(Series(sales_df["sale_date"]))
+        sales_df["category"] = sales_df["category"].astype("category")
+        sales_df["region"] = sales_df["region"].astype("category")
 
     # Remove invalid rows
     logger.debug("Removing invalid rows (negative or zero values)")
@@ -123,29 +187,81 @@ def clean_data(
 
     # Calculate derived columns
     logger.debug("Calculating revenue and sale month")
-    sales_df["revenue"] = sales_df.price * sales_df.quantity
-    sales_df["sale_month"] = sales_df.sale_date.dt.to_period("M")
+    if fixed_point_money:
+        sales_df["price_cents"] = to_minor_units(sales_df.price)
+        if arrow_dtypes:
+            sales_df["price_cents"] = sales_df.price_cents.astype(
+                "int64[pyarrow]")
+        sales_df["revenue_cents"] = multiply_minor_units(
+            sales_df.price_cents, sales_df.quantity
+        )
+        sales_df = sales_df.drop(columns=["price"])
+        money_rules = FIXED_POINT_MONEY_RULES
+    else:
+        sales_df["revenue"] = sales_df.price * sales_df.quantity
+        money_rules = FLOAT_MONEY_RULES
+    if arrow_dtypes:
+        sales_df["sale_month"] = month_key(sales_df.sale_date)
+    else:
+        sales_df["sale_month"] = sales_df.sale_date.dt.to_period("M")
 
     # Sort by date
     sales_df = sales_df.sort_values(by="sale_date")
 
-    # Final validation
+    # Final validation: missing or mistyped columns stop the run, other
+    # violations are logged
     logger.debug("Validating cleaned data")
-    validate_numeric_columns(
-        sales_df, ["price", "quantity", "revenue"], analyzer, logger
-    )
+    report = validate(sales_df, CLEANED_SALES_SCHEMA.with_rules(*money_rules))
+    log_report(report, logger)
+    raise_for_violations(report, ["missing_column", "kind"])
+
+    profiles = {
+        "raw": raw_profile,
+        "cleaned": profile_frame(sales_df, CLEANED_PROFILE_COLUMNS),
+    }
+    dates = profiles["cleaned"].columns["sale_date"]
 
     logger.info(f"Cleaning completed: {len(sales_df)} records retained")
-    logger.info(
-        f"Date range: {sales_df['sale_date'].min()} to {sales_df['sale_date'].max()}")
-    logger.info(f"Total revenue: ${sales_df['revenue'].sum():,.2f}")
+    logger.info(f"Date range: {dates.min} to {dates.max}")
+    if fixed_point_money:
+        total_revenue = from_minor_units(
+            sum_minor_units(sales_df["revenue_cents"]))
+    else:
+        total_revenue = sales_df["revenue"].sum()
+    logger.info(f"Total revenue: ${total_revenue:,.2f}")
 
     # Save cleaned data
     logger.debug(f"Saving to {savepath}")
-    saver = DataSaver(logger=logger)
-    saver.save_parquet_default(sales_df, savepath)
 
-    logger.info(f"Data saved to {savepath}")
+    if background_save:
+        save_in_background(_save_cleaned, sales_df, savepath, profiles)
+        logger.info(f"Saving data to {savepath} in the background")
+    else:
+        _save_cleaned(sales_df, savepath, profiles)
+        logger.info(f"Data saved to {savepath}")
+
+    if can_return:
+        return sales_df
+
+    return None
+
+
+def _save_cleaned(
+    sales_df: DataFrame,
+    savepath: str,
+    profiles: Dict[str, DatasetProfile]
+) -> None:
+    """
+    Write the cleaned Parquet file, its summary statistics, cube and the
+    column profiles of the raw and cleaned data.
+    """
+    write_sales_parquet(sales_df, savepath)
+    write_summary(savepath, compute_summary(sales_df))
+    write_profiles(savepath, profiles)
+
+    revenue_col = "revenue_cents" \
+        if "revenue_cents" in sales_df.columns else "revenue"
+    write_cube(savepath, build_cube(sales_df, revenue_col))
 
 
 def main() -> None:
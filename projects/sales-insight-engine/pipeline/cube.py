@@ -0,0 +1,250 @@
+# cube.py
+
+"""
+Revenue Cube
+
+A small pre-aggregated copy of the cleaned sales data: revenue sum,
+quantity sum and row count per category × region × month cell, written
+next to the dataset at clean time. A few thousand cells stand in for any
+number of rows, so rollups by any combination of the three dimensions
+(and month-aligned date ranges) are answered without touching the rows.
+
+Like the summary (see summary.py), the cube records the size and mtime of
+the dataset's files and is ignored once they change without it; clean_data
+rebuilds it whenever it rewrites the cleaned file.
+
+Fixed-point revenue (revenue_cents) is summed exactly; float revenue sums
+of a rollup can differ from a direct sum over rows in the last digits, as
+the rows are added up in a different order.
+
+Functions:
+    build_cube: Aggregate cleaned rows into cube cells
+    write_cube: Save a cube next to a dataset
+    read_cube: Load the cube of a dataset if it is still current
+    whole_months: Month range of a date range, if it covers whole months
+    cube_slice: Cells of a cube within a range of months
+    cube_rollup: Measures per group of any combination of dimensions
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas import DataFrame, Period
+import shared_path  # noqa: F401
+from arrow_dtypes import is_month_key
+from summary import dataset_files
+
+
+# Configuration: Cube file name (inside a dataset directory) or suffix
+# (next to a single Parquet file)
+CUBE_FILE = "_cube.parquet"
+CUBE_SUFFIX = ".cube.parquet"
+
+# Bump when the cube layout changes to ignore old files
+CUBE_FORMAT_VERSION = 1
+
+# Schema metadata key holding the cube's state
+CUBE_METADATA_KEY = b"sales_cube"
+
+# Dimensions and additive measures of the cube
+CUBE_DIMENSIONS = ("category", "region", "sale_month")
+QUANTITY_COL = "quantity"
+ROW_COUNT_COL = "row_count"
+
+
+class RevenueCube(NamedTuple):
+    """
+    Cube cells (one row per observed category/region/month, months as
+    periods) and the revenue column they sum.
+    """
+    cells: DataFrame
+    revenue_col: str
+
+    @property
+    def measures(self) -> List[str]:
+        """Columns that are summed when cells are combined."""
+        return [self.revenue_col, QUANTITY_COL, ROW_COUNT_COL]
+
+
+def _cube_path(path: str) -> Path:
+    """Location of the cube for a dataset directory or single file."""
+    target = Path(path)
+    if target.is_dir():
+        return target / CUBE_FILE
+    return target.with_name(target.name + CUBE_SUFFIX)
+
+
+def _month_periods(months: pd.Series) -> pd.Series:
+    """Monthly periods of a sale_month column (periods or month keys)."""
+    if isinstance(months.dtype, pd.PeriodDtype):
+        return months
+    if not is_month_key(months):
+        return months.astype("period[M]")
+
+    ordinals = months.to_numpy(dtype="float64", na_value=np.nan)
+    periods = pd.PeriodIndex.from_ordinals(
+        np.where(np.isnan(ordinals), pd.NaT.value, ordinals).astype("int64"),
+        freq="M",
+    )
+    return pd.Series(periods, index=months.index, name=months.name)
+
+
+def _sum_cells(cells: DataFrame, measures: List[str]) -> DataFrame:
+    """Add up cells with the same dimensions (missing values kept)."""
+    return (
+        cells
+        .groupby(list(CUBE_DIMENSIONS), observed=True, sort=False,
+                 dropna=False)[measures]
+        .sum()
+        .reset_index()
+    )
+
+
+def build_cube(df: DataFrame, revenue_col: str) -> RevenueCube:
+    """
+    Aggregate cleaned sales rows into cube cells.
+
+    Works on either dtype mode of clean_data (category/period or Arrow
+    dictionary/month key columns). Rows with a missing dimension keep
+    their own cell, so row counts cover every row.
+    """
+    amounts = df[revenue_col]
+    revenue_dtype = np.int64 \
+        if pd.api.types.is_integer_dtype(amounts.dtype) else np.float64
+
+    frame = DataFrame({
+        "category": df["category"].astype("category"),
+        "region": df["region"].astype("category"),
+        "sale_month": _month_periods(df["sale_month"]),
+        revenue_col: amounts.to_numpy(dtype=revenue_dtype, na_value=0),
+        QUANTITY_COL: df[QUANTITY_COL].to_numpy(
+            dtype=np.int64, na_value=0),
+        ROW_COUNT_COL: np.ones(len(df), dtype=np.int64),
+    })
+
+    measures = [revenue_col, QUANTITY_COL, ROW_COUNT_COL]
+    return RevenueCube(_sum_cells(frame, measures), revenue_col)
+
+
+def write_cube(path: str, cube: RevenueCube) -> None:
+    """
+    Save a cube next to the dataset at path.
+
+    The sizes and modification times of the dataset's files are recorded,
+    so a cube is ignored once the data changes without it. Months are
+    stored as period ordinals.
+    """
+    months = cube.cells.sale_month
+    cells = cube.cells.assign(sale_month=pd.arrays.IntegerArray(
+        months.array.asi8.copy(), mask=months.isna().to_numpy()
+    ))
+    state = {
+        "version": CUBE_FORMAT_VERSION,
+        "revenue_col": cube.revenue_col,
+        "files": dataset_files(path),
+    }
+
+    table = pa.Table.from_pandas(cells, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        CUBE_METADATA_KEY: json.dumps(state).encode(),
+    })
+
+    cube_path = _cube_path(path)
+    temp_path = cube_path.with_suffix(".tmp")
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, cube_path)
+
+
+def read_cube(path: str) -> Optional[RevenueCube]:
+    """Load the dataset's cube, or None if missing or out of date."""
+    cube_path = _cube_path(path)
+
+    if not cube_path.exists():
+        return None
+
+    table = pq.read_table(cube_path)
+    state = json.loads(table.schema.metadata[CUBE_METADATA_KEY])
+
+    if state.get("version") != CUBE_FORMAT_VERSION:
+        return None
+    if state["files"] != dataset_files(path):
+        return None
+
+    cells = table.to_pandas()
+    cells["sale_month"] = _month_periods(cells["sale_month"])
+    return RevenueCube(cells, state["revenue_col"])
+
+
+def whole_months(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Optional[Tuple[Optional[Period], Optional[Period]]]:
+    """
+    First and last month of an inclusive date range, if it is made of
+    whole months (starts on a 1st, ends on a month's last day).
+
+    Open bounds stay None; returns None if the range cuts a month, as the
+    cube cannot answer it.
+    """
+    start_month = end_month = None
+
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        if start != start.normalize() or start.day != 1:
+            return None
+        start_month = start.to_period("M")
+
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        if end.day != end.days_in_month:
+            return None
+        end_month = end.to_period("M")
+
+    return start_month, end_month
+
+
+def cube_slice(
+    cube: RevenueCube,
+    start_month: Optional[Period] = None,
+    end_month: Optional[Period] = None
+) -> RevenueCube:
+    """Cells of a cube within an inclusive range of months."""
+    months = cube.cells.sale_month
+    keep = pd.Series(True, index=cube.cells.index)
+
+    if start_month is not None:
+        keep &= months >= start_month
+    if end_month is not None:
+        keep &= months <= end_month
+
+    return cube._replace(cells=cube.cells[keep])
+
+
+def cube_rollup(
+    cube: RevenueCube,
+    dimensions: Sequence[str],
+    measures: Optional[Sequence[str]] = None
+) -> DataFrame:
+    """
+    Sum measures (default: all) per observed group of dimensions.
+
+    dimensions is any combination of CUBE_DIMENSIONS, e.g. ["region",
+    "sale_month"]. The result is indexed by the dimensions (category and
+    region as categoricals, months as periods); groups with a missing
+    dimension are left out.
+    """
+    if measures is None:
+        measures = cube.measures
+
+    return (
+        cube.cells
+        .groupby(list(dimensions), observed=True)[list(measures)]
+        .sum()
+    )
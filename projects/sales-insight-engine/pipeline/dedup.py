@@ -0,0 +1,374 @@
+# dedup.py
+
+"""
+Streaming De-duplication
+
+Removes duplicate sales records from a raw CSV in bounded memory. A record
+is identified by its product_id, sale_date, region, price and quantity;
+the CSV is read chunk by chunk and each record is reduced to a 64-bit hash
+of those columns, so memory depends on the number of distinct records
+rather than on their width: an 8-byte hash each, or about 11-23 bytes per
+record in the in-memory hash set once it has outgrown its initial table
+(the table is kept between 35% and 70% full):
+
+- In-memory mode keeps the hashes of records seen so far in an
+  open-addressing hash set (a numpy array of uint64 slots) and writes each
+  chunk's new records as soon as it is read.
+- Spill mode (spill_dir) writes the hashes, with row numbers, to one file
+  per hash range, finds the duplicates one partition at a time, then
+  re-reads the CSV to write the records that are kept. Memory is then
+  bounded by the size of one partition.
+
+Both keep the first occurrence of each record, in the original order.
+Records are written back as read (all columns as text). Distinct records
+whose hashes collide would be taken as duplicates; with 64-bit hashes the
+chance is about 1 in 1,000 for 200M distinct records.
+
+Functions:
+    row_hashes: 64-bit hash of the identifying columns of each row
+    drop_duplicate_rows: Remove rows seen before from a frame or chunk
+    dedup_csv: De-duplicate a CSV into a new CSV, chunk by chunk
+
+Classes:
+    HashSet: Growable set of 64-bit hashes with vectorized insertion
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from haashi_pkg.utility import Logger
+
+
+# Configuration: Columns that identify a sales record, and the ones
+# compared as numbers (so "5" and "5.0" are the same quantity)
+DEDUP_COLUMNS = ("product_id", "sale_date", "region", "price", "quantity")
+NUMERIC_DEDUP_COLUMNS = ("price", "quantity")
+
+# Rows per CSV chunk
+DEDUP_CHUNK_ROWS = 1_000_000
+
+# Hash set sizing: initial slots and the fill ratio that triggers doubling
+HASH_SET_INITIAL_SLOTS = 2 ** 20
+HASH_SET_MAX_LOAD = 0.7
+
+# Spill mode: number of hash-range partitions written to disk
+SPILL_PARTITIONS = 64
+
+# Hash and row number of a record, as spilled to disk
+_SPILL_DTYPE = np.dtype([("hash", np.uint64), ("row", np.int64)])
+
+
+class DedupResult(NamedTuple):
+    """Rows read from the input and duplicate rows removed."""
+    rows_read: int
+    rows_removed: int
+
+
+class HashSet:
+    """
+    Set of 64-bit hashes in a numpy array, with linear probing.
+
+    Slot value 0 marks an empty slot, so a hash of 0 is stored as 1. The
+    table doubles once it is HASH_SET_MAX_LOAD full.
+    """
+
+    def __init__(self, slots: int = HASH_SET_INITIAL_SLOTS) -> None:
+        self._slots = np.zeros(1 << max(slots - 1, 1).bit_length(),
+                               dtype=np.uint64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the table."""
+        return self._slots.nbytes
+
+    def _insert(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Insert distinct non-zero keys; True where a key was not present.
+
+        All keys probe at once: each round, keys that find themselves are
+        done, keys that find an empty slot claim it (one per slot), and the
+        rest move to the next slot.
+        """
+        mask = np.uint64(len(self._slots) - 1)
+        slots = keys & mask
+        is_new = np.zeros(len(keys), dtype=bool)
+        pending = np.arange(len(keys))
+
+        while len(pending):
+            current = self._slots[slots[pending]]
+            found = current == keys[pending]
+            empty = current == 0
+
+            claimants = pending[empty]
+            _, first = np.unique(slots[claimants], return_index=True)
+            winners = claimants[first]
+            self._slots[slots[winners]] = keys[winners]
+            is_new[winners] = True
+
+            moving = ~found
+            moving[np.flatnonzero(empty)[first]] = False
+            pending = pending[moving]
+            slots[pending] = (slots[pending] + np.uint64(1)) & mask
+
+        self._size += int(is_new.sum())
+        return is_new
+
+    def _grow(self, needed: int) -> None:
+        """Double the table until needed keys fit under the max load."""
+        size = len(self._slots)
+        while needed > size * HASH_SET_MAX_LOAD:
+            size *= 2
+        if size == len(self._slots):
+            return
+
+        keys = self._slots[self._slots != 0]
+        self._slots = np.zeros(size, dtype=np.uint64)
+        self._size = 0
+        self._insert(keys)
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Add hashes; True for each one not seen before.
+
+        A hash repeated within hashes is new only at its first position.
+        """
+        hashes = np.where(hashes == 0, np.uint64(1), hashes)
+        keys, first = np.unique(hashes, return_index=True)
+        self._grow(self._size + len(keys))
+
+        is_new = np.zeros(len(hashes), dtype=bool)
+        is_new[first[self._insert(keys)]] = True
+        return is_new
+
+
+def row_hashes(
+    df: DataFrame,
+    columns: Sequence[str] = DEDUP_COLUMNS
+) -> np.ndarray:
+    """
+    64-bit hash of the identifying columns of each row.
+
+    NUMERIC_DEDUP_COLUMNS are hashed as float64 numbers and the others as
+    text, so hashes do not depend on the dtypes a chunk was read with.
+    """
+    keys = DataFrame({
+        col: pd.to_numeric(df[col], errors="coerce").astype("float64")
+        if col in NUMERIC_DEDUP_COLUMNS else df[col].astype("string")
+        for col in columns
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def drop_duplicate_rows(
+    df: DataFrame,
+    hash_set: Optional[HashSet] = None,
+    columns: Sequence[str] = DEDUP_COLUMNS
+) -> Tuple[DataFrame, int]:
+    """
+    Remove rows already in hash_set (or earlier in df), adding the rest.
+
+    Pass the same hash_set for every chunk of a dataset to de-duplicate
+    across chunks. Returns the kept rows and the number removed.
+    """
+    if hash_set is None:
+        hash_set = HashSet()
+
+    is_new = hash_set.add(row_hashes(df, columns))
+    return df[is_new], int(len(df) - is_new.sum())
+
+
+def _read_chunks(filepath: str, chunk_rows: int) -> Iterator[DataFrame]:
+    """Read a CSV in chunks with every column as text, as written."""
+    return pd.read_csv(
+        filepath, dtype=str, keep_default_na=False, na_values=[""],
+        chunksize=chunk_rows
+    )
+
+
+def _write_chunk(chunk: DataFrame, savepath: str, first: bool) -> None:
+    """Write (first chunk) or append a chunk to the output CSV."""
+    chunk.to_csv(
+        savepath, mode="w" if first else "a", header=first, index=False
+    )
+
+
+def _dedup_in_memory(
+    filepath: str,
+    temp_path: str,
+    columns: Sequence[str],
+    chunk_rows: int,
+    logger: Logger
+) -> DedupResult:
+    """One pass: keep new rows of each chunk using a hash set."""
+    hash_set = HashSet()
+    rows_read = rows_removed = 0
+
+    for index, chunk in enumerate(_read_chunks(filepath, chunk_rows)):
+        kept, removed = drop_duplicate_rows(chunk, hash_set, columns)
+        _write_chunk(kept, temp_path, first=index == 0)
+        rows_read += len(chunk)
+        rows_removed += removed
+
+    logger.debug(
+        f"Hash set: {len(hash_set):,} distinct records in "
+        f"{hash_set.nbytes / 2**20:.0f} MB "
+        f"({hash_set.nbytes / max(len(hash_set), 1):.1f} bytes each)"
+    )
+    return DedupResult(rows_read, rows_removed)
+
+
+def _duplicate_rows(
+    filepath: str,
+    spill_dir: str,
+    columns: Sequence[str],
+    chunk_rows: int
+) -> Tuple[int, np.ndarray]:
+    """
+    Row count and sorted numbers of duplicate rows, found one hash-range
+    partition at a time.
+    """
+    # The top bits of a hash choose its partition
+    shift = np.uint64(64 - max(SPILL_PARTITIONS - 1, 1).bit_length())
+    paths = [
+        os.path.join(spill_dir, f"hashes-{part:04d}.bin")
+        for part in range(SPILL_PARTITIONS)
+    ]
+    files = [open(path, "wb") for path in paths]
+    rows_read = 0
+
+    try:
+        for chunk in _read_chunks(filepath, chunk_rows):
+            records = np.empty(len(chunk), dtype=_SPILL_DTYPE)
+            records["hash"] = row_hashes(chunk, columns)
+            records["row"] = np.arange(rows_read, rows_read + len(chunk))
+            rows_read += len(chunk)
+
+            parts = (records["hash"] >> shift).astype(np.int64)
+            order = np.argsort(parts, kind="stable")
+            bounds = np.searchsorted(
+                parts[order], np.arange(SPILL_PARTITIONS + 1))
+            for part in range(SPILL_PARTITIONS):
+                part_records = records[order[bounds[part]:bounds[part + 1]]]
+                if len(part_records):
+                    files[part].write(part_records.tobytes())
+    finally:
+        for file in files:
+            file.close()
+
+    duplicates: List[np.ndarray] = []
+    for path in paths:
+        records = np.fromfile(path, dtype=_SPILL_DTYPE)
+        os.remove(path)
+
+        # Equal hashes end up adjacent, first occurrence first
+        records = records[np.lexsort((records["row"], records["hash"]))]
+        repeated = records["hash"][1:] == records["hash"][:-1]
+        duplicates.append(records["row"][1:][repeated])
+
+    return rows_read, np.sort(np.concatenate(duplicates))
+
+
+def _dedup_spilled(
+    filepath: str,
+    temp_path: str,
+    spill_dir: str,
+    columns: Sequence[str],
+    chunk_rows: int
+) -> DedupResult:
+    """Two passes: find duplicates via partitions on disk, then filter."""
+    work_dir = tempfile.mkdtemp(prefix="dedup-", dir=spill_dir)
+
+    try:
+        rows_read, duplicates = _duplicate_rows(
+            filepath, work_dir, columns, chunk_rows)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    start = 0
+    for index, chunk in enumerate(_read_chunks(filepath, chunk_rows)):
+        stop = start + len(chunk)
+        low, high = np.searchsorted(duplicates, [start, stop])
+
+        keep = np.ones(len(chunk), dtype=bool)
+        keep[duplicates[low:high] - start] = False
+        _write_chunk(chunk[keep], temp_path, first=index == 0)
+        start = stop
+
+    return DedupResult(rows_read, len(duplicates))
+
+
+def dedup_csv(
+    filepath: str = "data/retail_sales.csv",
+    savepath: str = "data/deduplicated_retail_sales.csv",
+    logger: Optional[Logger] = None,
+    columns: Sequence[str] = DEDUP_COLUMNS,
+    chunk_rows: int = DEDUP_CHUNK_ROWS,
+    spill_dir: Optional[str] = None
+) -> DedupResult:
+    """
+    Remove duplicate records from a CSV, keeping first occurrences.
+
+    The CSV is read in chunks of chunk_rows rows. By default the hashes of
+    distinct records are kept in memory (about 11-23 bytes per distinct
+    record on large inputs; the actual figure is logged at debug level).
+    With spill_dir they are partitioned to files under that directory
+    instead and the CSV is read twice, so memory stays bounded for inputs
+    with more distinct records than fit in memory.
+
+    The output is written next to savepath and renamed into place once
+    complete. Returns the number of rows read and removed.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    logger.info(f"De-duplicating {filepath}")
+    temp_path = f"{savepath}.tmp"
+    os.makedirs(os.path.dirname(savepath) or ".", exist_ok=True)
+
+    if spill_dir is None:
+        result = _dedup_in_memory(
+            filepath, temp_path, columns, chunk_rows, logger)
+    else:
+        os.makedirs(spill_dir, exist_ok=True)
+        logger.debug(f"Spilling hash partitions to {spill_dir}")
+        result = _dedup_spilled(
+            filepath, temp_path, spill_dir, columns, chunk_rows)
+
+    os.replace(temp_path, savepath)
+
+    logger.info(
+        f"Removed {result.rows_removed:,} duplicate rows of "
+        f"{result.rows_read:,}"
+    )
+    return result
+
+
+def main() -> None:
+    """Run de-duplication as standalone script."""
+    logger = Logger(level=logging.INFO)
+
+    try:
+        dedup_csv(logger=logger)
+
+    except KeyboardInterrupt:
+        logger.info("\nProcess interrupted by user")
+        sys.exit(0)
+
+    except Exception as e:
+        logger.error(exception=e, save_to_json=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# generate_data.py
+
+"""
+Synthetic Retail Sales
+
+Seeded generator of raw retail sales with the schema of
+data/retail_sales.csv (product_id, category, price, quantity, sale_date,
+region) and its defects at configurable rates: missing categories and
+regions, non-positive prices and quantities, and repeated records. It is
+meant for measuring the pipeline at production scale (10M-1B rows).
+
+Rows are generated in chunks, each from its own seed (the base seed and
+the chunk number), with numpy arrays turned straight into Arrow columns,
+and written with pyarrow's CSV and Parquet writers. The same seed, row
+count and chunk size always give the same data, however many worker
+processes generate and format the chunks.
+
+Functions:
+    generate_chunk: One chunk of raw sales as an Arrow table
+    iter_chunks: Raw sales as a sequence of Arrow tables
+    write_sales_csv: Write raw sales to one CSV, chunk by chunk
+    write_sales_parquet_parts: Write raw sales as a directory of Parquet parts
+"""
+
+import os
+import sys
+import glob
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from haashi_pkg.utility import Logger
+
+
+# Values of the synthetic data (those of the source CSV)
+CATEGORIES = (
+    "Beauty", "Clothing", "Electronics", "Furniture",
+    "Groceries", "Sports", "Toys",
+)
+REGIONS = ("Central", "East", "North", "South", "West")
+PRODUCT_IDS = tuple(f"P{number}" for number in range(100, 1000))
+
+# Configuration: Rows per generated chunk (and per Parquet part)
+GENERATE_CHUNK_ROWS = 5_000_000
+
+# Plain CSV like the source (no value needs quoting), converted in large
+# batches; chunks after the first have no header
+CSV_WRITE_OPTIONS = pacsv.WriteOptions(
+    batch_size=65_536, quoting_style="none", quoting_header="none")
+CSV_BODY_OPTIONS = pacsv.WriteOptions(
+    include_header=False, batch_size=65_536, quoting_style="none")
+
+
+class SalesProfile(NamedTuple):
+    """
+    Shape of the synthetic sales, including defect rates (shares of rows).
+
+    Invalid rows get a zero price and quantity (as in the source CSV), a
+    negative price or a non-positive quantity, in equal shares. Duplicates
+    repeat an earlier row of the same chunk.
+    """
+    missing_category_rate: float = 0.02
+    missing_region_rate: float = 0.05
+    invalid_rate: float = 0.04
+    duplicate_rate: float = 0.01
+    start_date: str = "2023-11-29"
+    num_days: int = 730
+    min_price: float = 5.0
+    max_price: float = 500.0
+    max_quantity: int = 20
+
+
+# Defaults follow the rates observed in data/retail_sales.csv
+DEFAULT_PROFILE = SalesProfile()
+
+
+def _labels(
+    values: tuple,
+    codes: np.ndarray,
+    missing: Optional[np.ndarray] = None
+) -> pa.Array:
+    """Text column from codes into values (null where missing)."""
+    indices = pa.array(codes.astype(np.int32), mask=missing)
+    return pa.array(values, type=pa.string()).take(indices)
+
+
+def generate_chunk(
+    num_rows: int,
+    seed: int = 42,
+    chunk_index: int = 0,
+    profile: SalesProfile = DEFAULT_PROFILE
+) -> pa.Table:
+    """One chunk of raw sales, reproducible from (seed, chunk_index)."""
+    rng = np.random.default_rng([seed, chunk_index])
+
+    product = rng.integers(0, len(PRODUCT_IDS), num_rows)
+    category = rng.integers(0, len(CATEGORIES), num_rows)
+    region = rng.integers(0, len(REGIONS), num_rows)
+    price = np.round(
+        rng.uniform(profile.min_price, profile.max_price, num_rows), 2)
+    quantity = rng.integers(1, profile.max_quantity + 1, num_rows)
+    days = (
+        np.datetime64(profile.start_date, "D").astype(np.int64)
+        + rng.integers(0, profile.num_days, num_rows)
+    ).astype(np.int32)
+
+    # Non-positive prices and quantities, in three kinds
+    invalid = np.flatnonzero(rng.random(num_rows) < profile.invalid_rate)
+    kind = rng.integers(0, 3, len(invalid))
+    price[invalid[kind == 0]] = 0.0
+    quantity[invalid[kind == 0]] = 0
+    price[invalid[kind == 1]] *= -1
+    quantity[invalid[kind == 2]] = -rng.integers(
+        0, profile.max_quantity, int((kind == 2).sum()))
+
+    # Duplicates copy a random earlier row of the chunk
+    rows = np.arange(num_rows)
+    repeated = np.flatnonzero(rng.random(num_rows) < profile.duplicate_rate)
+    repeated = repeated[repeated > 0]
+    rows[repeated] = (rng.random(len(repeated)) * repeated).astype(np.int64)
+
+    missing_category = rng.random(num_rows) < profile.missing_category_rate
+    missing_region = rng.random(num_rows) < profile.missing_region_rate
+
+    return pa.table({
+        "product_id": _labels(PRODUCT_IDS, product[rows]),
+        "category": _labels(
+            CATEGORIES, category[rows], missing_category[rows]),
+        "price": pa.array(price[rows]),
+        "quantity": pa.array(quantity[rows]),
+        "sale_date": pa.array(days[rows], type=pa.int32()).cast(pa.date32()),
+        "region": _labels(REGIONS, region[rows], missing_region[rows]),
+    })
+
+
+def _map_chunks(
+    func: Callable[..., Any],
+    num_rows: int,
+    chunk_rows: int,
+    workers: int,
+    *args: Any
+) -> Iterator[Any]:
+    """
+    func(chunk rows, chunk_index, *args) for every chunk, in chunk order.
+
+    With workers > 1 chunks are processed on a process pool, with at most
+    two chunks per worker in flight so finished chunks do not pile up.
+    """
+    chunks = [
+        (min(chunk_rows, num_rows - start), chunk_index)
+        for chunk_index, start in enumerate(range(0, num_rows, chunk_rows))
+    ]
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(*chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(func, *chunk, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _generate(
+    num_rows: int,
+    chunk_index: int,
+    seed: int,
+    profile: SalesProfile
+) -> pa.Table:
+    """generate_chunk() in the argument order of _map_chunks()."""
+    return generate_chunk(num_rows, seed, chunk_index, profile)
+
+
+def _csv_chunk(
+    num_rows: int,
+    chunk_index: int,
+    seed: int,
+    profile: SalesProfile
+) -> pa.Buffer:
+    """One chunk formatted as CSV (with the header for the first)."""
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(
+        generate_chunk(num_rows, seed, chunk_index, profile), sink,
+        CSV_WRITE_OPTIONS if chunk_index == 0 else CSV_BODY_OPTIONS
+    )
+    return sink.getvalue()
+
+
+def _parquet_part(
+    num_rows: int,
+    chunk_index: int,
+    seed: int,
+    profile: SalesProfile,
+    directory: str
+) -> None:
+    """Generate one chunk and write it as a Parquet part."""
+    part_path = os.path.join(directory, f"part-{chunk_index:05d}.parquet")
+    pq.write_table(
+        generate_chunk(num_rows, seed, chunk_index, profile),
+        f"{part_path}.tmp", compression="zstd"
+    )
+    os.replace(f"{part_path}.tmp", part_path)
+
+
+def iter_chunks(
+    num_rows: int,
+    seed: int = 42,
+    chunk_rows: int = GENERATE_CHUNK_ROWS,
+    profile: SalesProfile = DEFAULT_PROFILE
+) -> Iterator[pa.Table]:
+    """Raw sales as tables of at most chunk_rows rows."""
+    return _map_chunks(_generate, num_rows, chunk_rows, 1, seed, profile)
+
+
+def write_sales_csv(
+    path: str,
+    num_rows: int,
+    seed: int = 42,
+    chunk_rows: int = GENERATE_CHUNK_ROWS,
+    profile: SalesProfile = DEFAULT_PROFILE,
+    workers: int = 1
+) -> None:
+    """
+    Write raw sales to one CSV like data/retail_sales.csv, chunk by chunk.
+
+    Missing values are empty fields. With workers > 1, chunks are generated
+    and formatted on that many processes and appended in order, so the
+    writer is limited by the disk rather than by CSV formatting. The file
+    is written next to path and renamed into place once complete.
+    """
+    temp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(temp_path, "wb") as sink:
+        for chunk in _map_chunks(
+            _csv_chunk, num_rows, chunk_rows, workers, seed, profile
+        ):
+            sink.write(chunk)
+
+    os.replace(temp_path, path)
+
+
+def write_sales_parquet_parts(
+    directory: str,
+    num_rows: int,
+    seed: int = 42,
+    chunk_rows: int = GENERATE_CHUNK_ROWS,
+    profile: SalesProfile = DEFAULT_PROFILE,
+    workers: int = 1,
+    logger: Optional[Logger] = None
+) -> None:
+    """
+    Write raw sales as a directory of Parquet files, one per chunk
+    (part-00000.parquet, ...), readable as one pyarrow dataset. With
+    workers > 1 the parts are generated and written by that many
+    processes. Parts left by an earlier run are removed first.
+    """
+    if logger is None:
+        logger = Logger(level=logging.INFO)
+
+    os.makedirs(directory, exist_ok=True)
+
+    for stale in glob.glob(os.path.join(directory, "part-*.parquet")):
+        logger.debug(f"Removing stale part {stale}")
+        os.remove(stale)
+
+    for _ in _map_chunks(
+        _parquet_part, num_rows, chunk_rows, workers, seed, profile,
+        directory
+    ):
+        pass
+
+
+def main() -> None:
+    """
+    Generate data as standalone script.
+
+    Usage: generate_data.py rows [csv|parquet] [path]
+    (one worker process per CPU)
+    """
+    logger = Logger(level=logging.INFO)
+
+    try:
+        num_rows = int(sys.argv[1])
+        output = sys.argv[2] if len(sys.argv) > 2 else "csv"
+        workers = os.cpu_count() or 1
+
+        if output == "parquet":
+            path = sys.argv[3] if len(sys.argv) > 3 \
+                else "data/synthetic_retail_sales"
+            write_sales_parquet_parts(
+                path, num_rows, workers=workers, logger=logger)
+        else:
+            path = sys.argv[3] if len(sys.argv) > 3 \
+                else "data/synthetic_retail_sales.csv"
+            write_sales_csv(path, num_rows, workers=workers)
+
+        logger.info(f"Wrote {num_rows:,} synthetic rows to {path}")
+
+    except KeyboardInterrupt:
+        logger.info("\nProcess interrupted by user")
+        sys.exit(0)
+
+    except Exception as e:
+        logger.error(exception=e, save_to_json=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# growth.py
+
+"""
+Monthly Growth Metrics
+
+Time-series metrics of the monthly revenue series: month-over-month and
+year-over-year change, rolling 3/6/12-month sums and cumulative revenue.
+The series is put on a dense month index (months without sales count as
+zero revenue) and every metric comes from one pass of numpy array
+arithmetic over it: lagged ratios for the changes, differences of a
+running sum for the rolling windows.
+
+Functions:
+    dense_months: Put monthly totals on a gap-free month index
+    growth_metrics: All growth metrics of a monthly revenue series
+    amount_columns: Metric columns that hold revenue amounts
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+
+# Configuration: Rolling windows in months, and the year-over-year lag
+ROLLING_WINDOWS = (3, 6, 12)
+YOY_LAG = 12
+
+# Column holding the monthly revenue in growth frames
+REVENUE_COL = "total_revenue"
+
+
+def _rolling_col(window: int) -> str:
+    """Name of the rolling sum column of a window."""
+    return f"rolling_{window}m_revenue"
+
+
+def amount_columns(windows: Sequence[int] = ROLLING_WINDOWS) -> List[str]:
+    """Metric columns in revenue units (the rest are ratios)."""
+    return (
+        [REVENUE_COL]
+        + [_rolling_col(window) for window in windows]
+        + ["cumulative_revenue"]
+    )
+
+
+def dense_months(totals: Series) -> Series:
+    """
+    Monthly totals on every month from the first to the last, with zero
+    revenue for months without sales.
+
+    totals is indexed by monthly periods; the result is sorted by month.
+    """
+    if not len(totals):
+        return totals.sort_index()
+
+    months = pd.period_range(
+        totals.index.min(), totals.index.max(), freq="M",
+        name=totals.index.name
+    )
+    return totals.reindex(months, fill_value=0)
+
+
+def _change(revenue: np.ndarray, lag: int) -> np.ndarray:
+    """Relative change from lag months earlier (NaN before that)."""
+    change = np.full(len(revenue), np.nan)
+    if len(revenue) > lag:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change[lag:] = revenue[lag:] / revenue[:-lag] - 1
+    return change
+
+
+def _metrics(
+    revenue: np.ndarray,
+    windows: Sequence[int]
+) -> Dict[str, np.ndarray]:
+    """
+    Growth metrics of consecutive months of revenue.
+
+    Integer (fixed-point) revenue keeps exact sums.
+    """
+    running = np.concatenate(([0], np.cumsum(revenue)))
+    as_float = revenue.astype(np.float64)
+
+    metrics = {
+        REVENUE_COL: revenue,
+        "revenue_pct_change": _change(as_float, 1),
+        "revenue_yoy_change": _change(as_float, YOY_LAG),
+    }
+
+    # A window's sum is the difference of the running sum at its two ends
+    for window in windows:
+        rolling = np.full(len(revenue), np.nan)
+        if len(revenue) >= window:
+            rolling[window - 1:] = running[window:] - running[:-window]
+        metrics[_rolling_col(window)] = rolling
+
+    metrics["cumulative_revenue"] = running[1:]
+    return metrics
+
+
+def _growth_frame(dense: Series, windows: Sequence[int]) -> DataFrame:
+    """Growth frame of a dense monthly series."""
+    metrics = _metrics(dense.to_numpy(), windows)
+
+    growth = DataFrame({dense.index.name or "sale_month": dense.index})
+    for col, values in metrics.items():
+        growth[col] = values
+
+    growth["revenue_pct_change_pct"] = growth.revenue_pct_change * 100
+    growth["revenue_yoy_change_pct"] = growth.revenue_yoy_change * 100
+    return growth
+
+
+def growth_metrics(
+    totals: Series,
+    windows: Sequence[int] = ROLLING_WINDOWS
+) -> DataFrame:
+    """
+    Growth metrics of monthly revenue totals (indexed by monthly period).
+
+    One row per month from the first to the last (zero revenue for months
+    without sales) with total_revenue, month-over-month change
+    (revenue_pct_change; 0 for the first month), year-over-year change
+    (revenue_yoy_change; NaN for the first twelve months), both also in
+    percent (*_pct), rolling sums per window (rolling_<n>m_revenue; NaN
+    until a full window) and cumulative_revenue.
+    """
+    growth = _growth_frame(dense_months(totals), windows)
+
+    if len(growth):
+        growth.loc[0, ["revenue_pct_change", "revenue_pct_change_pct"]] = 0
+    return growth
+
@@ -3,15 +3,31 @@
 # main.py
 
 
-"""Retail Sales Analysis Pipeline - Main entry point."""
+"""
+Retail Sales Analysis Pipeline - Main entry point.
+
+Steps whose inputs and code are unchanged since their last successful run
+are skipped; pass -f/--force to re-run everything.
+"""
 
 import sys
 import logging
 from haashi_pkg.utility import Logger
+import shared_path  # noqa: F401
+from background import wait_for_saves
 from clean_data import clean_data
+from dedup import dedup_csv
+from stages import Stage, StageRunner
 from visualize_data import visualize_data
 
 
+# Stage inputs and outputs (the modules' default paths)
+RAW_PATH = "data/retail_sales.csv"
+DEDUPED_PATH = "data/deduplicated_retail_sales.csv"
+CLEANED_PATH = "data/cleaned_retail_sales.parquet"
+PLOT_PATH = "data/plots/retail_sales_plots.png"
+
+
 def parse_args() -> int:
     """Parse command line args for logging level."""
     if len(sys.argv) > 1:
@@ -20,6 +36,11 @@ def parse_args() -> int:
     return logging.INFO
 
 
+def parse_force() -> bool:
+    """Return True if every step should re-run (-f or --force)."""
+    return "-f" in sys.argv or "--force" in sys.argv
+
+
 def main() -> None:
     """Run the retail sales analysis pipeline."""
     log_level = parse_args()
@@ -30,21 +51,63 @@ def main() -> None:
     logger.info("=" * 60)
 
     try:
-        # Step 1: Clean data
-        logger.info("\n[Step 1/2] Cleaning retail sales data...")
-        clean_data(logger=logger)
-        logger.info("✓ Data cleaning completed")
-
-        # Step 2: Visualize
-        logger.info("\n[Step 2/2] Creating visualization dashboard...")
-        visualize_data(logger=logger)
-        logger.info("✓ Visualization completed")
+        runner = StageRunner(force=parse_force(), logger=logger)
+
+        # Step 1: Remove duplicate records (streamed, bounded memory)
+        logger.info("\n[Step 1/3] Removing duplicate records...")
+        ran, _ = runner.run(Stage(
+            name="dedup",
+            func=lambda: dedup_csv(RAW_PATH, DEDUPED_PATH, logger=logger),
+            inputs=[RAW_PATH],
+            outputs=[DEDUPED_PATH],
+            code=["dedup"],
+        ))
+        if ran:
+            logger.info("✓ De-duplication completed")
+
+        # Step 2: Clean data
+        logger.info("\n[Step 2/3] Cleaning retail sales data...")
+        ran, cleaned_df = runner.run(Stage(
+            name="clean",
+            func=lambda: clean_data(
+                DEDUPED_PATH, logger=logger, can_return=True,
+                background_save=True),
+            inputs=[DEDUPED_PATH],
+            outputs=[CLEANED_PATH],
+            code=["clean_data"],
+        ))
+        if ran:
+            logger.info("✓ Data cleaning completed")
+
+        # Step 3: Visualize (cleaned data handed over in memory when step 2
+        # ran). The frame is handed over without keeping a reference here,
+        # so it can be freed once analyzed, before the figure is drawn.
+        handoff = {"sales_df": cleaned_df}
+        del cleaned_df
+
+        logger.info("\n[Step 3/3] Creating visualization dashboard...")
+        ran, _ = runner.run(Stage(
+            name="visualize",
+            func=lambda: visualize_data(
+                logger=logger, sales_df=handoff.pop("sales_df")),
+            inputs=[CLEANED_PATH],
+            outputs=[PLOT_PATH],
+            code=["visualize_data"],
+        ))
+        if ran:
+            logger.info("✓ Visualization completed")
+
+        # Make sure the cleaned data finished writing, then record the
+        # fingerprints of the steps that ran
+        wait_for_saves()
+        runner.commit()
 
         # Success
         logger.info("\n" + "=" * 60)
         logger.info("Pipeline completed successfully!")
         logger.info("=" * 60)
         logger.info("Outputs:")
+        logger.info(f"  • De-duplicated data: {DEDUPED_PATH}")
         logger.info("  • Cleaned data: data/cleaned_retail_sales.parquet")
         logger.info("  • Dashboard: data/plots/retail_sales_plots.png")
 
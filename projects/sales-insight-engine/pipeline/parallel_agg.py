@@ -0,0 +1,294 @@
+# parallel_agg.py
+
+"""
+Parallel Revenue Rollups
+
+Computes the revenue rollups of analyze_data (by category, region and
+month) on a pool of processes, without pickling rows:
+
+- For a frame already in memory, each dimension is reduced to integer
+  group keys (categorical codes and period ordinals as they are; other
+  columns factorized), and the keys and revenue are written once as an
+  Arrow IPC file in shared memory. Workers memory-map that file, turn
+  their row shards' keys into group codes and sum revenue per code with
+  np.bincount.
+- For a cleaned Parquet file, the shards are its row groups: each worker
+  streams its own row groups from the file (see rollups.stream_rollups),
+  so the parent does no per-row work at all.
+
+Only the small per-group results travel back to be added up.
+
+Functions:
+    encode_groups: Integer group keys and labels of a dimension column
+    shard_bounds: Split a row count into contiguous shards
+    sum_shard: Revenue and row counts per group of one shard (worker side)
+    parallel_rollups: Revenue sums per group of an in-memory frame
+    parallel_file_rollups: Revenue sums per group of a Parquet file
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas import DataFrame, Index, Series
+from rollups import (
+    ROLLUP_DIMENSIONS,
+    RevenueRollups,
+    merge_rollups,
+    stream_rollups,
+)
+from storage import parquet_row_groups
+
+
+# Configuration: Where the shared Arrow IPC file is written (RAM-backed
+# where available), and shards per worker (several, so a slow shard does
+# not leave other workers idle)
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") \
+    else tempfile.gettempdir()
+SHARDS_PER_WORKER = 4
+
+# Sums of integer amounts below this bound are exact in float64
+FLOAT_EXACT_LIMIT = 2 ** 53
+
+# Table mapped by each worker process (set by _attach)
+_shared_table: Optional[pa.Table] = None
+
+
+class GroupKeys(NamedTuple):
+    """
+    Integer keys of a dimension: key - offset is the group code of a row,
+    and keys outside [offset, offset + len(labels)) mark missing values.
+    """
+    keys: np.ndarray
+    offset: int
+    labels: Index
+    has_missing: bool
+
+
+def encode_groups(values: Series) -> GroupKeys:
+    """
+    Integer group keys of a dimension column, cheapest encoding first.
+
+    Categorical codes and period ordinals are used as they are (no hashing
+    or copying in the parent); other columns, Arrow dictionaries included,
+    are factorized.
+    """
+    dtype = values.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        labels = pd.CategoricalIndex(
+            dtype.categories, dtype=dtype, name=values.name)
+        return GroupKeys(
+            codes, 0, labels, bool(len(codes) and codes.min() < 0))
+
+    if isinstance(dtype, pd.PeriodDtype):
+        missing = values.isna().to_numpy()
+        has_missing = bool(missing.any())
+        ordinals = values.array.asi8
+        present = ordinals[~missing] if has_missing else ordinals
+        first = int(present.min()) if len(present) else 0
+        last = int(present.max()) if len(present) else -1
+        labels = pd.PeriodIndex.from_ordinals(
+            np.arange(first, last + 1), freq=dtype.freq).rename(values.name)
+        return GroupKeys(ordinals, first, labels, has_missing)
+
+    codes, uniques = pd.factorize(values)
+    return GroupKeys(
+        codes, 0, Index(uniques, name=values.name),
+        bool(len(codes) and codes.min() < 0))
+
+
+def shard_bounds(num_rows: int, num_shards: int) -> List[Tuple[int, int]]:
+    """Split num_rows into at most num_shards contiguous (start, stop)."""
+    edges = np.linspace(0, num_rows, max(num_shards, 1) + 1).astype(int)
+    return [
+        (int(start), int(stop))
+        for start, stop in zip(edges[:-1], edges[1:]) if stop > start
+    ]
+
+
+def _attach(path: str) -> None:
+    """Worker initializer: memory-map the shared Arrow IPC file."""
+    global _shared_table
+    _shared_table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def _sum_codes(
+    codes: np.ndarray,
+    amounts: np.ndarray,
+    num_bins: int
+) -> np.ndarray:
+    """Sum amounts per group code; integer amounts are summed exactly."""
+    if amounts.dtype.kind != "i":
+        return np.bincount(codes, weights=amounts, minlength=num_bins)
+
+    # bincount sums in float64, exact only while totals stay below 2**53
+    largest = int(np.abs(amounts).max()) if len(amounts) else 0
+    if largest * len(amounts) < FLOAT_EXACT_LIMIT:
+        return np.bincount(
+            codes, weights=amounts, minlength=num_bins).astype(np.int64)
+
+    totals = np.zeros(num_bins, dtype=np.int64)
+    np.add.at(totals, codes, amounts)
+    return totals
+
+
+def sum_shard(
+    start: int,
+    stop: int,
+    groups: Dict[str, Tuple[int, int, bool]],
+    target_col: str
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Revenue sums and row counts per group code of rows [start, stop).
+
+    groups maps each dimension to (offset, number of labels, has missing).
+    Runs in a worker; the rows are zero-copy slices of the memory-mapped
+    table. Missing values are counted in one extra bin after the labels.
+    """
+    shard = _shared_table.slice(start, stop - start)
+    amounts = shard.column(target_col).to_numpy()
+
+    partials = {}
+    for dim, (offset, num_labels, has_missing) in groups.items():
+        codes = shard.column(dim).to_numpy()
+        if offset:
+            codes = codes - offset
+        if has_missing:
+            codes = np.where(
+                (codes < 0) | (codes >= num_labels), num_labels, codes)
+
+        rows = np.bincount(codes, minlength=num_labels + 1)
+        partials[dim] = (
+            _sum_codes(codes, amounts, num_labels + 1), rows
+        )
+
+    return partials
+
+
+def parallel_rollups(
+    df: DataFrame,
+    target_col: str,
+    dimensions: Sequence[str] = ROLLUP_DIMENSIONS,
+    workers: Optional[int] = None,
+    shards_per_worker: int = SHARDS_PER_WORKER
+) -> Dict[str, Series]:
+    """
+    Sum target_col per observed group of each dimension on a process pool.
+
+    Returns one Series per dimension, indexed by group in the dimension's
+    dtype and sums in the dtype of target_col, as rollups.stream_rollups()
+    does. Integer (fixed-point) sums are exact. Missing amounts count as
+    zero.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    encoded = {dim: encode_groups(df[dim]) for dim in dimensions}
+    columns = {dim: encoded[dim].keys for dim in dimensions}
+
+    amounts = df[target_col]
+    if pd.api.types.is_integer_dtype(amounts.dtype):
+        columns[target_col] = amounts.to_numpy(dtype=np.int64, na_value=0)
+    else:
+        columns[target_col] = amounts.to_numpy(
+            dtype=np.float64, na_value=0.0)
+
+    groups = {
+        dim: (group.offset, len(group.labels), group.has_missing)
+        for dim, group in encoded.items()
+    }
+    totals = {
+        dim: np.zeros(len(group.labels) + 1, dtype=columns[target_col].dtype)
+        for dim, group in encoded.items()
+    }
+    rows = {
+        dim: np.zeros(len(group.labels) + 1, dtype=np.int64)
+        for dim, group in encoded.items()
+    }
+
+    handle, path = tempfile.mkstemp(suffix=".arrow", dir=SHARED_MEMORY_DIR)
+    os.close(handle)
+
+    try:
+        table = pa.table(columns)
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        del table, columns
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_attach, initargs=(path,)
+        ) as pool:
+            futures = [
+                pool.submit(sum_shard, start, stop, groups, target_col)
+                for start, stop in shard_bounds(
+                    len(df), workers * shards_per_worker)
+            ]
+            for future in futures:
+                for dim, (shard_totals, shard_rows) in future.result().items():
+                    totals[dim] += shard_totals.astype(totals[dim].dtype)
+                    rows[dim] += shard_rows
+    finally:
+        os.remove(path)
+
+    # The last bin holds rows with a missing group
+    results = {}
+    for dim, group in encoded.items():
+        observed = rows[dim][:-1] > 0
+        results[dim] = Series(
+            totals[dim][:-1][observed],
+            index=group.labels[observed],
+            name=target_col,
+        ).astype(amounts.dtype)
+    return results
+
+
+def parallel_file_rollups(
+    path: str,
+    target_col: str,
+    dimensions: Sequence[str] = ROLLUP_DIMENSIONS,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    date_col: str = "sale_date",
+    workers: Optional[int] = None,
+    shards_per_worker: int = SHARDS_PER_WORKER
+) -> RevenueRollups:
+    """
+    Sum target_col per group of each dimension of a Parquet file, with the
+    row groups split between worker processes.
+
+    Each worker streams its row groups out of core, so memory per worker
+    is bounded by the batch size. Results are the same as
+    rollups.stream_rollups() over the whole file.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    shards = [
+        shard.tolist() for shard in np.array_split(
+            np.arange(parquet_row_groups(path)), workers * shards_per_worker)
+        if len(shard)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                stream_rollups, path, target_col, dimensions,
+                start_date, end_date, date_col, row_groups=shard
+            )
+            for shard in shards
+        ]
+        results = [future.result() for future in futures]
+
+    rollups = results[0] if results else stream_rollups(
+        path, target_col, dimensions, start_date, end_date, date_col)
+    for result in results[1:]:
+        rollups = merge_rollups(rollups, result)
+
+    return rollups
@@ -0,0 +1,162 @@
+# rollups.py
+
+"""
+Out-of-Core Revenue Rollups
+
+Computes the revenue rollups of analyze_data (by category, region and
+month) without loading the cleaned dataset: record batches are streamed
+from the Parquet file, each batch is reduced to partial revenue sums per
+group, and the partials are merged as they arrive. Memory is bounded by
+the batch size and the number of groups rather than the number of rows.
+
+Functions:
+    sum_by_group: Revenue sums per observed group of a frame
+    merge_group_sums: Combine group sums of two disjoint sets of rows
+    merge_rollups: Combine rollups of two disjoint sets of rows
+    stream_rollups: Revenue sums per group of a Parquet file, batch by batch
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+from pandas import DataFrame, Series
+from haashi_pkg.data_engine import DataAnalyzer
+import shared_path  # noqa: F401
+from storage import STREAM_BATCH_ROWS, iter_sales_batches
+from summary import DatasetSummary, compute_summary, merge_summaries
+
+
+# Configuration: Dimensions the revenue is rolled up by
+ROLLUP_DIMENSIONS = ("category", "region", "sale_month")
+
+
+class RevenueRollups(NamedTuple):
+    """Revenue sums per group for each dimension, and a summary of rows."""
+    totals: Dict[str, Series]
+    summary: DatasetSummary
+
+
+def sum_by_group(
+    df: DataFrame,
+    target_col: str,
+    groupby_col: str,
+    analyzer: Optional[DataAnalyzer] = None
+) -> Series:
+    """Sum target_col per observed value of groupby_col."""
+    if analyzer is None:
+        analyzer = DataAnalyzer()
+
+    totals = analyzer.aggregate(df, target_col, groupby_col, op="sum")
+
+    # Arrow dictionary columns group over every dictionary value, including
+    # ones no row uses (e.g. after a date filter); keep observed groups only
+    if isinstance(df[groupby_col].dtype, pd.ArrowDtype):
+        observed = df[groupby_col].unique().tolist()
+        totals = totals[totals.index.isin(observed)]
+
+    return totals
+
+
+def merge_group_sums(first: Series, second: Series) -> Series:
+    """
+    Combine group sums of two disjoint sets of rows.
+
+    Groups are matched by value, so batches whose categorical columns have
+    different categories still merge; integer sums stay exact.
+    """
+    combined = pd.concat([
+        first.set_axis(first.index.astype(object)),
+        second.set_axis(second.index.astype(object)),
+    ])
+    return combined.groupby(level=0, sort=False).sum()
+
+
+def _restore_index(totals: Series, dtype: Any, name: str) -> Series:
+    """Give merged group sums back the dtype of the grouped column."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = "category"
+    return totals.set_axis(totals.index.astype(dtype).rename(name))
+
+
+def merge_rollups(
+    first: RevenueRollups,
+    second: RevenueRollups
+) -> RevenueRollups:
+    """Combine rollups of two disjoint sets of rows (e.g. two shards)."""
+    if not second.summary.row_count:
+        return first
+    if not first.summary.row_count:
+        return second
+
+    totals = {
+        dim: _restore_index(
+            merge_group_sums(sums, second.totals[dim]), sums.index.dtype, dim
+        )
+        for dim, sums in first.totals.items()
+    }
+    return RevenueRollups(
+        totals, merge_summaries(first.summary, second.summary)
+    )
+
+
+def stream_rollups(
+    path: str,
+    target_col: str,
+    dimensions: Sequence[str] = ROLLUP_DIMENSIONS,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    date_col: str = "sale_date",
+    batch_rows: int = STREAM_BATCH_ROWS,
+    analyzer: Optional[DataAnalyzer] = None,
+    row_groups: Optional[List[int]] = None
+) -> RevenueRollups:
+    """
+    Sum target_col per group of each dimension, one batch at a time.
+
+    Only the dimensions and target_col are read (plus date_col when a date
+    range is given, whose min/max then go into the summary). Each batch is
+    reduced to its group sums and merged into the running totals before
+    the next batch is read. Group indexes get back the dtype the column
+    had in the batches ('category' for categoricals). row_groups limits
+    the stream to those row groups of the file.
+    """
+    if analyzer is None:
+        analyzer = DataAnalyzer()
+
+    filtering = start_date is not None or end_date is not None
+    columns: List[str] = list(dimensions) + [target_col]
+    if filtering:
+        columns.append(date_col)
+
+    totals: Dict[str, Series] = {}
+    dtypes = {}
+    summary: Optional[DatasetSummary] = None
+
+    for batch in iter_sales_batches(
+        path, columns, start_date, end_date, date_col, batch_rows, row_groups
+    ):
+        for dim in dimensions:
+            partial = sum_by_group(batch, target_col, dim, analyzer)
+            dtypes.setdefault(dim, batch[dim].dtype)
+            totals[dim] = partial if dim not in totals \
+                else merge_group_sums(totals[dim], partial)
+
+        # Row count always; min/max of the date column when it was read
+        partial_summary = compute_summary(
+            batch[[date_col] if filtering else []])
+        summary = partial_summary if summary is None \
+            else merge_summaries(summary, partial_summary)
+
+    for dim in dimensions:
+        if dim not in totals:
+            totals[dim] = Series(
+                dtype="float64", name=target_col, index=pd.Index([], name=dim)
+            )
+            continue
+
+        totals[dim] = _restore_index(totals[dim], dtypes[dim], dim)
+
+    if summary is None:
+        summary = DatasetSummary(0, {}, source="rows")
+
+    return RevenueRollups(totals, summary)
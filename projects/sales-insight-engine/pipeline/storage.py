@@ -0,0 +1,223 @@
+# storage.py
+
+"""Storage helpers for cleaned retail sales data."""
+
+import os
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from pandas import DataFrame
+
+
+class ParquetLayout(NamedTuple):
+    """How a cleaned dataset is laid out on disk for fast queries."""
+    sort_by: str
+    row_group_size: int
+    dictionary_columns: Tuple[str, ...]
+    compression: str = "zstd"
+    write_statistics: bool = True
+
+
+# Configuration: Layout of the cleaned sales file. Rows sorted by sale_date
+# give each row group a narrow min/max date range, so date filters skip most
+# groups; groups of 500k rows keep column chunks large enough to scan
+# efficiently while leaving many groups to skip at 500M rows.
+CLEANED_SALES_LAYOUT = ParquetLayout(
+    sort_by="sale_date",
+    row_group_size=500_000,
+    dictionary_columns=("category", "region"),
+)
+
+# Files are read memory-mapped: column chunks are paged in from the OS cache
+# on demand instead of being copied into read buffers
+MMAP_FILESYSTEM = pafs.LocalFileSystem(use_mmap=True)
+
+# Configuration: Rows per record batch when streaming a file, and batches
+# decoded ahead of the consumer (the scanner's default of 16 would hold 16M
+# rows in memory)
+STREAM_BATCH_ROWS = 1_000_000
+STREAM_READAHEAD_BATCHES = 2
+
+
+def write_sales_parquet(
+    df: DataFrame,
+    path: str,
+    layout: ParquetLayout = CLEANED_SALES_LAYOUT
+) -> None:
+    """
+    Write cleaned sales data to Parquet with a query-optimized layout.
+
+    Rows are sorted by layout.sort_by (skipped if already sorted), written
+    in row groups of layout.row_group_size rows with dictionary encoding for
+    the low-cardinality columns and min/max statistics for every column.
+    The sort order is recorded in the file metadata. The file is written
+    next to path and renamed into place once complete.
+    """
+    if not df[layout.sort_by].is_monotonic_increasing:
+        df = df.sort_values(layout.sort_by, kind="stable")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sort_index = table.schema.get_field_index(layout.sort_by)
+
+    temp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    pq.write_table(
+        table,
+        temp_path,
+        row_group_size=layout.row_group_size,
+        compression=layout.compression,
+        use_dictionary=[
+            col for col in layout.dictionary_columns
+            if col in table.column_names
+        ],
+        write_statistics=layout.write_statistics,
+        sorting_columns=[pq.SortingColumn(sort_index)],
+    )
+    os.replace(temp_path, path)
+
+
+def parquet_columns(path: str) -> List[str]:
+    """Column names of a Parquet file, read from its footer only."""
+    return pq.read_schema(path).names
+
+
+def parquet_row_groups(path: str) -> int:
+    """Number of row groups of a Parquet file, read from its footer only."""
+    return pq.ParquetFile(path).metadata.num_row_groups
+
+
+def _written_with_arrow_dtypes(schema: pa.Schema) -> bool:
+    """Whether the pandas metadata records Arrow-backed column dtypes."""
+    metadata = schema.pandas_metadata or {}
+    return any(
+        str(col.get("numpy_type", "")).endswith("[pyarrow]")
+        for col in metadata.get("columns", [])
+    )
+
+
+def _to_pandas(table: pa.Table, arrow_dtypes: bool) -> DataFrame:
+    """
+    Convert a table with one block per column, releasing Arrow columns as
+    they are converted.
+
+    With arrow_dtypes every column becomes a pd.ArrowDtype wrapping the
+    Arrow buffers. The pandas metadata is dropped first: it also lists
+    columns that were not projected, whose Arrow dtypes pyarrow would
+    otherwise try (and fail, for dictionaries) to restore.
+    """
+    if arrow_dtypes:
+        table = table.replace_schema_metadata(None)
+        return table.to_pandas(
+            types_mapper=pd.ArrowDtype, split_blocks=True, self_destruct=True
+        )
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _date_filter(
+    date_col: str,
+    start_date: Optional[str],
+    end_date: Optional[str]
+) -> Optional[ds.Expression]:
+    """Build a filter for an inclusive date range (either bound optional)."""
+    expression = None
+
+    if start_date is not None:
+        expression = ds.field(date_col) >= pa.scalar(pd.Timestamp(start_date))
+
+    if end_date is not None:
+        # Inclusive of the whole end day
+        end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+        condition = ds.field(date_col) < pa.scalar(end)
+        expression = condition if expression is None \
+            else expression & condition
+
+    return expression
+
+
+def read_sales_parquet(
+    path: str,
+    columns: Optional[List[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    date_col: str = "sale_date"
+) -> DataFrame:
+    """
+    Read cleaned sales data, loading only the columns and dates requested.
+
+    Only the projected columns are decoded, from a memory-mapped file. Row
+    groups whose sale_date statistics fall outside [start_date, end_date]
+    are skipped without being read; the rest are filtered row by row.
+
+    The table is converted with one block per column (numeric columns
+    without nulls become zero-copy views of the Arrow buffers) and each
+    Arrow column is released once converted, so peak memory stays close to
+    the size of the projected columns.
+
+    Files written from Arrow-backed frames (see arrow_dtypes.py) are read
+    back as pd.ArrowDtype columns, wrapping the Arrow buffers without any
+    conversion.
+    """
+    dataset = ds.dataset(path, format="parquet", filesystem=MMAP_FILESYSTEM)
+    table = dataset.to_table(
+        columns=columns,
+        filter=_date_filter(date_col, start_date, end_date)
+    )
+    return _to_pandas(table, _written_with_arrow_dtypes(dataset.schema))
+
+
+def iter_sales_batches(
+    path: str,
+    columns: Optional[List[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    date_col: str = "sale_date",
+    batch_rows: int = STREAM_BATCH_ROWS,
+    row_groups: Optional[List[int]] = None
+) -> Iterator[DataFrame]:
+    """
+    Stream cleaned sales data as frames of at most batch_rows rows.
+
+    Projection, row-group skipping and dtypes are as in
+    read_sales_parquet(), but only one batch is held in memory at a time.
+    With row_groups (of a single Parquet file) only those row groups are
+    read, so separate processes can each stream their own share.
+    """
+    dataset = ds.dataset(path, format="parquet", filesystem=MMAP_FILESYSTEM)
+    arrow_dtypes = _written_with_arrow_dtypes(dataset.schema)
+
+    if row_groups is not None:
+        fragment = next(dataset.get_fragments())
+        dataset = fragment.subset(row_group_ids=row_groups)
+
+    for batch in dataset.to_batches(
+        columns=columns,
+        filter=_date_filter(date_col, start_date, end_date),
+        batch_size=batch_rows,
+        batch_readahead=STREAM_READAHEAD_BATCHES,
+        fragment_readahead=1,
+    ):
+        if batch.num_rows:
+            yield _to_pandas(pa.Table.from_batches([batch]), arrow_dtypes)
+
+
+def filter_dates(
+    df: DataFrame,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    date_col: str = "sale_date"
+) -> DataFrame:
+    """Keep rows of an in-memory frame within an inclusive date range."""
+    keep = pd.Series(True, index=df.index)
+
+    if start_date is not None:
+        keep &= df[date_col] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+        keep &= df[date_col] < end
+
+    return df[keep]
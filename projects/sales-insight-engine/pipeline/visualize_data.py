@@ -10,16 +10,29 @@ import logging
 from typing import Optional, Dict
 
 import matplotlib.dates as mdates
+from pandas import DataFrame
 from haashi_pkg.plot_engine import PlotEngine
 from haashi_pkg.utility import Logger
 from analyze_data import analyze_data
 
 
+# Cleaned data analyzed by default (analyze_data's default filepath)
+CLEANED_PATH = "data/cleaned_retail_sales.parquet"
+
+
 def visualize_data(
     plotpath: str = "data/plots/retail_sales_plots.png",
-    logger: Optional[Logger] = None
+    logger: Optional[Logger] = None,
+    sales_df: Optional[DataFrame] = None
 ) -> None:
-    """Create comprehensive retail sales visualization dashboard."""
+    """
+    Create comprehensive retail sales visualization dashboard.
+
+    Pass the cleaned frame as sales_df to skip reloading it from Parquet.
+    Only the aggregates are kept once it is analyzed, so the frame can be
+    freed before the figure is drawn if the caller holds no other
+    reference to it.
+    """
     if logger is None:
         logger = Logger(level=logging.INFO)
 
@@ -27,20 +40,17 @@ def visualize_data(
 
     # Get analyzed data
     logger.debug("Loading analyzed data")
-    result = analyze_data(logger=logger)
+    result = analyze_data(CLEANED_PATH, logger=logger, sales_df=sales_df)
+    del sales_df
 
     if result is None:
         logger.error("Analysis returned None - cannot visualize")
         sys.exit(1)
 
-    (
-        sales_df,
-        category_revenue,
-        region_revenue,
-        monthly_revenue,
-        start_date,
-        end_date,
-    ) = result
+    category_revenue = result.revenue_by_category
+    region_revenue = result.revenue_by_region
+    monthly_revenue = result.revenue_by_month
+    start_date, end_date = result.start_label, result.end_label
 
     # Initialize PlotEngine
     logger.debug("Initializing PlotEngine")
@@ -223,8 +233,8 @@ def visualize_data(
     total_revenue = monthly_revenue.total_revenue
 
     stats: Dict[str, str] = {
-        "Total Sales": f"{len(sales_df):,}",
-        "Total Revenue": f"${total_revenue.sum():,.2f}",
+        "Total Sales": f"{result.row_count:,}",
+        "Total Revenue": f"${result.total_revenue:,.2f}",
         "Avg Per Month": f"${total_revenue.mean():,.2f}",
         "Highest Month": f"${total_revenue.max():,.2f}",
         "Lowest Month": f"${total_revenue.min():,.2f}"
@@ -0,0 +1,40 @@
+# background.py
+
+"""
+Background Saves
+
+Cleaned data is written to disk on a single background thread while later
+pipeline stages keep working on the same frame in memory. One writer thread
+keeps saves ordered; wait_for_saves() is the barrier before anything relies
+on the files.
+
+Functions:
+    save_in_background: Run a save function on the background writer thread
+    wait_for_saves: Block until background saves finish, re-raising errors
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List
+
+
+# One writer thread keeps saves ordered and off the critical path
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="saver")
+_pending_saves: List[Future] = []
+
+
+def save_in_background(func: Callable[..., Any], *args: Any) -> Future:
+    """
+    Run a save function on the background writer thread.
+
+    The caller hands the same data to later stages in memory, so they must
+    treat it as read-only until wait_for_saves() returns.
+    """
+    future = _writer.submit(func, *args)
+    _pending_saves.append(future)
+    return future
+
+
+def wait_for_saves() -> None:
+    """Wait for all background saves, re-raising the first error."""
+    while _pending_saves:
+        _pending_saves.pop(0).result()
@@ -0,0 +1,96 @@
+# money.py
+
+"""
+Fixed-Point Money
+
+Opt-in representation of money as int64 minor units (kobo, cents). Integer
+sums are exact and associative, so totals computed per chunk, per shard or
+per incremental run add up to the same value as a single pass, bit for bit.
+Amounts are converted to major units only for display.
+
+Functions:
+    to_minor_units: Convert amounts (numbers or formatted strings) to minor units
+    from_minor_units: Convert minor units back to major units for display
+    multiply_minor_units: Multiply unit amounts by whole quantities
+    sum_minor_units: Exact total of a minor-unit column
+"""
+
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from pandas import Series
+from parsing import parse_amounts
+
+
+# Configuration: Minor units per major unit, as a power of ten
+MINOR_UNIT_DECIMALS = 2
+
+# int64 sums below this bound cannot overflow
+_INT64_LIMIT = np.iinfo(np.int64).max
+
+
+def to_minor_units(
+    values: Series,
+    decimals: int = MINOR_UNIT_DECIMALS
+) -> Series:
+    """
+    Convert amounts to int64 minor units.
+
+    Strings (including "₦20,774.50"-style formatting) are converted exactly
+    from their digits; floats are rounded to the nearest minor unit. Missing
+    amounts give the nullable Int64 dtype.
+    """
+    return parse_amounts(values, decimals=decimals)
+
+
+def from_minor_units(
+    values: Union[Series, np.ndarray, int],
+    decimals: int = MINOR_UNIT_DECIMALS
+) -> Union[Series, np.ndarray, float]:
+    """Convert minor units to major units (float64) for display."""
+    return values / 10 ** decimals
+
+
+def multiply_minor_units(amounts: Series, quantities: Series) -> Series:
+    """
+    Multiply minor-unit amounts by whole quantities, exactly.
+
+    Raises:
+        ValueError: If a quantity is not a whole number
+    """
+    numbers = pd.to_numeric(quantities)
+
+    if not pd.api.types.is_integer_dtype(numbers.dtype):
+        present = numbers.dropna()
+        if not (present == np.trunc(present)).all():
+            raise ValueError(
+                f"Column '{quantities.name}' has fractional quantities"
+            )
+        numbers = numbers.astype("Int64")
+
+    return amounts * numbers
+
+
+def sum_minor_units(values: Series) -> int:
+    """
+    Exact total of a minor-unit column (missing values are skipped).
+
+    Sums in int64 when no overflow is possible and in Python integers
+    otherwise.
+    """
+    amounts = values.dropna().to_numpy(dtype=np.int64)
+
+    if not len(amounts):
+        return 0
+
+    largest = int(np.abs(amounts).max())
+    if largest * len(amounts) <= _INT64_LIMIT:
+        return int(amounts.sum())
+
+    # Chunks small enough that each int64 partial sum is safe
+    chunk = max(_INT64_LIMIT // max(largest, 1), 1)
+    return sum(
+        int(amounts[start:start + chunk].sum())
+        for start in range(0, len(amounts), chunk)
+    )
@@ -0,0 +1,337 @@
+# parsing.py
+
+"""
+Fast Date and Amount Parsing
+
+Vectorized replacements for generic datetime/numeric conversion in the
+cleaning stage. Statement columns repeat the same few hundred date strings
+across millions of rows and carry currency formatting that generic numeric
+conversion cannot read, so:
+
+- dates are parsed once per unique value, trying explicit formats (ISO 8601
+  first) before falling back to per-value inference, and mapped back to rows;
+  values with a UTC offset are converted to UTC, so offsets may differ
+  between rows
+- amounts are checked against one anchored pattern (run by Arrow's RE2
+  engine, no Python loop) and their digits read straight from the UTF-8
+  bytes of the column. A currency marker may only lead or trail the number
+  as a whole token, a sign only lead it, parentheses must wrap all of it
+  and commas must separate groups of three digits; cells that break these
+  rules, have no digits (such as "--") or too many digits for int64 become
+  missing
+
+Functions:
+    parse_dates: Parse a column of dates through its unique values
+    parse_amounts: Parse a column of currency-formatted amounts
+"""
+
+import re
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas import Index, Series
+
+
+# Configuration: Unambiguous date formats tried in order before inference
+DATE_FORMATS = (
+    "ISO8601",
+    "%d-%b-%Y",
+    "%d %b %Y",
+    "%d-%b-%Y %H:%M:%S",
+)
+
+# Configuration: Currency markers that may appear around amounts
+CURRENCY_SYMBOLS = ("₦", "NGN", "$")
+
+# Configuration: Rows decoded per block (bounds temporary array sizes)
+AMOUNT_BLOCK_ROWS = 1 << 20
+
+# Most digits an amount may have; any 18-digit integer fits in int64
+MAX_AMOUNT_DIGITS = 18
+
+INT64_MAX = np.iinfo(np.int64).max
+
+NAT = np.datetime64("NaT", "ns")
+
+
+def _amount_pattern(symbols: Sequence[str]) -> str:
+    """
+    Build the full-cell pattern of a readable amount.
+
+    A number is digits with optional comma-separated groups of three and
+    an optional fraction. It may carry one currency marker, before or
+    after it, and either one leading sign ("-₦5", "₦-5", "-5 NGN") or
+    parentheses around it ("(5)", "(₦5)", "₦(5)"). Spaces may separate
+    these tokens but not split them.
+    """
+    currency = "(?:" + "|".join(re.escape(symbol) for symbol in symbols) + ")"
+    number = r"(?:(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?|\.\d+)"
+    signed = (
+        rf"[-+]\s*{currency}\s*{number}"
+        rf"|{currency}\s*(?:[-+]\s*)?{number}"
+        rf"|(?:[-+]\s*)?{number}(?:\s*{currency})?"
+    )
+    wrapped = (
+        rf"\(\s*(?:{currency}\s*{number}|{number}(?:\s*{currency})?)\s*\)"
+        rf"|{currency}\s*\(\s*{number}\s*\)"
+    )
+    return rf"^\s*(?:{signed}|{wrapped})\s*$"
+
+
+AMOUNT_PATTERN = _amount_pattern(CURRENCY_SYMBOLS)
+
+
+def _parse_unique_dates(uniques: Index, formats: Sequence[str]) -> np.ndarray:
+    """Parse distinct date values to datetime64[ns], NaT where unparseable."""
+    parsed = np.full(len(uniques), NAT)
+    is_text = np.fromiter(
+        (isinstance(value, str) for value in uniques), bool, len(uniques)
+    )
+
+    # Excel cells often arrive as datetime objects already. Values with an
+    # offset are converted to UTC (utc=True leaves naive values unchanged),
+    # so a column mixing offsets still parses.
+    if not is_text.all():
+        others = pd.to_datetime(
+            uniques[~is_text], errors="coerce", utc=True)
+        parsed[~is_text] = others.to_numpy("datetime64[ns]")
+
+    pending = np.flatnonzero(is_text)
+    text = uniques[pending].str.strip()
+
+    for date_format in formats:
+        if not len(pending):
+            break
+
+        attempt = pd.to_datetime(
+            text, format=date_format, errors="coerce", utc=True)
+        matched = ~attempt.isna()
+        parsed[pending[matched]] = attempt[matched].to_numpy("datetime64[ns]")
+        pending, text = pending[~matched], text[~matched]
+
+    # Anything left is inferred value by value
+    if len(pending):
+        inferred = pd.to_datetime(
+            text, format="mixed", errors="coerce", utc=True)
+        parsed[pending] = inferred.to_numpy("datetime64[ns]")
+
+    return parsed
+
+
+def parse_dates(
+    values: Series,
+    formats: Sequence[str] = DATE_FORMATS
+) -> Series:
+    """
+    Parse a column of dates, converting each distinct value only once.
+
+    Strings are tried against formats in order (ISO 8601 first); values no
+    format matches are inferred individually, and unparseable values become
+    NaT. Values with a UTC offset are returned in UTC. Columns that are
+    already datetimes are returned unchanged.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+
+    codes, uniques = pd.factorize(values)
+    parsed = _parse_unique_dates(Index(uniques, dtype=object), formats)
+
+    # Missing values have code -1, which picks the trailing NaT
+    lookup = np.append(parsed, NAT)
+    return Series(lookup[codes], index=values.index, name=values.name)
+
+
+def _decode_amount_block(
+    text: pa.Array
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode one block of amount strings from their UTF-8 bytes.
+
+    Returns the signed digits of each cell read as one integer, the number
+    of those digits after the decimal point, and whether the cell held a
+    readable amount: one matching AMOUNT_PATTERN, with at most
+    MAX_AMOUNT_DIGITS digits.
+    """
+    text = text.cast(pa.large_string())
+    mantissa = np.zeros(len(text), dtype=np.int64)
+    fraction_digits = np.zeros(len(text), dtype=np.int64)
+
+    if text.null_count == len(text):
+        return mantissa, fraction_digits, np.zeros(len(text), dtype=bool)
+
+    # The pattern settles the layout of each cell, so the byte walk below
+    # only has to pick out digits, the decimal point and the sign
+    matched = pc.match_substring_regex(text, AMOUNT_PATTERN)
+    valid = pc.fill_null(matched, False).to_numpy(zero_copy_only=False)
+
+    offsets = np.frombuffer(text.buffers()[1], dtype=np.int64)
+    offsets = offsets[text.offset:text.offset + len(text) + 1]
+    data = np.frombuffer(text.buffers()[2], dtype=np.uint8)
+
+    starts = offsets[:-1]
+    lengths = np.diff(offsets)
+    last_byte = len(data) - 1
+
+    digit_count = np.zeros(len(text), dtype=np.int64)
+    point_count = np.zeros(len(text), dtype=np.int64)
+    negative = np.zeros(len(text), dtype=bool)
+
+    # Walk the cells one byte position at a time, so every step is a single
+    # vector operation over all rows. The digits are read as one integer;
+    # the decimal point only sets the power of ten it is divided by.
+    for position in range(int(lengths.max(initial=0))):
+        chars = np.where(
+            position < lengths,
+            data[np.minimum(starts + position, last_byte)],
+            0
+        )
+
+        is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+        mantissa = np.where(
+            is_digit, mantissa * 10 + (chars - ord("0")), mantissa
+        )
+        digit_count += is_digit
+        fraction_digits += is_digit & (point_count > 0)
+        point_count += chars == ord(".")
+        negative |= (chars == ord("-")) | (chars == ord("("))
+
+    valid &= digit_count <= MAX_AMOUNT_DIGITS
+
+    return np.where(negative, -mantissa, mantissa), fraction_digits, valid
+
+
+def _scale_digits(
+    mantissa: np.ndarray,
+    fraction_digits: np.ndarray,
+    decimals: Optional[int]
+) -> np.ndarray:
+    """
+    Turn decoded digits into amounts.
+
+    Without decimals the result is float64. With decimals it is int64 in
+    minor units (e.g. decimals=2: kobo or cents), computed with integer
+    arithmetic only; extra fraction digits round half away from zero.
+    """
+    if decimals is None:
+        return mantissa / 10.0 ** fraction_digits
+
+    shift = decimals - fraction_digits
+    scaled = mantissa * 10 ** np.maximum(shift, 0)
+
+    divisor = 10 ** np.maximum(-shift, 0)
+    half = divisor // 2
+    rounded = np.sign(mantissa) * ((np.abs(mantissa) + half) // divisor)
+
+    return np.where(shift >= 0, scaled, rounded)
+
+
+def _parse_amount_text(
+    text: Series,
+    decimals: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode amount strings block by block into (amounts, valid)."""
+    array = pa.array(text, type=pa.large_string(), from_pandas=True)
+    amounts, valid = [], []
+
+    for start in range(0, len(array), AMOUNT_BLOCK_ROWS):
+        mantissa, fraction_digits, block_valid = _decode_amount_block(
+            array.slice(start, AMOUNT_BLOCK_ROWS)
+        )
+        if decimals is not None:
+            # Padding whole amounts out to minor units adds digits
+            shift = np.maximum(decimals - fraction_digits, 0)
+            block_valid &= np.abs(mantissa) <= INT64_MAX // 10 ** shift
+            mantissa = np.where(block_valid, mantissa, 0)
+        amounts.append(_scale_digits(mantissa, fraction_digits, decimals))
+        valid.append(block_valid)
+
+    if not amounts:
+        empty_type = np.float64 if decimals is None else np.int64
+        return np.empty(0, dtype=empty_type), np.empty(0, dtype=bool)
+
+    return np.concatenate(amounts), np.concatenate(valid)
+
+
+def _scale_numbers(
+    numbers: np.ndarray,
+    decimals: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Split numbers into (amounts, valid), rounded to minor units if set."""
+    valid = ~np.isnan(numbers)
+
+    if decimals is None:
+        return numbers.copy(), valid
+
+    scaled = np.where(valid, numbers, 0.0) * 10 ** decimals
+    valid &= np.abs(scaled) < 2.0 ** 63
+    scaled = np.where(valid, scaled, 0.0)
+    return np.trunc(scaled + np.copysign(0.5, scaled)).astype(np.int64), valid
+
+
+def parse_amounts(values: Series, decimals: Optional[int] = None) -> Series:
+    """
+    Parse currency-formatted amounts such as "₦20,774.50" or "(1,200)".
+
+    Numbers pass through unchanged; strings must match AMOUNT_PATTERN: a
+    number with comma thousands separators, optionally led or trailed by a
+    currency symbol. A leading "-" (before or after the currency symbol) or
+    parentheses around the amount mark it negative. Cells without digits
+    ("--", blanks), with misplaced symbols, signs, parentheses or commas,
+    with more than MAX_AMOUNT_DIGITS digits, with amounts too large for
+    int64 minor units, or with other text become missing.
+
+    Without decimals the result is int64 when every amount is present and
+    whole, float64 otherwise. With decimals the result is int64 in minor
+    units (decimals=2: "₦20,774.50" -> 2077450), read exactly from the
+    digits of strings and rounded from numbers; it is the nullable Int64
+    dtype if any amount is missing.
+    """
+    is_number = pd.api.types.is_numeric_dtype(values.dtype) \
+        and not pd.api.types.is_bool_dtype(values.dtype)
+
+    if is_number and decimals is None:
+        return values
+
+    if is_number:
+        amounts, valid = _scale_numbers(
+            values.to_numpy(dtype=np.float64, na_value=np.nan), decimals
+        )
+        if pd.api.types.is_integer_dtype(values.dtype):
+            whole = values.to_numpy(dtype=np.int64, na_value=0)
+            valid &= np.abs(whole) <= INT64_MAX // 10 ** decimals
+            amounts = np.where(valid, whole, 0) * 10 ** decimals
+    else:
+        try:
+            amounts, valid = _parse_amount_text(values, decimals)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed cells: those openpyxl already read as numbers need no
+            # text decoding
+            numbers = pd.to_numeric(values, errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            text_rows = np.isnan(numbers) & values.notna().to_numpy()
+            amounts, valid = _scale_numbers(numbers, decimals)
+            amounts[text_rows], valid[text_rows] = _parse_amount_text(
+                values[text_rows].astype(str), decimals
+            )
+
+    if decimals is not None:
+        if valid.all():
+            return Series(amounts, index=values.index, name=values.name)
+        return Series(
+            pd.arrays.IntegerArray(amounts, ~valid),
+            index=values.index,
+            name=values.name
+        )
+
+    amounts = np.where(valid, amounts, np.nan)
+
+    if valid.all() and (amounts == np.trunc(amounts)).all():
+        return Series(
+            amounts.astype(np.int64), index=values.index, name=values.name
+        )
+
+    return Series(amounts, index=values.index, name=values.name)
@@ -0,0 +1,368 @@
+# profiling.py
+
+"""
+Column Profiles
+
+One-pass profiles of the columns of a frame: null count, min and max,
+approximate distinct count, most frequent values and the first values to
+appear. Data is profiled batch by batch as it is loaded (call
+Profiler.update from the read loop); each batch is reduced to the counts
+of its distinct values, in order of appearance (one hash pass per column),
+and everything else is derived from those counts, so no column is scanned
+again for its nulls, range or unique values.
+
+Distinct counts are exact while a column has at most TRACKED_VALUES
+distinct values; beyond that they come from a HyperLogLog sketch (about
+1.6% standard error), the most frequent values are approximate, as only
+the TRACKED_VALUES most frequent values of each batch are carried over,
+and the order of appearance is no longer known.
+
+Profiles are saved as JSON next to the data they describe (or at a given
+path), with the size and mtime of its files (see summary.dataset_files),
+and ignored once the data changes without them.
+
+Functions:
+    profile_frame: Profile a frame batch by batch
+    log_missing: Log the null counts of a profile
+    write_profiles: Save named profiles next to a file or dataset
+    read_profiles: Load the profiles of a file or dataset if still current
+
+Classes:
+    Profiler: Accumulates a profile over batches
+"""
+
+import json
+import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas import DataFrame, Index, Series
+from haashi_pkg.utility import Logger
+from summary import dataset_files
+
+
+# Configuration: Rows profiled per batch, distinct values tracked per
+# column and most frequent values reported
+PROFILE_BATCH_ROWS = 1_000_000
+TRACKED_VALUES = 1024
+TOP_VALUES = 5
+
+# HyperLogLog registers (2 ** precision) for distinct counts
+HLL_PRECISION = 12
+
+# Profile file name (inside a dataset directory) or suffix (next to a file)
+PROFILE_FILE = "_profile.json"
+PROFILE_SUFFIX = ".profile.json"
+
+# Bump when the profile layout changes to ignore old files
+PROFILE_FORMAT_VERSION = 2
+
+
+class ColumnProfile(NamedTuple):
+    """
+    Profile of one column. min and max are None without non-null values;
+    top_values holds (value, count) pairs, most frequent first, and
+    first_values as many distinct values in order of first appearance
+    (empty when the distinct count is approximate).
+    """
+    null_count: int
+    min: Any
+    max: Any
+    distinct: int
+    distinct_exact: bool
+    top_values: List[Tuple[Any, int]]
+    first_values: List[Any]
+
+
+class DatasetProfile(NamedTuple):
+    """Row count and per-column profiles."""
+    row_count: int
+    columns: Dict[str, ColumnProfile]
+
+
+def _plain_values(index: Index) -> Index:
+    """Distinct values without categorical or dictionary encoding."""
+    dtype = index.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return index.astype(dtype.categories.dtype)
+    if isinstance(dtype, pd.ArrowDtype) and pa.types.is_dictionary(
+        dtype.pyarrow_dtype
+    ):
+        return index.astype(pd.ArrowDtype(dtype.pyarrow_dtype.value_type))
+    return index
+
+
+def _hll_ranks(hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """HyperLogLog register and rank (leading zeros + 1) of each hash."""
+    registers = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+    rest = hashes << np.uint64(HLL_PRECISION)
+
+    # Bit length from the float exponent; values rounding up to the next
+    # power of two only shift a rank by one
+    _, bit_length = np.frexp(rest.astype(np.float64))
+    ranks = np.where(
+        rest == 0, 64 - HLL_PRECISION + 1, np.maximum(65 - bit_length, 1)
+    )
+    return registers, ranks.astype(np.uint8)
+
+
+def _hll_estimate(registers: np.ndarray) -> int:
+    """Distinct count estimated from HyperLogLog registers."""
+    size = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / size)
+    estimate = alpha * size * size / np.sum(np.exp2(-registers.astype(float)))
+
+    # Small cardinalities: linear counting over empty registers
+    empty = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * size and empty:
+        estimate = size * np.log(size / empty)
+    return int(round(estimate))
+
+
+class _ColumnState:
+    """Running profile of one column."""
+
+    def __init__(self) -> None:
+        self.null_count = 0
+        self.min: Any = None
+        self.max: Any = None
+        self.counts: Dict[Any, int] = {}
+        self.truncated = False
+        self.registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+
+    def update(self, values: Series, tracked_values: int) -> None:
+        """Fold one batch of the column in."""
+        # Distinct values in order of appearance; nulls are coded -1, so
+        # shifted codes count them in bin 0
+        codes, uniques = pd.factorize(values)
+        bins = np.bincount(codes + 1, minlength=len(uniques) + 1)
+        self.null_count += int(bins[0])
+        if not len(uniques):
+            return
+
+        counts = Series(bins[1:], index=_plain_values(pd.Index(uniques)))
+        low, high = counts.index.min(), counts.index.max()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+        hashes = pd.util.hash_pandas_object(
+            counts.index.to_series(), index=False).to_numpy()
+        registers, ranks = _hll_ranks(hashes)
+        np.maximum.at(self.registers, registers, ranks)
+
+        if len(counts) > tracked_values:
+            counts = counts.nlargest(tracked_values)
+            self.truncated = True
+        for value, count in zip(counts.index.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+
+        if len(self.counts) > tracked_values:
+            kept = sorted(self.counts.items(), key=lambda item: -item[1])
+            self.counts = dict(kept[:tracked_values])
+            self.truncated = True
+
+    def profile(self, top_values: int) -> ColumnProfile:
+        """Profile of the batches seen so far."""
+        exact = not self.truncated
+        top = sorted(self.counts.items(), key=lambda item: -item[1])
+
+        # Untruncated counts keep the insertion (first appearance) order
+        first = list(self.counts)[:top_values] if exact else []
+
+        return ColumnProfile(
+            null_count=self.null_count,
+            min=self.min,
+            max=self.max,
+            distinct=len(self.counts) if exact
+            else _hll_estimate(self.registers),
+            distinct_exact=exact,
+            top_values=top[:top_values],
+            first_values=first,
+        )
+
+
+class Profiler:
+    """
+    Accumulates a column profile over batches of a frame.
+
+    Call update() with each batch as it is loaded, then profile() for the
+    result. Only the given columns are profiled (default: all columns of
+    the batches).
+    """
+
+    def __init__(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        top_values: int = TOP_VALUES,
+        tracked_values: int = TRACKED_VALUES
+    ) -> None:
+        self.columns = columns
+        self.top_values = top_values
+        self.tracked_values = tracked_values
+        self.row_count = 0
+        self._columns: Dict[str, _ColumnState] = {}
+
+    def update(self, batch: DataFrame) -> None:
+        """Profile one batch."""
+        self.row_count += len(batch)
+        columns = batch.columns if self.columns is None else self.columns
+        for col in columns:
+            state = self._columns.setdefault(col, _ColumnState())
+            state.update(batch[col], self.tracked_values)
+
+    def profile(self) -> DatasetProfile:
+        """Profile of every batch so far."""
+        return DatasetProfile(self.row_count, {
+            col: state.profile(self.top_values)
+            for col, state in self._columns.items()
+        })
+
+
+def profile_frame(
+    df: DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    batch_rows: int = PROFILE_BATCH_ROWS,
+    top_values: int = TOP_VALUES
+) -> DatasetProfile:
+    """Profile columns (default: all) of a frame, batch_rows at a time."""
+    profiler = Profiler(columns, top_values)
+    for start in range(0, len(df), batch_rows):
+        profiler.update(df.iloc[start:start + batch_rows])
+    return profiler.profile()
+
+
+def log_missing(profile: DatasetProfile, logger: Logger) -> None:
+    """Log missing value counts of every column of a profile."""
+    total_missing = sum(col.null_count for col in profile.columns.values())
+
+    if total_missing > 0:
+        logger.debug(f"Missing values found: {total_missing} total")
+        for name, col in profile.columns.items():
+            if col.null_count > 0:
+                logger.debug(f"  {name}: {col.null_count} missing")
+    else:
+        logger.debug("No missing values found")
+
+
+def _profile_path(path: str, profile_path: Optional[str] = None) -> Path:
+    """
+    Location of the profiles of a dataset directory or single file: inside
+    the directory or next to the file, unless profile_path is given.
+    """
+    if profile_path is not None:
+        return Path(profile_path)
+
+    target = Path(path)
+    if target.is_dir():
+        return target / PROFILE_FILE
+    return target.with_name(target.name + PROFILE_SUFFIX)
+
+
+def _encode(value: Any) -> Any:
+    """JSON-safe form of a profiled value (dates and months tagged)."""
+    if isinstance(value, pd.Timestamp):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"datetime": pd.Timestamp(value).isoformat()}
+    if isinstance(value, pd.Period):
+        return {"period": str(value), "freq": value.freqstr}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value: Any) -> Any:
+    """Inverse of _encode."""
+    if isinstance(value, dict):
+        if "period" in value:
+            return pd.Period(value["period"], freq=value["freq"])
+        return pd.Timestamp(value["datetime"])
+    return value
+
+
+def write_profiles(
+    path: str,
+    profiles: Dict[str, DatasetProfile],
+    profile_path: Optional[str] = None
+) -> None:
+    """
+    Save named profiles (e.g. "raw" and "cleaned") of the file or dataset at
+    path, with the size and mtime of its files. They are kept next to the
+    data, or at profile_path to keep input directories untouched.
+    """
+    state = {
+        "version": PROFILE_FORMAT_VERSION,
+        "files": dataset_files(path),
+        "profiles": {
+            name: {
+                "row_count": profile.row_count,
+                "columns": {
+                    col: {
+                        "null_count": stats.null_count,
+                        "min": _encode(stats.min),
+                        "max": _encode(stats.max),
+                        "distinct": stats.distinct,
+                        "distinct_exact": stats.distinct_exact,
+                        "top_values": [
+                            [_encode(value), count]
+                            for value, count in stats.top_values
+                        ],
+                        "first_values": [
+                            _encode(value) for value in stats.first_values
+                        ],
+                    }
+                    for col, stats in profile.columns.items()
+                },
+            }
+            for name, profile in profiles.items()
+        },
+    }
+
+    target = _profile_path(path, profile_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(state), encoding="utf-8")
+    temp_path.replace(target)
+
+
+def read_profiles(
+    path: str,
+    profile_path: Optional[str] = None
+) -> Optional[Dict[str, DatasetProfile]]:
+    """Load the profiles saved for path, or None if missing or out of date."""
+    target = _profile_path(path, profile_path)
+
+    if not target.exists() or not Path(path).exists():
+        return None
+
+    state = json.loads(target.read_text(encoding="utf-8"))
+
+    if state.get("version") != PROFILE_FORMAT_VERSION:
+        return None
+    if state["files"] != dataset_files(path):
+        return None
+
+    return {
+        name: DatasetProfile(profile["row_count"], {
+            col: ColumnProfile(
+                null_count=stats["null_count"],
+                min=_decode(stats["min"]),
+                max=_decode(stats["max"]),
+                distinct=stats["distinct"],
+                distinct_exact=stats["distinct_exact"],
+                top_values=[
+                    (_decode(value), count)
+                    for value, count in stats["top_values"]
+                ],
+                first_values=[
+                    _decode(value) for value in stats["first_values"]
+                ],
+            )
+            for col, stats in profile["columns"].items()
+        })
+        for name, profile in state["profiles"].items()
+    }
@@ -0,0 +1,261 @@
+# stages.py
+
+"""
+Pipeline Stage Runner
+
+Make-style orchestration for main.py: each stage declares its input files,
+parameters, entry modules and outputs. A stage whose fingerprint matches the
+last successful run (and whose outputs still exist) is skipped.
+
+A stage's code is its entry modules plus every local module they import,
+directly or not, found by walking the import statements of their source:
+modules of the pipeline directory and of this shared directory are
+followed, installed packages and the standard library are not. Nothing is
+listed by hand, so a new import is fingerprinted as soon as it is added.
+
+Functions:
+    code_files: Source files of modules and the local modules they import
+    fingerprint: Fingerprint a stage from its inputs, parameters and code
+
+Classes:
+    Stage: Declaration of one pipeline step
+    StageRunner: Runs stages, skipping unchanged ones, and records
+        fingerprints of successful runs
+"""
+
+import ast
+import json
+import hashlib
+import logging
+import importlib.util
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from haashi_pkg.utility import Logger
+
+
+# Configuration: Where fingerprints of successful stage runs are kept
+DEFAULT_STATE_PATH = "data/.cache/stages.json"
+
+# Modules shared by every project live next to this one
+SHARED_DIR = Path(__file__).resolve().parent
+
+
+class Stage(NamedTuple):
+    """
+    Declaration of one pipeline step and everything its result depends on.
+
+    code names the step's entry modules (e.g. ["clean_data"]); the local
+    modules they import are found automatically (see code_files).
+    """
+    name: str
+    func: Callable[[], Any]
+    inputs: List[str]
+    outputs: List[str]
+    params: Dict[str, Any] = {}
+    code: List[str] = []
+
+
+def _file_signature(path: Path) -> str:
+    """Cheap change signature for a data file: size and modification time."""
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _path_signatures(path_str: str) -> List[str]:
+    """Signatures for a file, or for every file under a directory."""
+    path = Path(path_str)
+
+    if path.is_file():
+        return [f"{path_str}={_file_signature(path)}"]
+
+    if path.is_dir():
+        return [
+            f"{file}={_file_signature(file)}"
+            for file in sorted(path.rglob("*"))
+            if file.is_file()
+        ]
+
+    # Missing inputs still fingerprint, so their appearance re-runs the stage
+    return [f"{path_str}=missing"]
+
+
+def _module_file(name: str) -> Optional[Path]:
+    """Source file of a top-level module, found without importing it."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+
+    if spec is None or not spec.has_location or spec.origin is None:
+        return None
+    return Path(spec.origin).resolve()
+
+
+def _imported_modules(path: Path) -> Set[str]:
+    """Top-level names of the modules a source file imports (anywhere)."""
+    tree = ast.parse(path.read_bytes(), filename=str(path))
+    names: Set[str] = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module \
+                and node.level == 0:
+            names.add(node.module.split(".")[0])
+
+    return names
+
+
+def code_files(modules: Sequence[str]) -> List[Path]:
+    """
+    Source files of modules and of every local module they import,
+    directly or not, sorted by file name.
+
+    Local modules are those in the directory of one of the given modules
+    or in SHARED_DIR.
+
+    Raises:
+        ValueError: If one of the given modules cannot be found
+    """
+    entries = []
+    for name in modules:
+        path = _module_file(name)
+        if path is None or path.suffix != ".py":
+            raise ValueError(f"No source file found for module '{name}'")
+        entries.append(path)
+
+    roots = {path.parent for path in entries} | {SHARED_DIR}
+    found = set(entries)
+    pending = list(entries)
+
+    while pending:
+        for name in _imported_modules(pending.pop()):
+            path = _module_file(name)
+            if path is None or path in found or path.suffix != ".py":
+                continue
+            if path.parent in roots:
+                found.add(path)
+                pending.append(path)
+
+    return sorted(found, key=lambda path: path.name)
+
+
+def fingerprint(stage: Stage) -> str:
+    """
+    Fingerprint a stage from its inputs, parameters and code.
+
+    Data inputs are identified by size and mtime; code modules by content,
+    so editing a stage's code re-runs it even if the data is unchanged.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    for input_path in sorted(stage.inputs):
+        for signature in _path_signatures(input_path):
+            digest.update(signature.encode())
+
+    digest.update(
+        json.dumps(stage.params, sort_keys=True, default=str).encode()
+    )
+
+    for path in code_files(stage.code):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+class StageRunner:
+    """
+    Run pipeline stages, skipping those unchanged since their last success.
+
+    Fingerprints are recorded by commit(), after the whole pipeline has
+    finished, so that inputs written in the background by an earlier stage
+    are fingerprinted in their final state.
+    """
+
+    def __init__(
+        self,
+        state_path: str = DEFAULT_STATE_PATH,
+        force: bool = False,
+        logger: Optional[Logger] = None
+    ) -> None:
+        self.state_path = Path(state_path)
+        self.force = force
+        self.logger = logger or Logger(level=logging.INFO)
+        self._completed: List[Stage] = []
+
+        if self.state_path.exists():
+            self._state: Dict[str, str] = json.loads(
+                self.state_path.read_text(encoding="utf-8")
+            )
+        else:
+            self._state = {}
+
+    def is_current(self, stage: Stage) -> bool:
+        """
+        True if the stage's fingerprint and outputs match the last run.
+
+        A stage that reads the outputs of a stage re-run in this session is
+        never current; those outputs may still be being written.
+        """
+        if self.force or self._state.get(stage.name) is None:
+            return False
+
+        rewritten = {
+            output for done in self._completed for output in done.outputs
+        }
+        if rewritten.intersection(stage.inputs):
+            return False
+
+        if not all(Path(output).exists() for output in stage.outputs):
+            return False
+
+        return self._state[stage.name] == fingerprint(stage)
+
+    def run(self, stage: Stage) -> Tuple[bool, Any]:
+        """
+        Run a stage unless it is up to date.
+
+        Returns:
+            Tuple containing:
+                - ran: False if the stage was skipped
+                - result: The stage function's return value (None if skipped)
+        """
+        if self.is_current(stage):
+            self.logger.info(f"↷ {stage.name}: unchanged, reusing outputs")
+            return False, None
+
+        # A failed run must not leave an outdated fingerprint behind
+        if self._state.pop(stage.name, None) is not None:
+            self._save()
+
+        result = stage.func()
+        self._completed.append(stage)
+        return True, result
+
+    def commit(self) -> None:
+        """Record fingerprints for every stage that ran successfully."""
+        for stage in self._completed:
+            self._state[stage.name] = fingerprint(stage)
+
+        self._completed = []
+        self._save()
+
+    def _save(self) -> None:
+        """Write recorded fingerprints to the state file."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(
+            json.dumps(self._state, indent=2, sort_keys=True),
+            encoding="utf-8"
+        )
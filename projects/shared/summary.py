@@ -0,0 +1,304 @@
+# summary.py
+
+"""
+Summary Statistics
+
+Answers row count, min, max, sum and date-range questions about a cleaned
+Parquet dataset without reading its rows. A small JSON summary is written
+next to the data at clean time; when it is missing or out of date the
+Parquet footers (row counts and row-group min/max statistics) are used, and
+only the columns that still lack an answer are scanned.
+
+Functions:
+    dataset_files: Change signatures of a dataset's data files
+    compute_summary: Summarize the numeric and date columns of a frame
+    merge_summaries: Combine summaries of two disjoint sets of rows
+    write_summary: Save a summary next to a dataset
+    read_summary: Load the summary of a dataset if it is still current
+    summary_statistics: Count/min/max/sum for columns, cheapest source first
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pandas import DataFrame
+from money import sum_minor_units
+
+
+# Configuration: Summary file name (inside a dataset directory) or suffix
+# (next to a single Parquet file)
+SUMMARY_FILE = "_summary.json"
+SUMMARY_SUFFIX = ".summary.json"
+
+# Bump when the summary layout changes to ignore old files
+SUMMARY_FORMAT_VERSION = 1
+
+
+class ColumnStats(NamedTuple):
+    """Statistics of one column; sum is None for dates or when unknown."""
+    min: Any
+    max: Any
+    sum: Any
+    null_count: Optional[int]
+
+
+class DatasetSummary(NamedTuple):
+    """Row count and per-column statistics, with where they came from."""
+    row_count: int
+    columns: Dict[str, ColumnStats]
+    source: str
+
+
+def _summary_path(path: str) -> Path:
+    """Location of the summary for a dataset directory or single file."""
+    target = Path(path)
+    if target.is_dir():
+        return target / SUMMARY_FILE
+    return target.with_name(target.name + SUMMARY_SUFFIX)
+
+
+def dataset_files(path: str) -> Dict[str, List[int]]:
+    """
+    Size and mtime of every Parquet file of the dataset, by path.
+
+    Like pyarrow datasets, files whose names start with '_' or '.' (such as
+    sidecars kept inside a dataset directory) are not data files.
+    """
+    target = Path(path)
+    files = sorted(
+        file for file in target.rglob("*.parquet")
+        if not file.name.startswith(("_", "."))
+    ) if target.is_dir() else [target]
+
+    signatures = {}
+    for file in files:
+        stat = file.stat()
+        signatures[str(file.relative_to(target.parent))] = [
+            stat.st_size, stat.st_mtime_ns
+        ]
+    return signatures
+
+
+def compute_summary(df: DataFrame) -> DatasetSummary:
+    """
+    Summarize the numeric and datetime columns of a frame.
+
+    Integer sums are exact Python integers; float sums are float64.
+    """
+    columns: Dict[str, ColumnStats] = {}
+
+    for col in df.columns:
+        values = df[col]
+        dtype = values.dtype
+
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            total = None
+        elif pd.api.types.is_integer_dtype(dtype):
+            total = sum_minor_units(values)
+        elif pd.api.types.is_float_dtype(dtype):
+            total = float(values.sum())
+        else:
+            continue
+
+        present = values.dropna()
+        columns[col] = ColumnStats(
+            min=present.min() if len(present) else None,
+            max=present.max() if len(present) else None,
+            sum=total,
+            null_count=int(len(values) - len(present)),
+        )
+
+    return DatasetSummary(len(df), columns, source="rows")
+
+
+def _combine(first: Any, second: Any, pick: Any) -> Any:
+    """Combine two optional values with pick (min/max), ignoring None."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return pick(first, second)
+
+
+def merge_summaries(
+    first: DatasetSummary,
+    second: DatasetSummary
+) -> DatasetSummary:
+    """
+    Combine summaries of two disjoint sets of rows.
+
+    Columns missing from either side are dropped, as their statistics would
+    not cover every row.
+    """
+    columns = {}
+
+    for col in first.columns.keys() & second.columns.keys():
+        a, b = first.columns[col], second.columns[col]
+        total = None
+        if a.sum is not None and b.sum is not None:
+            total = a.sum + b.sum
+
+        columns[col] = ColumnStats(
+            min=_combine(a.min, b.min, min),
+            max=_combine(a.max, b.max, max),
+            sum=total,
+            null_count=_combine(a.null_count, b.null_count, lambda x, y: x + y),
+        )
+
+    return DatasetSummary(
+        first.row_count + second.row_count, columns, source="rows"
+    )
+
+
+def _encode(value: Any) -> Any:
+    """JSON-safe form of a statistic (dates as tagged ISO strings)."""
+    if isinstance(value, pd.Timestamp):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value: Any) -> Any:
+    """Inverse of _encode."""
+    if isinstance(value, dict):
+        return pd.Timestamp(value["datetime"])
+    return value
+
+
+def write_summary(path: str, summary: DatasetSummary) -> None:
+    """
+    Save a summary next to the dataset at path.
+
+    The sizes and modification times of the dataset's files are recorded,
+    so a summary is ignored once the data changes without it.
+    """
+    state = {
+        "version": SUMMARY_FORMAT_VERSION,
+        "row_count": summary.row_count,
+        "files": dataset_files(path),
+        "columns": {
+            col: [_encode(value) for value in stats]
+            for col, stats in summary.columns.items()
+        },
+    }
+
+    summary_path = _summary_path(path)
+    temp_path = summary_path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(state), encoding="utf-8")
+    temp_path.replace(summary_path)
+
+
+def read_summary(path: str) -> Optional[DatasetSummary]:
+    """Load the dataset's summary, or None if missing or out of date."""
+    summary_path = _summary_path(path)
+
+    if not summary_path.exists():
+        return None
+
+    state = json.loads(summary_path.read_text(encoding="utf-8"))
+
+    if state.get("version") != SUMMARY_FORMAT_VERSION:
+        return None
+    if state["files"] != dataset_files(path):
+        return None
+
+    columns = {
+        col: ColumnStats(*(_decode(value) for value in stats))
+        for col, stats in state["columns"].items()
+    }
+    return DatasetSummary(state["row_count"], columns, source="summary")
+
+
+def _footer_summary(path: str, columns: List[str]) -> DatasetSummary:
+    """
+    Row count and min/max from Parquet footers, without reading rows.
+
+    A column gets min/max only if every row group has statistics for it;
+    sums are never available from footers.
+    """
+    dataset = ds.dataset(path, format="parquet")
+    row_count = 0
+    found: Dict[str, List[Any]] = {col: [None, None, 0] for col in columns}
+    complete = {col: True for col in columns}
+
+    for file in dataset.files:
+        metadata = pq.ParquetFile(file).metadata
+        row_count += metadata.num_rows
+        names = metadata.schema.to_arrow_schema().names
+
+        for group_index in range(metadata.num_row_groups):
+            group = metadata.row_group(group_index)
+
+            for col in columns:
+                if col not in names:
+                    complete[col] = False
+                    continue
+
+                stats = group.column(names.index(col)).statistics
+                if stats is None or not stats.has_min_max:
+                    complete[col] = False
+                    continue
+
+                low, high = stats.min, stats.max
+                if hasattr(low, "year"):
+                    low, high = pd.Timestamp(low), pd.Timestamp(high)
+
+                entry = found[col]
+                entry[0] = _combine(entry[0], low, min)
+                entry[1] = _combine(entry[1], high, max)
+                entry[2] += stats.null_count or 0
+
+    return DatasetSummary(
+        row_count,
+        {
+            col: ColumnStats(entry[0], entry[1], None, entry[2])
+            for col, entry in found.items() if complete[col]
+        },
+        source="footer",
+    )
+
+
+def summary_statistics(
+    path: str,
+    columns: List[str],
+    need_sums: bool = False
+) -> DatasetSummary:
+    """
+    Count/min/max (and optionally sum) for columns of a cleaned dataset.
+
+    Uses, in order: the summary written at clean time, the Parquet footer
+    statistics, and finally a scan of only the columns still unanswered.
+    The source field of the result says which was needed last.
+    """
+    summary = read_summary(path)
+
+    if summary is not None and all(
+        col in summary.columns
+        and (not need_sums or summary.columns[col].sum is not None)
+        for col in columns
+    ):
+        return summary
+
+    summary = _footer_summary(path, columns)
+    missing = [
+        col for col in columns
+        if col not in summary.columns or need_sums
+    ]
+
+    if not missing:
+        return summary
+
+    table = ds.dataset(path, format="parquet").to_table(columns=missing)
+    scanned = compute_summary(table.to_pandas())
+
+    return DatasetSummary(
+        summary.row_count,
+        {**summary.columns, **scanned.columns},
+        source="scan",
+    )
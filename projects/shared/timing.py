@@ -0,0 +1,35 @@
+# timing.py
+
+"""
+Benchmark Timing
+
+Wall-clock timing shared by the project benchmarks. Each measurement is
+the best of several calls, which filters out one-off delays (page faults,
+other processes) better than the mean.
+
+Functions:
+    time_best: Best wall-clock time of several calls
+"""
+
+import time
+from typing import Any, Callable
+
+
+# Configuration: Calls per measurement
+DEFAULT_REPEATS = 3
+
+
+def time_best(
+    func: Callable[..., Any],
+    *args: Any,
+    repeats: int = DEFAULT_REPEATS
+) -> float:
+    """Return the best wall-clock time in seconds over several calls."""
+    timings = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
@@ -0,0 +1,331 @@
+# validation.py
+
+"""
+Declarative Data Validation
+
+A schema lists what each column of a dataset must look like (its kind,
+whether nulls are allowed, numeric bounds such as non-negativity, allowed
+categories, date bounds) and validate() checks every rule in one pass over
+the frame: each column is read into a numpy array once, its null mask is
+shared by all of its rules, and categories are checked once per distinct
+value and mapped to rows through integer codes.
+
+The report counts the violating rows of every (column, rule) pair and keeps
+the index labels of the first few, along with the null count of every
+schema column. Reports of consecutive chunks merge into the report of the
+whole data, so a schema can be checked chunk by chunk while streaming.
+
+Functions:
+    validate: Check a frame (or one chunk of it) against a schema
+    merge_reports: Combine the reports of consecutive chunks
+    validate_chunks: Check a stream of chunks against a schema
+    log_report: Log the null counts and violations of a report
+    raise_for_violations: Raise DataValidationError for violated rules
+"""
+
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from haashi_pkg.utility import Logger
+from haashi_pkg.data_engine import DataValidationError
+
+
+# Configuration: Violating row labels kept per rule
+SAMPLE_ROWS = 5
+
+# Column kinds a rule can require (see _has_kind)
+KINDS = ("number", "integer", "text", "date", "month")
+
+
+class ColumnRule(NamedTuple):
+    """
+    Expectations for one column.
+
+    kind is one of KINDS (None accepts any dtype). min_value and max_value
+    are inclusive numeric bounds (min_value=0 for non-negative amounts),
+    min_date and max_date inclusive date bounds ("today" is resolved when
+    validating), and allowed the values a text column may take. Nulls pass
+    every rule except nullable=False. Optional columns (required=False)
+    are only checked when present.
+    """
+    name: str
+    kind: Optional[str] = None
+    nullable: bool = True
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    allowed: Optional[Tuple[str, ...]] = None
+    min_date: Optional[str] = None
+    max_date: Optional[str] = None
+    required: bool = True
+
+
+class Schema(NamedTuple):
+    """Named set of column rules."""
+    name: str
+    rules: Tuple[ColumnRule, ...]
+
+    def with_rules(self, *rules: ColumnRule) -> "Schema":
+        """Schema with rules added (or replaced, by column name)."""
+        names = {rule.name for rule in rules}
+        kept = tuple(rule for rule in self.rules if rule.name not in names)
+        return self._replace(rules=kept + rules)
+
+
+class Violation(NamedTuple):
+    """
+    Rows of a column breaking one rule: missing_column, kind, null, min,
+    max, allowed, min_date or max_date. Column-level failures (missing
+    column, wrong kind) count every row.
+    """
+    column: str
+    rule: str
+    count: int
+    sample_rows: List[Hashable]
+
+
+class ValidationReport(NamedTuple):
+    """Outcome of validating a frame or a stream of chunks."""
+    schema: str
+    row_count: int
+    null_counts: Dict[str, int]
+    violations: List[Violation]
+
+    @property
+    def ok(self) -> bool:
+        """True if no rule was violated."""
+        return not self.violations
+
+
+def _has_kind(series: Series, kind: str) -> bool:
+    """Whether a column's dtype is of a rule kind (any dtype backend)."""
+    dtype = series.dtype
+
+    if kind == "month":
+        return dtype == pd.PeriodDtype("M") or dtype.kind in "iu"
+    if kind == "text":
+        return dtype.kind in "OSU" and not isinstance(dtype, pd.PeriodDtype)
+    if kind == "number":
+        return dtype.kind in "iuf"
+    if kind == "integer":
+        return dtype.kind in "iu"
+    if kind == "date":
+        return dtype.kind == "M"
+
+    raise ValueError(f"Unknown column kind '{kind}' (expected one of {KINDS})")
+
+
+def _outside_allowed(series: Series, allowed: Sequence[str]) -> np.ndarray:
+    """Rows holding a value not in allowed, checked per distinct value."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+
+    bad_codes = np.flatnonzero(~pd.Index(uniques).isin(list(allowed)))
+    return np.isin(codes, bad_codes)
+
+
+def _date_bound(value: str) -> np.datetime64:
+    """A date bound as a numpy datetime ("today" is the current date)."""
+    return pd.Timestamp(value).normalize().to_datetime64()
+
+
+def _rule_masks(
+    series: Series,
+    rule: ColumnRule
+) -> Tuple[np.ndarray, List[Tuple[str, np.ndarray]]]:
+    """Null mask of a column and the violation mask of each of its rules."""
+    nulls = series.isna().to_numpy()
+    masks: List[Tuple[str, np.ndarray]] = []
+
+    if not rule.nullable:
+        masks.append(("null", nulls))
+
+    if rule.min_value is not None or rule.max_value is not None:
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        if rule.min_value is not None:
+            masks.append(("min", values < rule.min_value))
+        if rule.max_value is not None:
+            masks.append(("max", values > rule.max_value))
+
+    if rule.min_date is not None or rule.max_date is not None:
+        dates = series.to_numpy(
+            dtype="datetime64[ns]", na_value=np.datetime64("NaT"))
+        if rule.min_date is not None:
+            masks.append(("min_date", dates < _date_bound(rule.min_date)))
+        if rule.max_date is not None:
+            # A date bound covers its whole day
+            end = _date_bound(rule.max_date) + np.timedelta64(1, "D")
+            masks.append(("max_date", dates >= end))
+
+    if rule.allowed is not None:
+        masks.append(("allowed", _outside_allowed(series, rule.allowed)))
+
+    return nulls, masks
+
+
+def validate(
+    df: DataFrame,
+    schema: Schema,
+    sample_rows: int = SAMPLE_ROWS
+) -> ValidationReport:
+    """
+    Check every rule of a schema against a frame or chunk.
+
+    Returns a report with the number of violating rows per (column, rule)
+    and the index labels of the first sample_rows of them, plus the null
+    count of every schema column present. Columns of the frame that the
+    schema does not mention are ignored.
+    """
+    null_counts: Dict[str, int] = {}
+    violations: List[Violation] = []
+    everything = list(df.index[:sample_rows])
+
+    for rule in schema.rules:
+        if rule.name not in df.columns:
+            if rule.required:
+                violations.append(Violation(
+                    rule.name, "missing_column", len(df), everything))
+            continue
+
+        series = df[rule.name]
+        if rule.kind is not None and not _has_kind(series, rule.kind):
+            violations.append(Violation(
+                rule.name, "kind", len(df), everything))
+            continue
+
+        nulls, masks = _rule_masks(series, rule)
+        null_counts[rule.name] = int(np.count_nonzero(nulls))
+
+        for name, mask in masks:
+            count = int(np.count_nonzero(mask))
+            if count:
+                positions = np.flatnonzero(mask)[:sample_rows]
+                violations.append(Violation(
+                    rule.name, name, count, list(df.index[positions])))
+
+    return ValidationReport(schema.name, len(df), null_counts, violations)
+
+
+def merge_reports(
+    first: ValidationReport,
+    second: ValidationReport,
+    sample_rows: int = SAMPLE_ROWS
+) -> ValidationReport:
+    """
+    Combine the reports of two consecutive chunks of the same data.
+
+    Counts add up; sample rows are the first sample_rows over both, so
+    chunks should carry their position in the stream as their index.
+    """
+    if first.schema != second.schema:
+        raise ValueError(
+            f"Cannot merge reports of schemas '{first.schema}' and "
+            f"'{second.schema}'"
+        )
+
+    null_counts = dict(first.null_counts)
+    for col, count in second.null_counts.items():
+        null_counts[col] = null_counts.get(col, 0) + count
+
+    merged: Dict[Tuple[str, str], Violation] = {}
+    for violation in first.violations + second.violations:
+        key = (violation.column, violation.rule)
+        if key in merged:
+            previous = merged[key]
+            violation = Violation(
+                violation.column,
+                violation.rule,
+                previous.count + violation.count,
+                (previous.sample_rows + violation.sample_rows)[:sample_rows],
+            )
+        merged[key] = violation
+
+    return ValidationReport(
+        first.schema,
+        first.row_count + second.row_count,
+        null_counts,
+        list(merged.values()),
+    )
+
+
+def validate_chunks(
+    chunks: Iterable[DataFrame],
+    schema: Schema,
+    sample_rows: int = SAMPLE_ROWS
+) -> ValidationReport:
+    """Validate each chunk of a stream as it arrives and merge the reports."""
+    report = ValidationReport(schema.name, 0, {}, [])
+    for chunk in chunks:
+        report = merge_reports(
+            report, validate(chunk, schema, sample_rows), sample_rows)
+    return report
+
+
+def _describe(violation: Violation) -> str:
+    """One-line description of a violation."""
+    rows = ", ".join(str(row) for row in violation.sample_rows)
+    return (
+        f"{violation.count:,} rows of '{violation.column}' break rule "
+        f"'{violation.rule}' (e.g. rows {rows})"
+    )
+
+
+def log_report(report: ValidationReport, logger: Logger) -> None:
+    """
+    Log missing value counts (debug) and every violation (error, saved to
+    JSON like other validation failures).
+    """
+    total_missing = sum(report.null_counts.values())
+    if total_missing > 0:
+        logger.debug(f"Missing values found: {total_missing} total")
+        for col, count in report.null_counts.items():
+            if count > 0:
+                logger.debug(f"  {col}: {count} missing")
+    else:
+        logger.debug("No missing values found")
+
+    for violation in report.violations:
+        logger.error(
+            f"Validation failed for column '{violation.column}'",
+            exception=DataValidationError(_describe(violation)),
+            save_to_json=True
+        )
+
+    if report.ok:
+        logger.debug(
+            f"✓ {report.row_count:,} rows match schema '{report.schema}'")
+
+
+def raise_for_violations(
+    report: ValidationReport,
+    rules: Optional[Sequence[str]] = None
+) -> None:
+    """
+    Raise if the report has violations (only of the given rule names, if
+    any are given, e.g. ["missing_column"]).
+
+    Raises:
+        DataValidationError: Listing every matching violation
+    """
+    failed = [
+        violation for violation in report.violations
+        if rules is None or violation.rule in rules
+    ]
+    if failed:
+        raise DataValidationError(
+            f"Schema '{report.schema}' violated: "
+            + "; ".join(_describe(violation) for violation in failed)
+        )
@@ -6,30 +6,84 @@
 
 import sys
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import pandas as pd
 from pandas import DataFrame, Series
 from haashi_pkg.utility import Logger
-from haashi_pkg.data_engine import DataLoader, DataAnalyzer
+from haashi_pkg.data_engine import DataAnalyzer
+import shared_path  # noqa: F401
+from parsing import parse_dates
+from profiling import (
+    PROFILE_BATCH_ROWS,
+    DatasetProfile,
+    Profiler,
+    log_missing,
+    profile_frame,
+    write_profiles,
+)
+from validation import (
+    ColumnRule,
+    Schema,
+    log_report,
+    raise_for_violations,
+    validate,
+)
 
 
 # pyright: basic
 
 
+# Cleaned columns profiled for labels (the raw data is profiled in full)
+CLEANED_PROFILE_COLUMNS = ["name", "date"]
+
+# Configuration: Where the raw and cleaned profiles of each run are saved
+PROFILE_PATH = "data/profiles/weather_profile.json"
+
+# Configuration: Expectations for cleaned records (temperatures in °F)
+CLEANED_WEATHER_SCHEMA = Schema("cleaned_weather", (
+    ColumnRule("name", "text", nullable=False),
+    ColumnRule("date", "date", nullable=False,
+               min_date="1850-01-01", max_date="today"),
+    ColumnRule("tmax", "number", nullable=False,
+               min_value=-80, max_value=140),
+    ColumnRule("tmin", "number", nullable=False,
+               min_value=-80, max_value=140),
+))
+
+
 def get_station_labels(
     df: DataFrame,
     name_col: str,
-    date_col: str
+    date_col: str,
+    profile: Optional[DatasetProfile] = None
 ) -> Tuple[str, str, str]:
-    """Extract station name and date range labels from weather data."""
+    """
+    Extract station name and date range labels from weather data.
+
+    With a profile of the data (see profiling.py) the names and date range
+    are taken from it and df is not scanned, unless the profile's first
+    values do not list every station. Either way the stations are listed
+    in order of first appearance.
+    """
+    names = profile.columns[name_col] if profile is not None else None
+
     # Get station name(s)
-    station_names = df[name_col].unique().tolist()
+    if names is not None and names.distinct_exact \
+            and names.distinct == len(names.first_values):
+        station_names = list(names.first_values)
+    else:
+        station_names = df[name_col].unique().tolist()
     station_name = station_names[0] if len(
         station_names) == 1 else ", ".join(station_names)
 
     # Get date range
-    start_date = df[date_col].min()
-    end_date = df[date_col].max()
+    if profile is not None:
+        start_date = profile.columns[date_col].min
+        end_date = profile.columns[date_col].max
+    else:
+        start_date = df[date_col].min()
+        end_date = df[date_col].max()
 
     start_str = start_date.strftime("%b %Y")
     end_str = end_date.strftime("%b %Y")
@@ -46,34 +100,44 @@ def clean_data(
     Clean weather data and extract metadata.
 
     Returns temperature data (date, tmax, tmin) and labels
-    (station_name, start_date, end_date).
+    (station_name, start_date, end_date). The missing value inspection and
+    the labels come from one-pass column profiles of the raw and cleaned
+    data, gathered on every run and saved to PROFILE_PATH (see
+    profiling.py).
     """
     if logger is None:
         logger = Logger(level=logging.INFO)
 
     logger.info(f"Loading weather data from {filepath}")
 
-    # Load data
-    loader = DataLoader(filepath, logger=logger)
-    weather_df = loader.load_csv_single()
-
-    logger.debug(f"Loaded {len(weather_df)} records")
-    logger.debug("Starting data cleaning...")
-
     # Initialize analyzer
     analyzer = DataAnalyzer(logger=logger)
 
-    # Normalize column names
-    weather_df = analyzer.normalize_column_names(weather_df)
-
-    # Convert date column
+    # Load data batch by batch, normalizing column names, converting the
+    # date column and profiling each batch as it is read
     logger.debug("Converting date column to datetime")
-    weather_df["date"] = analyzer.convert_datetime(Series(weather_df["date"]))
+    profiler = Profiler()
+    batches: List[DataFrame] = []
+    for batch in pd.read_csv(filepath, chunksize=PROFILE_BATCH_ROWS):
+        batch = analyzer.normalize_column_names(batch)
+        batch["date"] = parse_dates(Series(batch["date"]))
+        profiler.update(batch)
+        batches.append(batch)
+
+    if not batches:
+        raise ValueError(f"No records found in {filepath}")
+
+    weather_df = pd.concat(batches, ignore_index=True)
+    del batches
+    profiles: Dict[str, DatasetProfile] = {"raw": profiler.profile()}
+
+    logger.debug(f"Loaded {len(weather_df)} records")
+    logger.debug("Starting data cleaning...")
 
     # Check for missing values
-    all_columns = list(weather_df.columns)
-    missing_counts = analyzer.count_missing(weather_df, all_columns)
-    total_missing = sum(missing_counts)
+    log_missing(profiles["raw"], logger)
+    total_missing = sum(
+        col.null_count for col in profiles["raw"].columns.values())
 
     if total_missing > 0:
         logger.debug(f"Found {total_missing} missing values")
@@ -86,9 +150,19 @@ def clean_data(
     # Sort by date
     weather_df = weather_df.sort_values("date")
 
+    # Validate cleaned data: missing or mistyped columns stop the run,
+    # other violations are logged
+    logger.debug("Validating cleaned data")
+    report = validate(weather_df, CLEANED_WEATHER_SCHEMA)
+    log_report(report, logger)
+    raise_for_violations(report, ["missing_column", "kind"])
+
+    profiles["cleaned"] = profile_frame(weather_df, CLEANED_PROFILE_COLUMNS)
+    write_profiles(filepath, profiles, PROFILE_PATH)
+
     # Extract metadata
     station_name, start_str, end_str = get_station_labels(
-        weather_df, "name", "date"
+        weather_df, "name", "date", profiles["cleaned"]
     )
 
     logger.info("Data cleaning completed")
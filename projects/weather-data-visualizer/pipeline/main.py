@@ -2,14 +2,26 @@
 
 # main.py
 
-"""Weather Data Visualizer - Main entry point."""
+"""
+Weather Data Visualizer - Main entry point.
+
+The plot is skipped when the weather data and code are unchanged since the
+last successful run; pass -f/--force to re-create it.
+"""
 
 import sys
 import logging
 from haashi_pkg.utility import Logger
+import shared_path  # noqa: F401
+from stages import Stage, StageRunner
 from visualize_data import visualize_data
 
 
+# Stage inputs and outputs (the modules' default paths)
+RAW_PATH = "data/4150697.csv"
+PLOT_PATH = "data/plots/weather_data.png"
+
+
 def parse_args() -> int:
     """Parse command line args for logging level."""
     if len(sys.argv) > 1:
@@ -18,6 +30,11 @@ def parse_args() -> int:
     return logging.INFO
 
 
+def parse_force() -> bool:
+    """Return True if the plot should be re-created (-f or --force)."""
+    return "-f" in sys.argv or "--force" in sys.argv
+
+
 def main() -> None:
     """Run the weather data visualization pipeline."""
     log_level = parse_args()
@@ -28,9 +45,20 @@ def main() -> None:
     logger.info("=" * 60)
 
     try:
+        runner = StageRunner(force=parse_force(), logger=logger)
+
         logger.info("\nCreating weather visualization...")
-        visualize_data(logger=logger)
-        logger.info("✓ Visualization created successfully")
+        ran, _ = runner.run(Stage(
+            name="visualize",
+            func=lambda: visualize_data(logger=logger),
+            inputs=[RAW_PATH],
+            outputs=[PLOT_PATH],
+            code=["visualize_data"],
+        ))
+        if ran:
+            logger.info("✓ Visualization created successfully")
+
+        runner.commit()
 
         logger.info("\n")
         logger.info("=" * 60)
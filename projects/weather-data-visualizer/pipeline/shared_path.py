@@ -0,0 +1,22 @@
+# shared_path.py
+
+"""
+Shared Module Path
+
+Importing this module makes the modules shared by every project (in
+projects/shared) importable by their plain name, like the modules of this
+pipeline. Import it before any shared module:
+
+    import shared_path  # noqa: F401
+    from stages import Stage, StageRunner
+"""
+
+import sys
+from pathlib import Path
+
+
+# Directory of the modules shared by every project
+SHARED_DIR = Path(__file__).resolve().parents[2] / "shared"
+
+if str(SHARED_DIR) not in sys.path:
+    sys.path.append(str(SHARED_DIR))